@@ -1,18 +1,21 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-from bs4 import BeautifulSoup
-import pandas as pd
 import os
-import re
-import time
 from threading import Thread
-from pathlib import Path
+from oed_extract import ExtractionPlan
+from oed_sinks import CombinedRecordsSink, PdfSink, RecordsSink
+from oed_scrape import read_url_list, scrape
+from oed_metrics import RunMetrics
+from oed_profile import profiling
+
+# Tk front-end for `oed.py scrape`: the page loads, extraction and writers are
+# those of oed_scrape, with the field checkboxes compiled into the extraction
+# plan. Records go to a 'scraped' folder next to the URL list, PDFs to 'pdf'.
+# The chromedriver at CHROMEDRIVER is used when installed, otherwise
+# webdriver-manager downloads one.
+
+CHROMEDRIVER = '/usr/local/bin/chromedriver'
+RECORD_FORMATS = {"excel": "excel", "xml": "xml", "tei-xml": "xml"}  # no TEI writer yet: the OED XML layout
 
 
 class OEDScraperApp:
@@ -38,6 +41,9 @@ class OEDScraperApp:
         self.single_file_checkbox = tk.Checkbutton(master, text="Export single XML/TEI-XML file", variable=self.single_file_var)
         self.single_file_checkbox.grid(row=2, column=1, columnspan=2, sticky="w")
 
+        self.profile_var = tk.BooleanVar()
+        tk.Checkbutton(master, text="Profile this run", variable=self.profile_var).grid(row=2, column=3, sticky="w")
+
         self.extract_label = tk.Label(master, text="Select fields to extract:")
         self.extract_label.grid(row=3, column=0, sticky="w")
         self.fields = ["Headword", "URL", "Etymology", "Item Enumerator", "Date Range", "Grammar", "Meaning", "Quotation Date", "Quotation Text", "Citation"]
@@ -69,138 +75,52 @@ class OEDScraperApp:
         thread = Thread(target=self.scrape_urls)
         thread.start()
 
-    def ensure_single_page(self, driver):
-        try:
-            button = WebDriverWait(driver, 5).until(
-                EC.element_to_be_clickable((By.ID, "tabbed-view-switch-nontabbed"))
-            )
-            button.click()
-            self.log("✔️ Forced Single Page view.")
-        except TimeoutException:
-            self.log("ℹ️ Single Page button not found—may already be on single page.")
-
-    def expand_etymology_show_more(self, driver):
-        try:
-            etymology_section = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.ID, "etymology"))
-            )
-            show_more_button = etymology_section.find_element(By.CLASS_NAME, "quotations-button")
-            if show_more_button.is_displayed():
-                show_more_button.click()
-                self.log("✔️ Clicked 'Show more' in Etymology section.")
-        except Exception:
-            self.log("ℹ️ No 'Show more' button found in Etymology.")
-
     def scrape_urls(self):
         url_list_path = self.url_entry.get()
         if not os.path.isfile(url_list_path):
             messagebox.showerror("Error", "Invalid file path")
             return
 
-        with open(url_list_path, 'r') as f:
-            urls = [line.strip() for line in f if line.strip()]
-
+        urls = read_url_list(url_list_path)
         self.log(f"Loaded {len(urls)} URLs.")
         self.progress["maximum"] = len(urls)
         self.progress["value"] = 0
 
-        export_format = self.export_var.get()
         base_dir = os.path.dirname(url_list_path)
         scraped_dir = os.path.join(base_dir, 'scraped')
         os.makedirs(scraped_dir, exist_ok=True)
-
-        chrome_service = Service('/usr/local/bin/chromedriver')
-        options = webdriver.ChromeOptions()
-        driver = webdriver.Chrome(service=chrome_service, options=options)
-
-        for index, url in enumerate(urls):
-            self.log(f"Scraping URL {index + 1}/{len(urls)}: {url}")
-            driver.get(url)
-            self.ensure_single_page(driver)
-            self.expand_etymology_show_more(driver)
-            time.sleep(2)
-
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            headword = soup.find(class_='headword').get_text(strip=True) if soup.find(class_='headword') else 'Unknown'
-
-            etymology = ''
-            if self.field_vars['Etymology'].get():
-                etym_section = soup.find(class_='etymology')
-                if etym_section:
-                    etym_summary = etym_section.find(class_='etymology-summary')
-                    if etym_summary:
-                        etymology = ' '.join(etym_summary.stripped_strings)
-                    else:
-                        etymology = ' '.join(etym_section.stripped_strings)
-
-            meaning_entries = soup.find_all(class_='item-content')
-            data = []
-            meanings_seen = {}  # Dictionary to store meanings and their associated quotations
-
-            for meaning_entry in meaning_entries:
-                meaning_text = meaning_entry.find(class_='definition')
-                meaning = ' '.join(meaning_text.stripped_strings) if meaning_text else ''
-                if not meaning.strip() or meaning in meanings_seen:
-                    continue  # Skip empty or duplicate meanings
-
-                # Initialize data for this meaning (will group quotes here)
-                meaning_data = {
-                    'Headword': headword if self.field_vars['Headword'].get() else '',
-                    'Meaning': meaning if self.field_vars['Meaning'].get() else '',
-                    'Etymology': etymology if self.field_vars['Etymology'].get() else '',
-                    'Item Enumerator': '',
-                    'Date Range': '',
-                    'Grammar': '',
-                    'Quotation Date': '',
-                    'Quotation Text': '',
-                    'Citation': ''
-                }
-
-                # Collect quotations for this meaning
-                quotes = []
-                item_enum = meaning_entry.find_previous(class_='item-enumerator')
-                daterange = meaning_entry.find_previous(class_='daterange')
-                grammar = meaning_entry.find_previous(class_='grammar')
-                quote_container = meaning_entry.find_next(class_='quotation-container')
-                if quote_container:
-                    quote_elements = quote_container.find_all(class_='quotation')
-                    for quote in quote_elements:
-                        quote_date = quote.find(class_='quotation-date').get_text(strip=True) if quote.find(class_='quotation-date') else ''
-                        quote_text = quote.find(class_='quotation-text').get_text(strip=True) if quote.find(class_='quotation-text') else ''
-                        citation = quote.find(class_='citation').get_text(strip=True) if quote.find(class_='citation') else ''
-                        
-                        quotes.append((quote_date, quote_text, citation))
-
-                # Only add this meaning if it's new (not already in the dictionary)
-                if meaning not in meanings_seen:
-                    # If the meaning has quotes, include them
-                    for quote in quotes:
-                        if self.field_vars['Quotation Date'].get():
-                            meaning_data['Quotation Date'] = quote[0]
-                        if self.field_vars['Quotation Text'].get():
-                            meaning_data['Quotation Text'] = quote[1]
-                        if self.field_vars['Citation'].get():
-                            meaning_data['Citation'] = quote[2]
-                    
-                    # Add the meaning and its associated quotations to the data list
-                    data.append(meaning_data)
-                    meanings_seen[meaning] = True  # Mark this meaning as seen
-
-            # Export data to Excel for this URL
-            if data:
-                df = pd.DataFrame(data)
-                filename = f"{headword}_{index + 1}.xlsx"
-                file_path = os.path.join(scraped_dir, filename)
-                df.to_excel(file_path, index=False)
-                self.log(f"Data for URL {url} exported to {file_path}")
-            
-            self.progress["value"] = index + 1
-            self.master.update_idletasks()
-
-        driver.quit()
-
+        sinks = self.build_sinks(base_dir, scraped_dir)
+
+        metrics = RunMetrics(os.path.join(scraped_dir, 'metrics.jsonl'), tool="OEDScraperApp")
+        profile_dir = os.path.join(scraped_dir, 'profile') if self.profile_var.get() else None
+        with profiling(profile_dir, "OEDScraperApp", log=self.log):
+            chromedriver = CHROMEDRIVER if os.path.exists(CHROMEDRIVER) else None
+            scrape(urls, sinks, headless=False, chromedriver=chromedriver, metrics=metrics,
+                   log=self.log, on_page=self.update_progress)
+        for sink in sinks:
+            if isinstance(sink, CombinedRecordsSink):
+                for path in sink.close():
+                    self.log(f"  💾 {path}")
+
+        metrics.print_summary(self.log)
         self.log("Scraping and export complete.")
 
+    def build_sinks(self, base_dir, scraped_dir):
+        export_format = self.export_var.get()
+        if export_format == "pdf":
+            return [PdfSink(os.path.join(base_dir, 'pdf'))]
+        # The checkboxes are read once; unchecked fields are never looked up
+        plan = ExtractionPlan([field for field in self.fields if self.field_vars[field].get()])
+        formats = [RECORD_FORMATS[export_format]]
+        if export_format == "tei-xml":
+            self.log("ℹ️ TEI-XML is written in the OED XML layout.")
+        if self.single_file_var.get() and export_format != "excel":
+            return [CombinedRecordsSink(scraped_dir, formats, plan=plan)]
+        return [RecordsSink(scraped_dir, formats, subdirs=False, plan=plan)]
+
+    def update_progress(self, index, url, ok):
+        self.master.after(0, lambda: self.progress.configure(value=index + 1))
+
 
 if __name__ == '__main__':
     root = tk.Tk()
@@ -1,20 +1,17 @@
 import os
-import pytesseract
 import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from pdf2image import convert_from_path
-from PIL import Image
-import fitz  # PyMuPDF
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from ocr_pipeline import run_ocr_batch, default_workers, DEFAULT_CACHE_DIR
+from ocr_engines import ENGINES
+from oed_metrics import RunMetrics
+from oed_profile import profiling
 
-# Ubuntu default Tesseract path
-pytesseract.pytesseract.tesseract_cmd = "/usr/bin/tesseract"
 
 class PDFOCRApp:
     def __init__(self, root):
         self.root = root
-        self.root.title("PDF OCR Tool (4 Threads per File)")
+        self.root.title("PDF OCR Tool")
 
         self.pdf_paths = []
         self.lock = threading.Lock()
@@ -40,13 +37,39 @@ class PDFOCRApp:
                                  values=['eng', 'deu', 'fra', 'spa', 'ita'], state="readonly")
         lang_menu.grid(row=2, column=1, sticky="w")
 
+        tk.Label(frame, text="OCR Engine:").grid(row=2, column=2, sticky="w")
+        self.engine = tk.StringVar(value="auto")
+        ttk.Combobox(frame, textvariable=self.engine, values=ENGINES, state="readonly", width=10).grid(row=2, column=3, sticky="w")
+
         self.low_res = tk.BooleanVar(value=False)
         tk.Checkbutton(frame, text="Low-Res Mode (200 DPI)", variable=self.low_res).grid(row=3, column=0, sticky="w", pady=(5, 0))
 
+        self.preprocess = tk.BooleanVar(value=False)
+        tk.Checkbutton(frame, text="Clean up pages + adaptive DPI", variable=self.preprocess).grid(row=3, column=2, columnspan=2, sticky="w", pady=(5, 0))
+
+        self.skip_text_pages = tk.BooleanVar(value=True)
+        tk.Checkbutton(frame, text="Skip pages that already have text", variable=self.skip_text_pages).grid(row=3, column=1, sticky="w", pady=(5, 0))
+
+        tk.Label(frame, text="Worker Processes:").grid(row=4, column=0, sticky="w")
+        self.workers = tk.IntVar(value=default_workers())
+        tk.Spinbox(frame, from_=1, to=max(64, default_workers()), textvariable=self.workers, width=5).grid(row=4, column=1, sticky="w")
+
+        self.use_cache = tk.BooleanVar(value=True)
+        tk.Checkbutton(frame, text="Reuse cached pages", variable=self.use_cache).grid(row=5, column=0, sticky="w")
+        self.cache_dir = tk.StringVar(value=DEFAULT_CACHE_DIR)
+        tk.Entry(frame, textvariable=self.cache_dir, width=50).grid(row=5, column=1, sticky="ew")
+        tk.Button(frame, text="Browse", command=self.select_cache_dir).grid(row=5, column=2)
+
+        self.profile = tk.BooleanVar(value=False)
+        tk.Checkbutton(frame, text="Profile this run", variable=self.profile).grid(row=5, column=3, sticky="w")
+
         self.progress = ttk.Progressbar(frame, length=300)
-        self.progress.grid(row=4, column=0, columnspan=3, pady=10)
+        self.progress.grid(row=6, column=0, columnspan=3, pady=10)
 
-        tk.Button(frame, text="Start OCR", command=self.start_ocr_thread).grid(row=5, column=0, columnspan=3, sticky="ew")
+        self.status = tk.StringVar(value="")
+        tk.Label(frame, textvariable=self.status).grid(row=7, column=0, columnspan=3, sticky="w")
+
+        tk.Button(frame, text="Start OCR", command=self.start_ocr_thread).grid(row=8, column=0, columnspan=3, sticky="ew")
 
     def select_file(self):
         path = filedialog.askopenfilename(filetypes=[("PDF Files", "*.pdf")])
@@ -63,6 +86,11 @@ class PDFOCRApp:
         if folder:
             self.output_dir.set(folder)
 
+    def select_cache_dir(self):
+        folder = filedialog.askdirectory()
+        if folder:
+            self.cache_dir.set(folder)
+
     def start_ocr_thread(self):
         if not self.pdf_paths:
             messagebox.showerror("No Files", "Please select at least one PDF file or folder.")
@@ -71,78 +99,45 @@ class PDFOCRApp:
             messagebox.showerror("No Output Directory", "Please select an output directory.")
             return
 
-        self.progress["maximum"] = len(self.pdf_paths)
         self.progress["value"] = 0
         self.completed = 0
 
-        thread = threading.Thread(target=self.run_sequential_ocr)
+        thread = threading.Thread(target=self.run_ocr)
         thread.start()
 
-    def run_sequential_ocr(self):
-        for pdf_path in self.pdf_paths:
-            self.convert_pdf_to_searchable(pdf_path)
+    def run_ocr(self):
+        dpi = 200 if self.low_res.get() else 300
+        metrics = RunMetrics(os.path.join(self.output_dir.get(), "ocr-metrics.jsonl"), tool="PDF-OCR")
+        profile_dir = os.path.join(self.output_dir.get(), "profile") if self.profile.get() else None
+        with profiling(profile_dir, "PDF-OCR"):
+            run_ocr_batch(
+                self.pdf_paths, self.output_dir.get(), dpi=dpi, lang=self.lang.get(),
+                workers=self.workers.get(), on_start=self.set_total_pages,
+                on_page=self.update_progress, on_file=self.file_done,
+                skip_text_pages=self.skip_text_pages.get(),
+                cache_dir=self.cache_dir.get() if self.use_cache.get() else None,
+                engine=self.engine.get(), preprocess=self.preprocess.get(), metrics=metrics,
+            )
+        summary = metrics.print_summary(unit="pages")
+        if summary["items"]:
+            self.root.after(0, lambda: self.status.set(
+                f"{summary['items']} pages OCR'd, {summary['per_minute']:.1f} pages/min, "
+                f"{summary['failed']} failed"))
         self.root.after(0, lambda: messagebox.showinfo("Done", "OCR process completed!"))
 
-    def update_progress(self):
+    def set_total_pages(self, total):
+        self.root.after(0, lambda: self.progress.configure(maximum=max(total, 1)))
+
+    def update_progress(self, pdf_path, page_num, ok):
         with self.lock:
             self.completed += 1
-            self.root.after(0, lambda: self.progress.configure(value=self.completed))
-
-    def convert_pdf_to_searchable(self, input_pdf_path):
-        try:
-            print(f"[INFO] Processing: {os.path.basename(input_pdf_path)}")
-            pdf_info = fitz.open(input_pdf_path)
-            num_pages = len(pdf_info)
-            pdf_info.close()
-
-            output_pdf_path = os.path.join(self.output_dir.get(), os.path.basename(input_pdf_path))
-            dpi = 200 if self.low_res.get() else 300
-
-            def process_page(page_num):
-                attempts = 0
-                while attempts < 3:
-                    try:
-                        print(f"  [PAGE {page_num + 1}/{num_pages}] OCR (try {attempts + 1})...")
-                        images = convert_from_path(
-                            input_pdf_path, dpi=dpi,
-                            first_page=page_num + 1, last_page=page_num + 1
-                        )
-                        if not images:
-                            raise ValueError("Empty image list")
-
-                        image = images[0]
-                        ocr_pdf_bytes = pytesseract.image_to_pdf_or_hocr(
-                            image, extension='pdf', lang=self.lang.get()
-                        )
-                        return page_num, ocr_pdf_bytes
-                    except Exception as e:
-                        attempts += 1
-                        print(f"    ⚠️ Retry {attempts} for page {page_num + 1}: {e}")
-                print(f"    ❌ Failed page {page_num + 1}")
-                return page_num, None
-
-            results = [None] * num_pages
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                futures = {executor.submit(process_page, i): i for i in range(num_pages)}
-                for future in as_completed(futures):
-                    page_index, result = future.result()
-                    results[page_index] = result
-
-            final_doc = fitz.open()
-            for idx, pdf_bytes in enumerate(results):
-                if pdf_bytes:
-                    page_doc = fitz.open("pdf", pdf_bytes)
-                    final_doc.insert_pdf(page_doc)
-                else:
-                    print(f"    ⚠️ Skipping page {idx + 1} in final merge")
-
-            final_doc.save(output_pdf_path)
-            print(f"  ✅ Saved to: {output_pdf_path}")
-
-        except Exception as e:
-            print(f"  ❌ Error processing {input_pdf_path}: {e}")
-        finally:
-            self.update_progress()
+            completed = self.completed
+        self.root.after(0, lambda: self.progress.configure(value=completed))
+
+    def file_done(self, pdf_path, output_path):
+        name = os.path.basename(pdf_path)
+        message = f"Saved {name}" if output_path else f"Failed {name}"
+        self.root.after(0, lambda: self.status.set(message))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,193 @@
+import os
+import random
+from html import escape
+
+# Synthetic, deterministic OED-like fixtures for the benchmark suite: entry
+# pages with the class names the scrapers parse (headword, etymology,
+# item-enumerator/daterange/grammar, item-content > definition,
+# quotation-container > quotation), corpora in every scraped format, and
+# image-only PDFs for the OCR path. Same seed and sizes give the same bytes.
+
+WORDS = ("the of and to in that it with as for was on be by at this had not are but from or have "
+         "an they which one you were her all she there would their we him been has when who will "
+         "more no if out so said what up its about into than them can only other new some could time "
+         "these two may then do first any my now such like our over man me even most made after also "
+         "did many before must through back years where much your way well down should because each "
+         "just those people how too little state good very make world still own see men work long get "
+         "here between both life being under never day same another know while last might us great old "
+         "year off come since against go came right used take three").split()
+GRAMMAR = ["noun", "verb", "adjective", "adverb", "transitive", "intransitive"]
+SOURCES = ["Shakespeare", "Chaucer", "Milton", "Dickens", "Times", "Tatler", "Spectator", "Beowulf"]
+
+SCALES = {
+    # entries, senses per entry, quotations per sense, etymology words, nesting depth
+    "small": dict(entries=5, senses=8, quotes=4, etymology=40, depth=1),
+    "medium": dict(entries=20, senses=30, quotes=8, etymology=120, depth=2),
+    "large": dict(entries=50, senses=80, quotes=12, etymology=400, depth=3),
+}
+
+
+def sentence(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def headword_for(index):
+    rng = random.Random(index)
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 9))) + str(index)
+
+
+def _quotations(rng, quotes):
+    parts = ['<div class="quotation-container">']
+    for _ in range(quotes):
+        year = rng.randint(1200, 2020)
+        parts.append(
+            '<blockquote class="quotation">'
+            f'<span class="quotation-date">{year}</span> '
+            f'<cite class="citation">{rng.choice(SOURCES)} {rng.randint(1, 300)}</cite> '
+            f'<span class="quotation-text">{escape(sentence(rng, rng.randint(8, 30)))}</span>'
+            '</blockquote>')
+    parts.append('</div>')
+    return parts
+
+
+def _senses(rng, count, quotes, depth, prefix=""):
+    # Each sense may hold a level of sub-senses, like OED's 1 > 1.a > 1.a.i
+    parts = ['<ol class="senses">']
+    for n in range(1, count + 1):
+        enumerator = f"{prefix}{n}" if not prefix else f"{prefix}{chr(96 + n) if n <= 26 else n}"
+        start = rng.randint(1200, 1900)
+        parts.append('<li class="item">')
+        parts.append(f'<span class="item-enumerator">{enumerator}.</span>')
+        parts.append(f'<span class="daterange">{start}–{rng.choice([str(start + rng.randint(1, 300)), ""])}</span>')
+        parts.append(f'<span class="grammar">{rng.choice(GRAMMAR)}</span>')
+        parts.append('<div class="item-content">'
+                     f'<div class="definition">{escape(sentence(rng, rng.randint(6, 25)))}.</div></div>')
+        parts += _quotations(rng, quotes)
+        if depth > 1 and rng.random() < 0.5:
+            parts += _senses(rng, max(1, count // 4), quotes, depth - 1, prefix=f"{enumerator}.")
+        parts.append('</li>')
+    parts.append('</ol>')
+    return parts
+
+
+def entry_html(index, senses=10, quotes=4, etymology=60, depth=1, seed=0):
+    rng = random.Random(seed * 1000003 + index)
+    headword = headword_for(index)
+    parts = [
+        '<!DOCTYPE html><html><head><meta charset="utf-8">',
+        f'<title>{headword}, n. meanings, etymology and more | Oxford English Dictionary</title></head><body>',
+        '<div id="entry-content"><section class="entry-header">',
+        f'<h1 class="headword">{headword}</h1></section>',
+        '<section id="etymology" class="etymology">',
+        f'<div class="etymology-summary"><p>{escape(sentence(rng, max(5, etymology // 4)))}</p></div>',
+        f'<p>{escape(sentence(rng, etymology))}</p>',
+        '<button class="quotations-button">Show more</button></section>',
+        '<section id="meaning-and-use">',
+    ]
+    parts += _senses(rng, senses, quotes, depth)
+    parts.append('</section></div></body></html>')
+    return headword, "\n".join(parts)
+
+
+def write_pages(out_dir, entries=5, seed=0, **sizes):
+    # Returns [(headword, path)]
+    os.makedirs(out_dir, exist_ok=True)
+    pages = []
+    for index in range(entries):
+        headword, html = entry_html(index, seed=seed, **sizes)
+        path = os.path.join(out_dir, f"{headword}_{index + 1}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+        pages.append((headword, path))
+    return pages
+
+
+def write_corpus(out_dir, pages, formats=("excel", "csv", "xml"), duplicate=0.2, seed=0):
+    # The scraped-file layout (<fmt>/<headword>_<n>.<ext>) from the fixture pages,
+    # with a share of rows repeated so the dedup tools have work to do
+    from oed_extract import extract_entries
+    from oed_model import entries_from_rows, iter_rows
+    from oed_sinks import RECORD_WRITERS
+
+    rng = random.Random(seed)
+    written = {fmt: [] for fmt in formats}
+    for n, (headword, path) in enumerate(pages, start=1):
+        with open(path, encoding="utf-8") as f:
+            rows = list(iter_rows(extract_entries(f.read(), f"https://www.oed.com/dictionary/{headword}")))
+        entries = entries_from_rows(rows + rng.sample(rows, int(len(rows) * duplicate)))
+        for fmt in formats:
+            extension, writer = RECORD_WRITERS[fmt]
+            os.makedirs(os.path.join(out_dir, fmt), exist_ok=True)
+            target = os.path.join(out_dir, fmt, f"{headword}_{n}{extension}")
+            writer(entries, target)
+            written[fmt].append(target)
+    return written
+
+
+def write_text_lines(path, lines=20000, duplicate=0.3, seed=0):
+    rng = random.Random(seed)
+    unique = [sentence(rng, rng.randint(3, 12)) for _ in range(int(lines * (1 - duplicate)))]
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(lines):
+            f.write(rng.choice(unique) + "\n")
+    return path
+
+
+def write_image_pdf(path, pages=3, dpi=150, seed=0, font_size=None, line_height=None, columns=1):
+    # Image-only PDF (no text layer) of dictionary-like text, plus the ground
+    # truth next to it in the benchmarks/ocr_preprocess.py format. font_size
+    # and line_height are in pixels at dpi; with several columns every other
+    # one is set half a line lower, as their baselines rarely line up.
+    import io
+    import fitz  # PyMuPDF
+    from PIL import Image, ImageDraw, ImageFont
+
+    rng = random.Random(seed)
+    width, height = int(8.5 * dpi), int(11 * dpi)
+    try:
+        font = ImageFont.truetype("DejaVuSerif.ttf", font_size or int(dpi / 7))
+    except OSError:
+        font = ImageFont.load_default()
+    line_height = line_height or int(dpi / 4.5)
+    column_width = (width - dpi) // columns
+    doc = fitz.open()
+    truth = []
+    for _ in range(pages):
+        image = Image.new("L", (width, height), 255)
+        draw = ImageDraw.Draw(image)
+        lines = []
+        for column in range(columns):
+            x = dpi // 2 + column * column_width
+            y = dpi // 2 + (line_height // 2 if column % 2 else 0)
+            while y < height - dpi // 2:
+                words = rng.randint(6, 11)
+                line = sentence(rng, words)
+                while words > 1 and draw.textlength(line, font=font) > column_width - dpi // 8:
+                    words -= 1
+                    line = line.rsplit(" ", 1)[0]
+                draw.text((x, y), line, fill=0, font=font)
+                lines.append(line)
+                y += line_height
+        truth.append("\n".join(lines))
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        page = doc.new_page(width=8.5 * 72, height=11 * 72)
+        page.insert_image(page.rect, stream=buffer.getvalue())
+    doc.save(path)
+    doc.close()
+    with open(os.path.splitext(path)[0] + ".txt", "w", encoding="utf-8") as f:
+        f.write("\f".join(truth))
+    return path
+
+
+def build(out_dir, scale="small", seed=0, pdf_pages=3):
+    # Everything the suite needs under out_dir; returns the paths by kind
+    sizes = dict(SCALES[scale])
+    entries = sizes.pop("entries")
+    pages = write_pages(os.path.join(out_dir, "html"), entries=entries, seed=seed, **sizes)
+    corpus = write_corpus(os.path.join(out_dir, "scraped"), pages, seed=seed)
+    text = write_text_lines(os.path.join(out_dir, "lines.txt"), lines=entries * 2000, seed=seed)
+    pdf_dir = os.path.join(out_dir, "pdf")
+    os.makedirs(pdf_dir, exist_ok=True)
+    pdf = write_image_pdf(os.path.join(pdf_dir, "scan.pdf"), pages=pdf_pages, seed=seed)
+    return {"pages": [path for _, path in pages], "corpus": corpus, "text": text, "pdf": pdf}
@@ -0,0 +1,143 @@
+import os
+import sys
+import json
+import time
+import argparse
+import difflib
+import tempfile
+import fitz  # PyMuPDF
+
+# Accuracy/throughput trade-off of the PDF-OCR page preparation modes on a
+# fixture set. The fixture folder holds image-only PDFs; a "<name>.txt" next to
+# a PDF is its ground truth, pages separated by form feeds (\f).
+#
+# The adaptive DPI is also checked on generated pages of known type sizes
+# (no OCR needed); without a fixture folder only those cases run.
+#
+#   python benchmarks/ocr_preprocess.py [fixtures/] [--pages 5] [--json out.json]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ocr_pipeline import render_page  # noqa: E402
+from ocr_preprocess import prepare_page  # noqa: E402
+import fixtures as generated  # noqa: E402  (benchmarks/fixtures.py)
+
+MODES = {
+    "raw-300": lambda doc, n: (render_page(doc, n, 300), {"timings": {}}),
+    "raw-200": lambda doc, n: (render_page(doc, n, 200), {"timings": {}}),
+    "clean-adaptive": lambda doc, n: prepare_page(doc[n]),
+}
+
+
+# name: (fixtures.write_image_pdf arguments, lowest and highest acceptable DPI)
+DPI_CASES = {
+    # 10pt type on 16pt lines, one column
+    "body-text": ({}, 200, 300),
+    # 7pt on 8pt in two columns with offset baselines, like the dictionary
+    # pages: descenders touch the next line's ascenders
+    "dense-two-column": ({"dpi": 300, "font_size": 29, "line_height": 33, "columns": 2}, 350, 400),
+}
+
+
+def check_dpi_cases():
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, (layout, low, high) in DPI_CASES.items():
+            path = generated.write_image_pdf(os.path.join(work_dir, f"{name}.pdf"), pages=1, **layout)
+            with fitz.open(path) as doc:
+                dpi = prepare_page(doc[0])[1]["dpi"]
+            results.append({"case": name, "dpi": dpi, "expected": [low, high], "ok": low <= dpi <= high})
+    return results
+
+
+def normalise(text):
+    return " ".join(text.split())
+
+
+def accuracy(ocr_text, truth):
+    if truth is None:
+        return None
+    return difflib.SequenceMatcher(None, normalise(ocr_text), normalise(truth), autojunk=False).ratio()
+
+
+def load_truth(pdf_path):
+    truth_path = os.path.splitext(pdf_path)[0] + ".txt"
+    if not os.path.exists(truth_path):
+        return []
+    with open(truth_path, encoding="utf-8") as f:
+        return f.read().split("\f")
+
+
+def run_mode(mode, prepare, fixtures, max_pages, lang):
+    from ocr_engines import get_engine
+    engine = get_engine("auto", lang)
+    pages, correct, seconds, stage_totals = [], [], 0.0, {}
+    for pdf_path in fixtures:
+        truth = load_truth(pdf_path)
+        with fitz.open(pdf_path) as doc:
+            for n in range(min(max_pages, len(doc))):
+                started = time.perf_counter()
+                image, info = prepare(doc, n)
+                text = ""
+                if image is not None:
+                    pdf_bytes, _ = engine.recognize(image)
+                    with fitz.open("pdf", pdf_bytes) as ocr_doc:
+                        text = ocr_doc[0].get_text()
+                elapsed = time.perf_counter() - started
+                seconds += elapsed
+                for stage, value in info.get("timings", {}).items():
+                    stage_totals[stage] = stage_totals.get(stage, 0.0) + value
+                score = accuracy(text, truth[n] if n < len(truth) else None)
+                if score is not None:
+                    correct.append(score)
+                pages.append({"file": os.path.basename(pdf_path), "page": n + 1, "seconds": elapsed,
+                              "dpi": info.get("dpi"), "blank": image is None, "accuracy": score})
+    return {
+        "mode": mode,
+        "pages": len(pages),
+        "pages_per_second": len(pages) / seconds if seconds else 0.0,
+        "mean_accuracy": sum(correct) / len(correct) if correct else None,
+        "stage_seconds": stage_totals,
+        "per_page": pages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR preprocessing modes on a fixture set")
+    parser.add_argument("fixtures", nargs="?", help="Folder of image-only PDFs with optional .txt ground truth")
+    parser.add_argument("--pages", type=int, default=5, help="Pages per PDF")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--lang", default="eng")
+    parser.add_argument("--json", help="Write the full per-page results here")
+    args = parser.parse_args()
+
+    dpi_cases = check_dpi_cases()
+    print(f"{'dpi case':<18} {'dpi':>5} {'expected':>10}")
+    for case in dpi_cases:
+        expected = "{}-{}".format(*case["expected"])
+        print(f"{case['case']:<18} {case['dpi']:>5} {expected:>10}  {'ok' if case['ok'] else '❌'}")
+    failed = not all(case["ok"] for case in dpi_cases)
+    if not args.fixtures:
+        sys.exit(1 if failed else 0)
+
+    fixtures = sorted(os.path.join(args.fixtures, f) for f in os.listdir(args.fixtures)
+                      if f.lower().endswith(".pdf"))
+    if not fixtures:
+        print("❌ No PDFs in the fixture folder.")
+        sys.exit(1)
+
+    results = [run_mode(mode, MODES[mode], fixtures, args.pages, args.lang) for mode in args.modes]
+    print(f"{'mode':<16} {'pages':>6} {'pages/s':>8} {'accuracy':>9}  stages")
+    for r in results:
+        acc = f"{r['mean_accuracy']:.3f}" if r["mean_accuracy"] is not None else "n/a"
+        stages = " ".join(f"{k}={v:.2f}s" for k, v in r["stage_seconds"].items())
+        print(f"{r['mode']:<16} {r['pages']:>6} {r['pages_per_second']:>8.2f} {acc:>9}  {stages}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"dpi_cases": dpi_cases, "modes": results}, f, indent=2)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import argparse
+import fitz  # PyMuPDF
+
+# Pages-per-second comparison of the PDF-OCR page renderers:
+#   pdf2image - previous path, one pdftoppm process per page
+#   pymupdf   - in-process get_pixmap on an already-open document
+# With --ocr the Tesseract call is included so the end-to-end gain is visible.
+#
+#   python benchmarks/ocr_render.py scan.pdf --pages 20 --dpi 300 [--ocr]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ocr_pipeline  # noqa: E402
+from ocr_engines import get_engine  # noqa: E402
+
+
+def bench(name, render, pages, ocr, lang):
+    started = time.perf_counter()
+    for page_num in pages:
+        image = render(page_num)
+        if ocr:
+            get_engine("auto", lang).recognize(image)
+    elapsed = time.perf_counter() - started
+    rate = len(pages) / elapsed if elapsed else float('inf')
+    print(f"{name:<10} {len(pages):>5} pages  {elapsed:>8.2f}s  {rate:>8.2f} pages/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF-OCR page rendering")
+    parser.add_argument("pdf")
+    parser.add_argument("--pages", type=int, default=10, help="Number of pages to render")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--ocr", action="store_true", help="Include Tesseract OCR in the timing")
+    parser.add_argument("--lang", default="eng")
+    args = parser.parse_args()
+
+    doc = fitz.open(args.pdf)
+    pages = list(range(min(args.pages, len(doc))))
+    if not pages:
+        print("❌ PDF has no pages.")
+        sys.exit(1)
+
+    print(f"📄 {os.path.basename(args.pdf)}: {len(pages)} pages at {args.dpi} DPI"
+          f"{' + OCR' if args.ocr else ''}")
+    old = bench("pdf2image", lambda p: ocr_pipeline.render_page_pdf2image(args.pdf, p, args.dpi),
+                pages, args.ocr, args.lang)
+    new = bench("pymupdf", lambda p: ocr_pipeline.render_page(doc, p, args.dpi),
+                pages, args.ocr, args.lang)
+    print(f"Speed-up: {new / old:.1f}x")
+    doc.close()
+
+
+if __name__ == "__main__":
+    main()
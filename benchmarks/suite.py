@@ -0,0 +1,281 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+
+# Timed scenarios over the synthetic fixtures of benchmarks/fixtures.py:
+# entry-page parsing, the record writers, dedup, both search tools and the
+# PDF-OCR page path. Runs offline; results go to JSON and can be compared
+# against a stored baseline (exit status 1 on a regression).
+#
+#   python benchmarks/suite.py --scale medium --json results.json
+#   python benchmarks/suite.py --save-baseline benchmarks/baseline.json
+#   python benchmarks/suite.py --baseline benchmarks/baseline.json --tolerance 0.15
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fixtures  # noqa: E402
+
+SEARCH_PATTERN = r"\b(time|world)\b"
+
+
+class Skip(Exception):
+    pass
+
+
+def read_pages(paths):
+    pages = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            pages.append((path, f.read()))
+    return pages
+
+
+def copy_files(paths, work_dir):
+    # Fresh copies for scenarios that rewrite their input in place
+    copies = []
+    for n, path in enumerate(paths):
+        target = os.path.join(work_dir, f"{n}_{os.path.basename(path)}")
+        shutil.copyfile(path, target)
+        copies.append(target)
+    return copies
+
+
+# Each scenario: setup(data, work_dir) -> state, run(state) -> units processed.
+# Only run() is timed.
+
+def parse_scenario(parser):
+    def setup(data, work_dir):
+        from oed_extract import lxml_available
+        if parser == "lxml" and not lxml_available():
+            raise Skip("lxml not installed")
+        return read_pages(data["pages"])
+
+    def run(pages):
+        from oed_extract import extract_entries
+        from oed_model import row_count
+        return sum(row_count(extract_entries(html, path, parser)) for path, html in pages)
+    return setup, run
+
+
+def export_scenario(fmt):
+    def setup(data, work_dir):
+        from oed_extract import extract_entries
+        from oed_sinks import RECORD_WRITERS
+        if fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise Skip("pyarrow not installed")
+        extension, writer = RECORD_WRITERS[fmt]
+        return [(extract_entries(html, path), os.path.join(work_dir, f"{n}{extension}"), writer)
+                for n, (path, html) in enumerate(read_pages(data["pages"]))]
+
+    def run(jobs):
+        from oed_model import row_count
+        for entries, target, writer in jobs:
+            writer(entries, target)
+        return sum(row_count(entries) for entries, _, _ in jobs)
+    return setup, run
+
+
+def dedup_scenario(file_format, corpus_key):
+    def setup(data, work_dir):
+        sources = [data["text"]] if corpus_key is None else data["corpus"][corpus_key]
+        return copy_files(sources, work_dir)
+
+    def run(files):
+        from oed_dedup import deduplicate_file
+        for path in files:
+            deduplicate_file(path, file_format)
+        return len(files)
+    return setup, run
+
+
+def search_context_setup(data, work_dir):
+    return data["corpus"]["excel"] + data["corpus"]["xml"]
+
+
+def search_context_run(files):
+    from oed_search import search_context
+    return sum(len(search_context(path, SEARCH_PATTERN, log=lambda message: None)) for path in files)
+
+
+def search_folder_setup(data, work_dir):
+    from oed_search import default_config, find_search_files
+    config = default_config(folder=data["scraped"], query=SEARCH_PATTERN, search_all=True, case_insensitive=True)
+    return config, find_search_files(config)
+
+
+def search_folder_run(state):
+    from oed_search import search_files
+    config, files = state
+    return len(search_files(files, config, log=lambda message: None))
+
+
+def preprocess_setup(data, work_dir):
+    import fitz  # PyMuPDF
+    return fitz.open(data["pdf"])
+
+
+def preprocess_run(doc):
+    from ocr_preprocess import prepare_page
+    for page in doc:
+        prepare_page(page)
+    return len(doc)
+
+
+def ocr_setup(data, work_dir):
+    import fitz  # PyMuPDF
+    try:
+        from ocr_engines import engine_version
+    except ImportError as e:
+        raise Skip(f"{e.name} not installed")
+    version = engine_version("auto")
+    if version.endswith("-unknown"):
+        raise Skip("Tesseract not found")
+    with fitz.open(data["pdf"]) as doc:
+        return data["pdf"], len(doc)
+
+
+def ocr_run(state):
+    import contextlib
+    import io
+    from ocr_pipeline import ocr_page
+    pdf_path, pages = state
+    with contextlib.redirect_stdout(io.StringIO()):
+        for page_num in range(pages):
+            error = ocr_page(pdf_path, page_num, 300, "eng")[4]
+            if error:
+                raise RuntimeError(error)
+    return pages
+
+
+SCENARIOS = {
+    "parse": parse_scenario("html.parser"),
+    "parse_lxml": parse_scenario("lxml"),
+    "export_excel": export_scenario("excel"),
+    "export_csv": export_scenario("csv"),
+    "export_xml": export_scenario("xml"),
+    "export_parquet": export_scenario("parquet"),
+    "dedup_txt": dedup_scenario("TXT", None),
+    "dedup_csv": dedup_scenario("CSV", "csv"),
+    "dedup_excel": dedup_scenario("Excel", "excel"),
+    "dedup_xml": dedup_scenario("XML", "xml"),
+    "search_context": (search_context_setup, search_context_run),
+    "search_folder": (search_folder_setup, search_folder_run),
+    "ocr_preprocess": (preprocess_setup, preprocess_run),
+    "ocr_page": (ocr_setup, ocr_run),
+}
+
+
+def run_scenario(name, data, repeats, work_root):
+    setup, run = SCENARIOS[name]
+    times, units = [], 0
+    for repeat in range(repeats):
+        work_dir = tempfile.mkdtemp(prefix=f"{name}-", dir=work_root)
+        try:
+            state = setup(data, work_dir)
+        except Skip as e:
+            return {"skipped": str(e)}
+        started = time.perf_counter()
+        units = run(state)
+        times.append(time.perf_counter() - started)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    median = statistics.median(times)
+    return {
+        "repeats": repeats,
+        "units": units,
+        "min_seconds": min(times),
+        "median_seconds": median,
+        "units_per_second": units / median if median else 0.0,
+    }
+
+
+def compare(results, baseline, tolerance):
+    # Median-time ratios against the baseline; a ratio above 1 + tolerance regresses
+    regressions = []
+    for name, result in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base or "median_seconds" not in base or "median_seconds" not in result:
+            continue
+        ratio = result["median_seconds"] / base["median_seconds"] if base["median_seconds"] else 1.0
+        result["baseline_ratio"] = ratio
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def print_table(results):
+    print(f"{'scenario':<16} {'units':>8} {'median s':>10} {'units/s':>10} {'vs base':>8}")
+    for name, r in results["scenarios"].items():
+        if "skipped" in r:
+            print(f"{name:<16} skipped: {r['skipped']}")
+            continue
+        ratio = f"{r['baseline_ratio']:.2f}x" if "baseline_ratio" in r else ""
+        print(f"{name:<16} {r['units']:>8} {r['median_seconds']:>10.4f} {r['units_per_second']:>10.1f} {ratio:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite on synthetic OED fixtures")
+    parser.add_argument("--scale", choices=list(fixtures.SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--only", nargs="+", choices=list(SCENARIOS), help="Run just these scenarios")
+    parser.add_argument("--fixtures", help="Keep the generated fixtures in this folder")
+    parser.add_argument("--json", help="Write the results here")
+    parser.add_argument("--baseline", help="Compare against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed slowdown before failing (0.10 = 10%%)")
+    parser.add_argument("--save-baseline", help="Write the results as the new baseline")
+    args = parser.parse_args()
+
+    work_root = tempfile.mkdtemp(prefix="oed-bench-")
+    fixture_dir = args.fixtures or os.path.join(work_root, "fixtures")
+    try:
+        started = time.perf_counter()
+        data = fixtures.build(fixture_dir, args.scale, args.seed)
+        data["scraped"] = os.path.join(fixture_dir, "scraped")
+        print(f"🧪 {args.scale} fixtures in {time.perf_counter() - started:.1f}s: "
+              f"{len(data['pages'])} pages, {sum(len(v) for v in data['corpus'].values())} corpus files")
+
+        results = {
+            "meta": {
+                "scale": args.scale,
+                "seed": args.seed,
+                "repeats": args.repeats,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "scenarios": {},
+        }
+        for name in args.only or SCENARIOS:
+            results["scenarios"][name] = run_scenario(name, data, args.repeats, work_root)
+    finally:
+        shutil.rmtree(work_root, ignore_errors=True)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("scale") != args.scale:
+            print(f"⚠️ Baseline was recorded at scale {baseline.get('meta', {}).get('scale')!r}")
+        regressions = compare(results, baseline, args.tolerance)
+        results["regressions"] = regressions
+
+    print_table(results)
+    for path in filter(None, [args.json, args.save_baseline]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if regressions:
+        print(f"❌ Slower than baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import os
+import json
+import time
+import argparse
+from collections import Counter
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import xml.etree.ElementTree as ET
+from corpus_tokens import tokenize
+
+# Corpus-wide collocation statistics over the scraped quotations.
+#
+# build:  two passes over the scraped folder. Pass 1 counts tokens to fix the
+#         vocabulary, pass 2 accumulates a sparse term x term co-occurrence
+#         matrix chunk by chunk, so memory is bounded by the chunk size and the
+#         number of distinct pairs, never by the number of quotations.
+# lookup: reads the precomputed top-k tables (memory-mapped .npy files).
+
+MEASURES = ["pmi", "ll", "t"]
+QUOTATION_COLUMN = "Quotation Text"
+CORPUS_EXTENSIONS = (".xlsx", ".xls", ".csv", ".xml")
+
+
+def iter_corpus_files(folder):
+    for root_dir, _, files in os.walk(folder):
+        for file in sorted(files):
+            if file.lower().endswith(CORPUS_EXTENSIONS):
+                yield os.path.join(root_dir, file)
+
+
+def iter_quotations(folder):
+    # Yields every quotation text in the scraped folder, whichever scraper wrote it
+    for path in iter_corpus_files(folder):
+        try:
+            if path.lower().endswith(".xml"):
+                # oed-scraper-urllist-xml.py writes <quotation><text>..</text></quotation>
+                for elem in ET.parse(path).getroot().iter("quotation"):
+                    text = elem.findtext("text")
+                    if text:
+                        yield text
+                continue
+
+            if path.lower().endswith(".csv"):
+                df = pd.read_csv(path, usecols=lambda c: c == QUOTATION_COLUMN)
+            else:
+                df = pd.read_excel(path, usecols=lambda c: c == QUOTATION_COLUMN)
+            if QUOTATION_COLUMN in df.columns:
+                for text in df[QUOTATION_COLUMN].dropna():
+                    yield str(text)
+        except Exception as e:
+            print(f"⚠️ Skipping {path}: {e}")
+
+
+def build_vocabulary(folder, min_count=5, max_vocab=None):
+    counts = Counter()
+    n_quotes = 0
+    for text in iter_quotations(folder):
+        counts.update(tokenize(text))
+        n_quotes += 1
+    terms = [t for t, c in counts.most_common(max_vocab) if c >= min_count]
+    return terms, n_quotes
+
+
+def _chunk_pairs(token_lists, window):
+    # Flatten the chunk into one id array with a parallel quotation-id array, so
+    # every offset 1..window is a single vectorised comparison over the chunk.
+    lengths = np.fromiter((len(t) for t in token_lists), dtype=np.int64, count=len(token_lists))
+    if not lengths.sum():
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    ids = np.concatenate([np.asarray(t, dtype=np.int64) for t in token_lists if t])
+    doc = np.repeat(np.arange(len(token_lists)), lengths)
+
+    rows, cols = [], []
+    for d in range(1, window + 1):
+        if d >= len(ids):
+            break
+        same = (doc[:-d] == doc[d:]) & (ids[:-d] >= 0) & (ids[d:] >= 0)
+        left, right = ids[:-d][same], ids[d:][same]
+        rows += [left, right]
+        cols += [right, left]
+    if not rows:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+def accumulate_cooccurrence(folder, vocab, window=5, chunk_size=50000):
+    index = {t: i for i, t in enumerate(vocab)}
+    size = len(vocab)
+    total = sp.csr_matrix((size, size), dtype=np.int64)
+    chunk = []
+
+    def flush(chunk):
+        r, c = _chunk_pairs(chunk, window)
+        if len(r):
+            m = sp.coo_matrix((np.ones(len(r), dtype=np.int64), (r, c)), shape=(size, size)).tocsr()
+            m.sum_duplicates()
+            return total + m
+        return total
+
+    seen = 0
+    for text in iter_quotations(folder):
+        # Out-of-vocabulary tokens keep their slot (-1) so window distances stay real
+        chunk.append([index.get(t, -1) for t in tokenize(text)])
+        if len(chunk) >= chunk_size:
+            total = flush(chunk)
+            seen += len(chunk)
+            chunk = []
+            print(f"  … {seen} quotations, {total.nnz} distinct pairs")
+    if chunk:
+        total = flush(chunk)
+    return total
+
+
+def association_scores(matrix, min_pair_count=3):
+    # Vectorised PMI, log-likelihood (G²) and t-score over the non-zero cells
+    coo = matrix.tocoo()
+    keep = coo.data >= min_pair_count
+    row, col = coo.row[keep], coo.col[keep]
+    o11 = coo.data[keep].astype(np.float64)
+
+    row_sums = np.asarray(matrix.sum(axis=1)).ravel().astype(np.float64)
+    col_sums = np.asarray(matrix.sum(axis=0)).ravel().astype(np.float64)
+    n = float(matrix.sum())
+    r1, c1 = row_sums[row], col_sums[col]
+
+    e11 = r1 * c1 / n
+    pmi = np.log2(o11 / e11)
+    tscore = (o11 - e11) / np.sqrt(o11)
+
+    # 2x2 contingency table per pair
+    o12, o21 = r1 - o11, c1 - o11
+    o22 = n - r1 - c1 + o11
+    e12, e21 = r1 * (n - c1) / n, (n - r1) * c1 / n
+    e22 = (n - r1) * (n - c1) / n
+
+    def term(o, e):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(o > 0, o * np.log(o / e), 0.0)
+
+    ll = 2 * (term(o11, e11) + term(o12, e12) + term(o21, e21) + term(o22, e22))
+    # Negative associations get a negative G² so ranking keeps attraction first
+    ll = np.where(o11 < e11, -ll, ll)
+
+    return row, col, o11, {"pmi": pmi, "ll": ll, "t": tscore}
+
+
+def top_k_per_row(row, col, score, size, k):
+    # Sort by (row, -score) once, then keep the first k of every row
+    order = np.lexsort((-score, row))
+    row, col, score = row[order], col[order], score[order]
+    starts = np.searchsorted(row, np.arange(size))
+    rank = np.arange(len(row)) - starts[row]
+    keep = rank < k
+    row, col, score = row[keep], col[keep], score[keep]
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(row, minlength=size), out=indptr[1:])
+    return indptr, col.astype(np.int32), score.astype(np.float32), order[keep]
+
+
+def build(folder, out_dir, window=5, top_k=50, chunk_size=50000, min_count=5,
+          min_pair_count=3, max_vocab=None):
+    started = time.time()
+    os.makedirs(out_dir, exist_ok=True)
+
+    print(f"📚 Pass 1: counting tokens in {folder}")
+    vocab, n_quotes = build_vocabulary(folder, min_count, max_vocab)
+    print(f"  {n_quotes} quotations, {len(vocab)} terms with count >= {min_count}")
+
+    print(f"🔗 Pass 2: co-occurrence within ±{window} tokens (chunks of {chunk_size})")
+    matrix = accumulate_cooccurrence(folder, vocab, window, chunk_size)
+    sp.save_npz(os.path.join(out_dir, "cooccurrence.npz"), matrix)
+
+    row, col, counts, scores = association_scores(matrix, min_pair_count)
+    for measure in MEASURES:
+        indptr, top_cols, top_scores, picked = top_k_per_row(row, col, scores[measure], len(vocab), top_k)
+        np.save(os.path.join(out_dir, f"{measure}_indptr.npy"), indptr)
+        np.save(os.path.join(out_dir, f"{measure}_cols.npy"), top_cols)
+        np.save(os.path.join(out_dir, f"{measure}_scores.npy"), top_scores)
+        np.save(os.path.join(out_dir, f"{measure}_counts.npy"), counts[picked].astype(np.int64))
+
+    with open(os.path.join(out_dir, "vocab.json"), "w", encoding="utf-8") as f:
+        json.dump(vocab, f, ensure_ascii=False)
+    with open(os.path.join(out_dir, "collocations.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "source": os.path.abspath(folder), "quotations": n_quotes, "terms": len(vocab),
+            "pairs": int(matrix.nnz), "window": window, "top_k": top_k,
+            "min_count": min_count, "min_pair_count": min_pair_count, "measures": MEASURES,
+        }, f, indent=2)
+
+    print(f"✅ Collocations written to {out_dir} in {time.time() - started:.1f}s")
+
+
+class CollocationTable:
+    def __init__(self, out_dir):
+        with open(os.path.join(out_dir, "vocab.json"), encoding="utf-8") as f:
+            self.vocab = json.load(f)
+        self.index = {t: i for i, t in enumerate(self.vocab)}
+        self.out_dir = out_dir
+        self._tables = {}
+
+    def _table(self, measure):
+        if measure not in self._tables:
+            self._tables[measure] = tuple(
+                np.load(os.path.join(self.out_dir, f"{measure}_{part}.npy"), mmap_mode="r")
+                for part in ("indptr", "cols", "scores", "counts")
+            )
+        return self._tables[measure]
+
+    def lookup(self, term, measure="ll", limit=None):
+        i = self.index.get(term.lower())
+        if i is None:
+            return []
+        indptr, cols, scores, counts = self._table(measure)
+        start, end = indptr[i], indptr[i + 1]
+        if limit:
+            end = min(end, start + limit)
+        return [(self.vocab[c], float(s), int(n))
+                for c, s, n in zip(cols[start:end], scores[start:end], counts[start:end])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corpus-wide collocation statistics for scraped OED quotations")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    b = sub.add_parser("build", help="Build co-occurrence matrix and top-k tables")
+    b.add_argument("folder", help="Folder with scraped .xlsx/.csv/.xml files")
+    b.add_argument("out_dir", help="Where to write the collocation tables")
+    b.add_argument("--window", type=int, default=5)
+    b.add_argument("--top-k", type=int, default=50)
+    b.add_argument("--chunk-size", type=int, default=50000, help="Quotations per accumulation chunk")
+    b.add_argument("--min-count", type=int, default=5, help="Minimum token frequency for the vocabulary")
+    b.add_argument("--min-pair-count", type=int, default=3, help="Minimum co-occurrence count to score a pair")
+    b.add_argument("--max-vocab", type=int, default=None)
+
+    q = sub.add_parser("lookup", help="Show the strongest collocates of a term")
+    q.add_argument("out_dir")
+    q.add_argument("term")
+    q.add_argument("--measure", choices=MEASURES, default="ll")
+    q.add_argument("--limit", type=int, default=20)
+
+    args = parser.parse_args()
+    if args.command == "build":
+        build(args.folder, args.out_dir, args.window, args.top_k, args.chunk_size,
+              args.min_count, args.min_pair_count, args.max_vocab)
+    else:
+        table = CollocationTable(args.out_dir)
+        results = table.lookup(args.term, args.measure, args.limit)
+        if not results:
+            print(f"No collocates for '{args.term}'.")
+        for term, score, count in results:
+            print(f"{term:<25} {score:>10.3f} {count:>8}")
+
+
+if __name__ == "__main__":
+    main()
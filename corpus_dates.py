@@ -0,0 +1,188 @@
+import os
+import re
+import json
+import time
+from array import array
+from functools import lru_cache
+import numpy as np
+from corpus_store import CorpusStore
+
+# Numeric year index over the free-text dates of a corpus store.
+#
+# parse_date() turns OED date strings into (start, end, flags):
+#   "1600"       -> (1600, 1600, 0)       "c1386"     -> (1386, 1386, CIRCA)
+#   "a1425"      -> (1425, 1425, ANTE)    "?c1400"    -> (1400, 1400, QUERIED | CIRCA)
+#   "1596–7"     -> (1596, 1597, 0)       "1600–1700" -> (1600, 1700, 0)
+#   "1898–05"    -> (1898, 1905, 0)       "1599–1"    -> (1599, 1601, 0)
+#   "c1330–"     -> (1330, OPEN, CIRCA)   "lOE"       -> (950, 1149, CIRCA)
+#   "OE–1600"    -> (700, 1600, CIRCA)    "lOE–1500"  -> (950, 1500, CIRCA)
+#   "eOE–"       -> (700, OPEN, CIRCA)    "eOE–lOE"   -> (700, 1149, CIRCA)
+# The bounds are the years as written; the flags say how far to trust them.
+#
+# Layout of <store>/dates/ (built by compact() and on first use):
+#   dates.json                  store version, FORMAT, parsed/undated counts per field
+#   locations.npy               (shard, offset, length) per row, in store order
+#   <field>_start/_end.npy      bounds per row (int16; undated rows never match)
+#   <field>_flags.npy           flags per row
+#   <field>_by_start/_by_end    row ids sorted by start / end year, with the
+#   <field>_sorted_start/_end   sorted years themselves for searchsorted()
+#
+# A period is the rows whose [start, end] overlaps [from, to]: one binary
+# search gives the rows starting no later than `to`, another those ending no
+# earlier than `from`; the smaller side is checked against the other bound.
+# Search tools resolve this before reading or matching any text.
+#
+#   dates = open_dates("corpus_store")
+#   rows = dates.rows(1600, 1700)
+#   for row in dates.load(rows): ...
+
+FIELDS = {"quotation": "Quotation Date", "sense": "Date Range"}
+INDEX_DIR = "dates"
+FORMAT = 3  # bumped when parse_date() changes, so older indexes are rebuilt
+CIRCA, ANTE, QUERIED = 1, 2, 4
+APPROXIMATE = CIRCA | ANTE | QUERIED
+OPEN = 9999  # "1600–": still in use
+UNDATED = (32767, -32768)
+OLD_ENGLISH = {"eOE": (700, 949), "OE": (700, 1149), "lOE": (950, 1149)}
+
+_DATE = re.compile(r"(\?)?\s*([ac])?\s*(\d{3,4})(?:\s*[-–—]\s*(?:\??\s*[ac]?\s*(\d{1,4}))?)?")
+_OLD_ENGLISH = re.compile(r"(\?)?\s*\b([el]?OE)\b(?:\s*([-–—])\s*(?:\??\s*[ac]?\s*(\d{3,4})|([el]?OE)\b)?)?")
+
+
+@lru_cache(maxsize=65536)
+def parse_date(text):
+    # (start, end, flags), or None when the text holds no year
+    text = (text or '').strip()
+    old = _OLD_ENGLISH.match(text)
+    if old:
+        # An Old English period opens the range; a year, another period or a
+        # bare dash (still in use) may close it
+        queried, period, dash, year, until = old.groups()
+        start, end = OLD_ENGLISH[period]
+        if year:
+            end = max(int(year), start)
+        elif until:
+            end = max(OLD_ENGLISH[until][1], start)
+        elif dash:
+            end = OPEN
+        return start, end, CIRCA | (QUERIED if queried else 0)
+    match = _DATE.search(text)
+    if not match:
+        old = _OLD_ENGLISH.search(text)
+        return (*OLD_ENGLISH[old.group(2)], CIRCA) if old else None
+    queried, qualifier, first, last = match.groups()
+    start = end = int(first)
+    if last:
+        # "1596–7", "1600–10": the end year's leading digits are the start's;
+        # "1898–05" crosses into the next century
+        if len(last) < len(first):
+            end = int(first[:len(first) - len(last)] + last)
+            if end < start:
+                end += 10 ** len(last)
+        else:
+            end = int(last)
+        end = max(end, start)
+    elif match.group(0).rstrip()[-1] in "-–—":
+        end = OPEN
+    flags = (QUERIED if queried else 0) | {"c": CIRCA, "a": ANTE}.get(qualifier, 0)
+    return start, end, flags
+
+
+def build(store_dir, progress=print):
+    started = time.time()
+    store = CorpusStore(store_dir)
+    out_dir = os.path.join(store_dir, INDEX_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    columns = {field: store.schema.index(column) for field, column in FIELDS.items()}
+
+    locations = array('q')
+    bounds = {field: (array('h'), array('h'), array('B')) for field in FIELDS}
+    for shard, offset, length, row in store.iter_located_rows():
+        locations.extend((shard, offset, length))
+        for field, column in columns.items():
+            start, end, flags = parse_date(row[column]) or (*UNDATED, 0)
+            starts, ends, all_flags = bounds[field]
+            starts.append(start)
+            ends.append(end)
+            all_flags.append(flags)
+
+    counts = {}
+    np.save(os.path.join(out_dir, "locations.npy"), np.frombuffer(locations, dtype=np.int64).reshape(-1, 3))
+    for field, (starts, ends, flags) in bounds.items():
+        start = np.frombuffer(starts, dtype=np.int16)
+        end = np.frombuffer(ends, dtype=np.int16)
+        by_start = np.argsort(start, kind="stable").astype(np.int32)
+        by_end = np.argsort(end, kind="stable").astype(np.int32)
+        for name, values in (("start", start), ("end", end), ("flags", np.frombuffer(flags, dtype=np.uint8)),
+                             ("by_start", by_start), ("sorted_start", start[by_start]),
+                             ("by_end", by_end), ("sorted_end", end[by_end])):
+            np.save(os.path.join(out_dir, f"{field}_{name}.npy"), values)
+        undated = int((start == UNDATED[0]).sum())
+        counts[field] = {"dated": len(start) - undated, "undated": undated}
+
+    rows = len(locations) // 3
+    with open(os.path.join(out_dir, "dates.json"), "w", encoding="utf-8") as f:
+        json.dump({"store": store.version(), "format": FORMAT, "rows": rows, "fields": counts,
+                   "built": time.strftime('%Y-%m-%dT%H:%M:%S')}, f, indent=2)
+    progress(f"📅 Indexed the dates of {rows} rows "
+             f"({counts['quotation']['dated']} quotation dates, {counts['sense']['dated']} sense date ranges) "
+             f"in {time.time() - started:.1f}s")
+
+
+class DateIndex:
+    def __init__(self, store_dir):
+        self.store = CorpusStore(store_dir)
+        self.out_dir = os.path.join(store_dir, INDEX_DIR)
+        with open(os.path.join(self.out_dir, "dates.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.locations = self._load("locations")
+        self._fields = {}
+
+    def _load(self, name):
+        return np.load(os.path.join(self.out_dir, f"{name}.npy"), mmap_mode="r")
+
+    def is_current(self):
+        return self.meta["store"] == self.store.version() and self.meta.get("format") == FORMAT
+
+    def field(self, field):
+        if field not in self._fields:
+            self._fields[field] = {name: self._load(f"{field}_{name}") for name in
+                                   ("start", "end", "flags", "by_start", "sorted_start", "by_end", "sorted_end")}
+        return self._fields[field]
+
+    def rows(self, start=None, end=None, field="quotation", approximate=True):
+        # Sorted ids of the rows whose dates overlap start..end (either may be
+        # None); approximate=False leaves out c/a/? dates
+        arrays = self.field(field)
+        start = UNDATED[1] if start is None else start
+        end = UNDATED[0] - 1 if end is None else end
+        started = int(np.searchsorted(arrays["sorted_start"], end, side="right"))
+        ending = int(np.searchsorted(arrays["sorted_end"], start, side="left"))
+        if started <= len(arrays["sorted_end"]) - ending:
+            rows = np.asarray(arrays["by_start"][:started])
+            rows = rows[arrays["end"][rows] >= start]
+        else:
+            rows = np.asarray(arrays["by_end"][ending:])
+            rows = rows[arrays["start"][rows] <= end]
+        if not approximate:
+            rows = rows[(arrays["flags"][rows] & APPROXIMATE) == 0]
+        return np.sort(rows)
+
+    def load(self, rows):
+        return self.store.load_rows_at(self.locations[rows])
+
+    def iter_rows(self, rows, chunk=10000):
+        for start in range(0, len(rows), chunk):
+            yield from self.load(rows[start:start + chunk])
+
+
+def open_dates(store_dir, progress=print):
+    # The date index of a store, (re)built when missing, older than the store
+    # or from an older FORMAT
+    if os.path.exists(os.path.join(store_dir, INDEX_DIR, "dates.json")):
+        index = DateIndex(store_dir)
+        if index.is_current():
+            return index
+        progress("🔁 The store or the date parsing changed since the date index was built.")
+    build(store_dir, progress)
+    return DateIndex(store_dir)
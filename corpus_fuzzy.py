@@ -0,0 +1,265 @@
+import os
+import re
+import json
+import time
+import argparse
+from array import array
+from collections import Counter
+import numpy as np
+from corpus_store import CorpusStore
+from corpus_tokens import tokenize
+
+# Approximate (historical-spelling) search over the quotations of a corpus
+# store: "humour" with k=2 also finds humor, humoure, humore, hvmour.
+#
+# build:  one pass over the store. Every distinct quotation token becomes a
+#         term with a posting list of the rows it occurs in, and every term is
+#         listed under its character trigrams ("$humour$" -> $hu, hum, ...,
+#         ur$). Both are CSR arrays (offsets + ids) saved as .npy files in
+#         <store>/fuzzy/, next to the row locations in the shards.
+# query:  a term within edit distance k of the query shares at least
+#         |trigrams(query)| - 3k of its distinct trigrams, so counting trigram
+#         hits over the vocabulary (one bincount) leaves a few candidates. For
+#         short words that bound is 0; there the letter counts of each term
+#         (bag distance, also a lower bound of the edit distance) do the
+#         filtering. The survivors are verified with a Levenshtein DP limited
+#         to the diagonal band |i - j| <= k. The rows come from their posting
+#         lists; several query words must all match in the same quotation.
+#
+#   index = open_index("corpus_store")
+#   for row, terms in index.search("humour", k=2):
+#       ...
+
+QUOTATION_COLUMN = "Quotation Text"
+INDEX_DIR = "fuzzy"
+GRAM = 3
+LETTERS = 31  # most frequent letters counted per term; the rest share one slot
+
+
+def fold(text):
+    # Case and the long s; other spelling variation is left to the edit distance
+    return text.casefold().replace('ſ', 's')
+
+
+def trigrams(term):
+    padded = f"${term}$"
+    return {padded[i:i + GRAM] for i in range(len(padded) - GRAM + 1)}
+
+
+def bounded_distance(a, b, k):
+    # Levenshtein distance of a and b when it is at most k, else None. Only the
+    # band |i - j| <= k of the DP table is filled, and a row whose band is all
+    # above k ends the comparison.
+    if abs(len(a) - len(b)) > k:
+        return None
+    if len(a) > len(b):
+        a, b = b, a
+    over = k + 1
+    previous = [j if j <= k else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        lo, hi = max(1, i - k), min(len(b), i + k)
+        current = [over] * (len(b) + 1)
+        current[0] = i if i <= k else over
+        char = a[i - 1]
+        for j in range(lo, hi + 1):
+            cost = min(previous[j - 1] + (char != b[j - 1]), previous[j] + 1, current[j - 1] + 1)
+            current[j] = cost if cost < over else over
+        if min(current[lo - 1:hi + 1]) > k:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= k else None
+
+
+def letter_counts(term, slots):
+    counts = np.zeros(LETTERS + 1, dtype=np.uint8)
+    for char in term:
+        counts[slots.get(char, LETTERS)] += 1
+    return counts
+
+
+def _csr(keys, values, size):
+    # offsets + values grouped by key; values keep their order within a key
+    keys = np.frombuffer(keys, dtype=np.int32)
+    values = np.frombuffer(values, dtype=np.int32)
+    order = np.argsort(keys, kind="stable")
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=offsets[1:])
+    return offsets, values[order]
+
+
+def build(store_dir, progress=print):
+    started = time.time()
+    store = CorpusStore(store_dir)
+    out_dir = os.path.join(store_dir, INDEX_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    column = store.schema.index(QUOTATION_COLUMN)
+
+    progress(f"📚 Indexing the quotations of {store_dir}")
+    terms, term_ids, row_ids, locations = {}, array('i'), array('i'), array('q')
+    for row_number, (shard, offset, length, row) in enumerate(store.iter_located_rows()):
+        locations.extend((shard, offset, length))
+        for token in set(tokenize(fold(row[column] or ''))):
+            term_ids.append(terms.setdefault(token, len(terms)))
+            row_ids.append(row_number)
+    rows = len(locations) // 3
+    post_offsets, post_rows = _csr(term_ids, row_ids, len(terms))
+
+    grams, gram_ids, gram_terms = {}, array('i'), array('i')
+    for term, term_id in terms.items():
+        for gram in trigrams(term):
+            gram_ids.append(grams.setdefault(gram, len(grams)))
+            gram_terms.append(term_id)
+    gram_offsets, gram_term_ids = _csr(gram_ids, gram_terms, len(grams))
+
+    frequency = Counter()
+    for term in terms:
+        frequency.update(term)
+    alphabet = ''.join(char for char, _ in frequency.most_common(LETTERS))
+    slots = {char: i for i, char in enumerate(alphabet)}
+    letters = np.zeros((len(terms), LETTERS + 1), dtype=np.uint8)
+    for term, term_id in terms.items():
+        for char in term[:255]:
+            letters[term_id, slots.get(char, LETTERS)] += 1
+
+    np.save(os.path.join(out_dir, "locations.npy"), np.frombuffer(locations, dtype=np.int64).reshape(-1, 3))
+    np.save(os.path.join(out_dir, "post_offsets.npy"), post_offsets)
+    np.save(os.path.join(out_dir, "post_rows.npy"), post_rows)
+    np.save(os.path.join(out_dir, "gram_offsets.npy"), gram_offsets)
+    np.save(os.path.join(out_dir, "gram_terms.npy"), gram_term_ids)
+    np.save(os.path.join(out_dir, "letters.npy"), letters)
+    with open(os.path.join(out_dir, "terms.json"), "w", encoding="utf-8") as f:
+        json.dump(list(terms), f, ensure_ascii=False)
+    with open(os.path.join(out_dir, "grams.json"), "w", encoding="utf-8") as f:
+        json.dump(list(grams), f, ensure_ascii=False)
+    with open(os.path.join(out_dir, "fuzzy.json"), "w", encoding="utf-8") as f:
+        json.dump({"store": store.version(), "rows": rows, "terms": len(terms), "trigrams": len(grams),
+                   "postings": len(post_rows), "alphabet": alphabet,
+                   "built": time.strftime('%Y-%m-%dT%H:%M:%S')}, f, indent=2)
+
+    progress(f"✅ Indexed {len(terms)} terms in {rows} rows ({len(grams)} trigrams) "
+             f"in {time.time() - started:.1f}s")
+
+
+class FuzzyIndex:
+    def __init__(self, store_dir):
+        self.store = CorpusStore(store_dir)
+        self.out_dir = os.path.join(store_dir, INDEX_DIR)
+        with open(os.path.join(self.out_dir, "fuzzy.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        with open(os.path.join(self.out_dir, "terms.json"), encoding="utf-8") as f:
+            self.terms = json.load(f)
+        with open(os.path.join(self.out_dir, "grams.json"), encoding="utf-8") as f:
+            self.grams = {gram: i for i, gram in enumerate(json.load(f))}
+        self.term_ids = {term: i for i, term in enumerate(self.terms)}
+        self.lengths = np.fromiter((len(term) for term in self.terms), dtype=np.int32, count=len(self.terms))
+        load = lambda name: np.load(os.path.join(self.out_dir, f"{name}.npy"), mmap_mode="r")
+        self.locations = load("locations")
+        self.post_offsets, self.post_rows = load("post_offsets"), load("post_rows")
+        self.gram_offsets, self.gram_terms = load("gram_offsets"), load("gram_terms")
+        self.letters = np.load(os.path.join(self.out_dir, "letters.npy"))
+        self.slots = {char: i for i, char in enumerate(self.meta["alphabet"])}
+
+    def is_current(self):
+        return self.meta["store"] == self.store.version()
+
+    def candidates(self, word, k):
+        # Term ids that can be within k edits of word (length, trigram count
+        # and letter count filters)
+        near = np.abs(self.lengths - len(word)) <= k
+        grams = [self.grams[g] for g in trigrams(word) if g in self.grams]
+        needed = len(trigrams(word)) - GRAM * k
+        if needed > 0:
+            if len(grams) < needed:
+                return np.empty(0, dtype=np.int64)
+            hits = np.concatenate([self.gram_terms[self.gram_offsets[g]:self.gram_offsets[g + 1]] for g in grams])
+            near &= np.bincount(hits, minlength=len(self.terms)) >= needed
+        found = np.flatnonzero(near)
+        difference = self.letters[found].astype(np.int16) - letter_counts(word, self.slots)
+        extra, missing = np.clip(difference, 0, None).sum(1), np.clip(-difference, 0, None).sum(1)
+        return found[np.maximum(extra, missing) <= k]
+
+    def expand(self, word, k=1):
+        # {term: distance} for the corpus terms within k edits of word
+        word = fold(word)
+        matches = {}
+        for term_id in self.candidates(word, k):
+            term = self.terms[term_id]
+            distance = bounded_distance(word, term, k)
+            if distance is not None:
+                matches[term] = distance
+        return matches
+
+    def postings(self, terms):
+        parts = [self.post_rows[self.post_offsets[i]:self.post_offsets[i + 1]]
+                 for i in (self.term_ids[term] for term in terms)]
+        return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int32)
+
+    def search(self, query, k=1, limit=None, rows=None):
+        # [(row, {term: distance})]: the rows where every query word has a match;
+        # rows: sorted row ids to stay within (corpus_dates.DateIndex.rows)
+        expansions = [self.expand(word, k) for word in tokenize(fold(query))]
+        if not expansions or not all(expansions):
+            return []
+        for matches in expansions:
+            found = self.postings(matches)
+            rows = found if rows is None else np.intersect1d(rows, found, assume_unique=True)
+        if limit:
+            rows = rows[:limit]
+        loaded = self.store.load_rows_at(self.locations[rows])
+        terms = {term: distance for matches in expansions for term, distance in matches.items()}
+        return [(row, terms) for row in loaded]
+
+
+def open_index(store_dir, progress=print):
+    # The index of a store, (re)built when missing or older than the store
+    if os.path.exists(os.path.join(store_dir, INDEX_DIR, "fuzzy.json")):
+        index = FuzzyIndex(store_dir)
+        if index.is_current():
+            return index
+        progress("🔁 The store changed since the fuzzy index was built.")
+    build(store_dir, progress)
+    return FuzzyIndex(store_dir)
+
+
+def highlight(text, terms):
+    # **term** around the corpus spellings that matched
+    if not terms:
+        return text
+    pattern = r"(?<![^\W\d_])(" + "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)) + r")(?![^\W\d_])"
+    return re.sub(pattern, r"**\1**", text, flags=re.IGNORECASE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzzy and historical-spelling search over a corpus store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    b = sub.add_parser("build", help="Build the trigram and posting index of a corpus store")
+    b.add_argument("store_dir")
+
+    q = sub.add_parser("query", help="Show the quotations matching words within k edits")
+    q.add_argument("store_dir")
+    q.add_argument("query")
+    q.add_argument("-k", "--distance", type=int, default=1, help="Maximum edits per word")
+    q.add_argument("--limit", type=int, default=20)
+    q.add_argument("--terms", action="store_true", help="Only list the matching spellings")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        build(args.store_dir)
+        return
+    index = open_index(args.store_dir)
+    if args.terms:
+        for word in tokenize(fold(args.query)):
+            for term, distance in sorted(index.expand(word, args.distance).items(), key=lambda t: (t[1], t[0])):
+                print(f"{term:<25} {distance:>3}")
+        return
+    started = time.time()
+    results = index.search(args.query, args.distance, args.limit)
+    schema = index.store.schema
+    for row, terms in results:
+        print(f"{row[schema.index('Headword')]:<20} {highlight(row[schema.index(QUOTATION_COLUMN)], terms)}")
+    print(f"{len(results)} quotation(s) in {time.time() - started:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
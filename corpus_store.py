@@ -0,0 +1,395 @@
+import os
+import re
+import json
+import time
+import heapq
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import xml.etree.ElementTree as ET
+from oed_profile import worker_init
+from oed_frontier import entry_id
+
+# Compacted corpus store for the scraped OED outputs.
+#
+# Layout of a store directory:
+#   manifest.json        schema, shard list, row/headword counts, sources
+#   index.json           headword key -> [shard, byte offset, byte length, first row, row count]
+#   shard-00000.jsonl    one JSON list per row (in SCHEMA order), sorted by headword
+#
+# A headword never spans two shards, so loading one is a single seek + read.
+# update_store() writes changed headwords to a new delta shard and re-points
+# the index; the replaced rows stay in the older shards (skipped when reading)
+# until the next compact().
+#
+# compact() sorts the rows in runs of SORT_RUN_ROWS, spilled to a temporary
+# folder and merged into the shards, so it never holds the whole corpus, and
+# removes the shards of an earlier build of the same folder. It also writes
+# the numeric year index of corpus_dates to dates/.
+
+SCHEMA = ['Headword', 'URL', 'Etymology', 'Item Enumerator', 'Date Range', 'Grammar',
+          'Meaning', 'Quotation Date', 'Quotation Text', 'Citation', 'Source']
+SOURCE_EXTENSIONS = (".xlsx", ".xls", ".csv", ".xml")
+MANIFEST = "manifest.json"
+INDEX = "index.json"
+SHARD_FILE = re.compile(r'^shard-\d{5}\.jsonl$')
+SORT_RUN_ROWS = 500000
+
+# Tag names used by oed-scraper-urllist-xml.py
+XML_MEANING_FIELDS = {'item_enumerator': 'Item Enumerator', 'daterange': 'Date Range',
+                      'grammar': 'Grammar', 'definition': 'Meaning'}
+XML_QUOTE_FIELDS = {'date': 'Quotation Date', 'text': 'Quotation Text', 'citation': 'Citation'}
+
+
+def headword_key(headword):
+    return headword.strip().casefold()
+
+
+def headword_from_filename(path):
+    # Scrapers name their files "{headword}_{n}.xlsx"
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return re.sub(r'_\d+$', '', stem)
+
+
+def row_order(row):
+    return headword_key(row[0]), row[-1]
+
+
+def row_entry(row):
+    # What a row belongs to: its OED entry (oed_frontier.entry_id of the URL
+    # column), or its source file for outputs without URLs
+    url = row[SCHEMA.index('URL')]
+    return entry_id(url) if url else ('source', row[-1])
+
+
+def _clean(value):
+    return '' if value is None else str(value).strip()
+
+
+def normalise_table(df, source):
+    # Excel/CSV outputs come with or without Etymology/URL, and the url-list
+    # scraper blanks Headword/Etymology after the first row and Meaning on
+    # repeated quotations of the same sense; restore them here.
+    df = df.fillna('').astype(str)
+    for column in SCHEMA:
+        if column not in df.columns:
+            df[column] = ''
+    df['Source'] = os.path.basename(source)
+
+    for column in ('Headword', 'Etymology', 'URL'):
+        df[column] = df[column].replace('', pd.NA).ffill().fillna('')
+    same_sense = df['Item Enumerator'].eq(df['Item Enumerator'].shift())
+    blank_meaning = df['Meaning'].eq('')
+    filled = df['Meaning'].replace('', pd.NA).ffill().fillna('')
+    df['Meaning'] = df['Meaning'].where(~(blank_meaning & same_sense), filled)
+
+    fallback = headword_from_filename(source)
+    df['Headword'] = df['Headword'].replace('', fallback)
+    return df[SCHEMA].values.tolist()
+
+
+def normalise_xml(path):
+    rows = []
+    root = ET.parse(path).getroot()
+    entries = [root] if root.tag == 'entry' else root.iter('entry')
+    for entry in entries:
+        base = dict.fromkeys(SCHEMA, '')
+        base['Headword'] = _clean(entry.findtext('headword')) or headword_from_filename(path)
+        base['Etymology'] = _clean(entry.findtext('etymology'))
+        base['URL'] = _clean(entry.findtext('url'))
+        base['Source'] = os.path.basename(path)
+        for meaning in entry.iter('meaning'):
+            sense = dict(base)
+            for tag, column in XML_MEANING_FIELDS.items():
+                sense[column] = _clean(meaning.findtext(tag))
+            quotes = meaning.findall('quotation')
+            if not quotes:
+                rows.append([sense[c] for c in SCHEMA])
+            for quote in quotes:
+                row = dict(sense)
+                for tag, column in XML_QUOTE_FIELDS.items():
+                    row[column] = _clean(quote.findtext(tag))
+                rows.append([row[c] for c in SCHEMA])
+    return rows
+
+
+def normalise_file(path):
+    try:
+        lower = path.lower()
+        if lower.endswith('.xml'):
+            return path, normalise_xml(path), None
+        if lower.endswith('.csv'):
+            df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        else:
+            df = pd.read_excel(path, dtype=str, keep_default_na=False)
+        return path, normalise_table(df, path), None
+    except Exception as e:
+        return path, [], str(e)
+
+
+def find_source_files(folders):
+    files = []
+    for folder in folders:
+        if os.path.isfile(folder):
+            files.append(folder)
+            continue
+        for root_dir, _, names in os.walk(folder):
+            for name in names:
+                if name.lower().endswith(SOURCE_EXTENSIONS):
+                    files.append(os.path.join(root_dir, name))
+    return sorted(files)
+
+
+def compact(folders, out_dir, workers=None, rows_per_shard=50000, progress=print):
+    started = time.time()
+    files = find_source_files(folders)
+    progress(f"📂 Found {len(files)} scraped files.")
+
+    os.makedirs(out_dir, exist_ok=True)
+    rows, runs, errors = [], [], {}
+    with tempfile.TemporaryDirectory(prefix='.compact-', dir=out_dir) as run_dir:
+        with ProcessPoolExecutor(max_workers=workers, initializer=worker_init) as executor:
+            for done, (path, file_rows, error) in enumerate(
+                    executor.map(normalise_file, files, chunksize=16), start=1):
+                if error:
+                    errors[path] = error
+                    progress(f"⚠️ Skipping {path}: {error}")
+                rows.extend(file_rows)
+                if len(rows) >= SORT_RUN_ROWS:
+                    runs.append(write_run(rows, run_dir, len(runs)))
+                    rows = []
+                if done % 500 == 0:
+                    progress(f"  … normalised {done}/{len(files)} files")
+
+        # Stable sorts, merged in run order, keep each source's original row
+        # order within a headword
+        rows.sort(key=row_order)
+        if runs:
+            rows = heapq.merge(*(read_run(path) for path in runs), rows, key=row_order)
+        count = write_store(rows, out_dir, rows_per_shard, sources=files, errors=errors)
+    progress(f"✅ Compacted {count} rows from {len(files)} files into {out_dir} "
+             f"in {time.time() - started:.1f}s")
+    from corpus_dates import build as build_dates
+    build_dates(out_dir, progress)
+
+
+def write_run(rows, run_dir, number):
+    rows.sort(key=row_order)
+    path = os.path.join(run_dir, f"run-{number:05d}.jsonl")
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+    return path
+
+
+def read_run(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def write_store(rows, out_dir, rows_per_shard=50000, sources=(), errors=None):
+    # rows: any iterable sorted by headword; returns the number written
+    os.makedirs(out_dir, exist_ok=True)
+    index, shards = {}, []
+    shard_file, shard_rows, offset, count = None, 0, 0, 0
+    current_key = None
+
+    def open_shard():
+        name = f"shard-{len(shards):05d}.jsonl"
+        shards.append({'file': name, 'rows': 0, 'headwords': 0, 'first': None, 'last': None})
+        return open(os.path.join(out_dir, name), 'wb')
+
+    try:
+        for row_number, row in enumerate(rows):
+            key = headword_key(row[0])
+            if key != current_key:
+                # Only start a new shard on a headword boundary
+                if shard_file is None or shard_rows >= rows_per_shard:
+                    if shard_file:
+                        shard_file.close()
+                    shard_file, shard_rows, offset = open_shard(), 0, 0
+                shard = shards[-1]
+                shard['headwords'] += 1
+                shard['first'] = shard['first'] or key
+                shard['last'] = key
+                index[key] = [len(shards) - 1, offset, 0, row_number, 0]
+                current_key = key
+            line = (json.dumps(row, ensure_ascii=False) + '\n').encode('utf-8')
+            shard_file.write(line)
+            offset += len(line)
+            shard_rows += 1
+            shards[-1]['rows'] += 1
+            entry = index[key]
+            entry[2] += len(line)
+            entry[4] += 1
+            count += 1
+    finally:
+        if shard_file:
+            shard_file.close()
+
+    with open(os.path.join(out_dir, INDEX), 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    with open(os.path.join(out_dir, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump({
+            'schema': SCHEMA,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'rows': count,
+            'headwords': len(index),
+            'shards': shards,
+            'sources': len(sources),
+            'errors': errors or {},
+        }, f, ensure_ascii=False, indent=2)
+
+    # Shards of an earlier build (or update_store() deltas) the index no
+    # longer points into
+    current = {shard['file'] for shard in shards}
+    for name in os.listdir(out_dir):
+        if SHARD_FILE.match(name) and name not in current:
+            os.remove(os.path.join(out_dir, name))
+    return count
+
+
+def update_store(store_dir, files, progress=print, headwords=()):
+    # The rows of `files` replace the rows the store holds for the same OED
+    # entries (row_entry: the entry URL, not the file name, which changes
+    # with the position in the URL list); other entries of a headword are
+    # kept. headwords: ones these entries may have held before under another
+    # spelling (RefreshSink.replaced_headwords)
+    started = time.time()
+    store = CorpusStore(store_dir)
+    sources = {os.path.basename(path) for path in files}
+    new_rows, errors, entries = {}, {}, set()
+    for path in files:
+        path, rows, error = normalise_file(path)
+        if error:
+            errors[path] = error
+            progress(f"⚠️ Skipping {path}: {error}")
+            continue
+        entries.add(('source', os.path.basename(path)))
+        for row in rows:
+            new_rows.setdefault(headword_key(row[0]), []).append(row)
+            entries.add(row_entry(row))
+
+    # Headwords these entries held before, also when the new file has none
+    affected = set(new_rows) | {headword_key(h) for h in headwords} | \
+        {headword_key(headword_from_filename(source)) for source in sources}
+    shards, index, manifest = store.manifest['shards'], store.index, store.manifest
+    name = f"shard-{len(shards):05d}.jsonl"
+    shard = {'file': name, 'rows': 0, 'headwords': 0, 'first': None, 'last': None, 'delta': True}
+    replaced = offset = 0
+    with open(os.path.join(store_dir, name), 'wb') as f:
+        for key in sorted(affected):
+            old_rows = store.load_rows(key)
+            rows = [row for row in old_rows if row_entry(row) not in entries] + new_rows.get(key, [])
+            if old_rows == rows:
+                continue
+            replaced += len(old_rows)
+            if not rows:
+                index.pop(key, None)
+                continue
+            data = b''.join((json.dumps(row, ensure_ascii=False) + '\n').encode('utf-8') for row in rows)
+            f.write(data)
+            index[key] = [len(shards), offset, len(data), None, len(rows)]
+            offset += len(data)
+            shard['rows'] += len(rows)
+            shard['headwords'] += 1
+            shard['first'] = shard['first'] or key
+            shard['last'] = key
+
+    if not shard['headwords']:
+        os.remove(os.path.join(store_dir, name))
+    else:
+        shards.append(shard)
+    manifest['rows'] = manifest['rows'] - replaced + shard['rows']
+    manifest['stale_rows'] = manifest.get('stale_rows', 0) + replaced
+    manifest['headwords'] = len(index)
+    manifest['updated'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    manifest['errors'] = {**manifest.get('errors', {}), **errors}
+    with open(os.path.join(store_dir, INDEX), 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    with open(os.path.join(store_dir, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    progress(f"✅ Updated {shard['headwords']} headwords ({shard['rows']} rows) from {len(files)} files "
+             f"in {store_dir} in {time.time() - started:.1f}s")
+    return shard['headwords']
+
+
+class CorpusStore:
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, MANIFEST), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        with open(os.path.join(store_dir, INDEX), encoding='utf-8') as f:
+            self.index = json.load(f)
+        self.schema = self.manifest['schema']
+
+    def __len__(self):
+        return self.manifest['rows']
+
+    def __contains__(self, headword):
+        return headword_key(headword) in self.index
+
+    def headwords(self):
+        return list(self.index)
+
+    def version(self):
+        # Changes with every compact() and update_store(); indexes built over
+        # the store keep it to notice they are out of date
+        manifest = self.manifest
+        return [manifest.get('created'), manifest.get('updated'), manifest['rows'], manifest.get('stale_rows', 0)]
+
+    def _shard_path(self, shard):
+        return os.path.join(self.store_dir, self.manifest['shards'][shard]['file'])
+
+    def load_rows(self, headword):
+        location = self.index.get(headword_key(headword))
+        if location is None:
+            return []
+        shard, offset, length = location[:3]
+        with open(self._shard_path(shard), 'rb') as f:
+            f.seek(offset)
+            data = f.read(length)
+        return [json.loads(line) for line in data.splitlines()]
+
+    def load(self, headword):
+        return [dict(zip(self.schema, row)) for row in self.load_rows(headword)]
+
+    def load_dataframe(self, headword):
+        return pd.DataFrame(self.load_rows(headword), columns=self.schema)
+
+    def iter_rows(self):
+        for _, _, _, row in self.iter_located_rows():
+            yield row
+
+    def iter_located_rows(self):
+        # (shard, byte offset, byte length, row) in store order; the location
+        # reads the row back with load_rows_at()
+        stale = self.manifest.get('stale_rows')
+        for shard in range(len(self.manifest['shards'])):
+            with open(self._shard_path(shard), 'rb') as f:
+                offset = 0
+                for line in f:
+                    row = json.loads(line)
+                    if stale:
+                        # Skip rows an update_store() has replaced
+                        location = self.index.get(headword_key(row[0]))
+                        if not location or location[0] != shard or not 0 <= offset - location[1] < location[2]:
+                            offset += len(line)
+                            continue
+                    yield shard, offset, len(line), row
+                    offset += len(line)
+
+    def load_rows_at(self, locations):
+        # Rows at (shard, offset, length) locations, in the given order; each
+        # shard is opened once
+        rows = [None] * len(locations)
+        by_shard = {}
+        for n, (shard, offset, length) in enumerate(locations):
+            by_shard.setdefault(int(shard), []).append((int(offset), int(length), n))
+        for shard, wanted in by_shard.items():
+            with open(self._shard_path(shard), 'rb') as f:
+                for offset, length, n in sorted(wanted):
+                    f.seek(offset)
+                    rows[n] = json.loads(f.read(length))
+        return rows
@@ -0,0 +1,11 @@
+import re
+
+# The word tokenizer shared by the corpus tools (collocations, fuzzy index,
+# server co-occurrence search). Kept apart so those that only need tokens do
+# not import numpy, scipy or pandas with corpus_collocations.
+
+TOKEN_RE = re.compile(r"[^\W\d_]+(?:['’\-][^\W\d_]+)*")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
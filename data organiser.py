@@ -0,0 +1,49 @@
+import os
+import sys
+import argparse
+from corpus_store import compact
+from oed_profile import add_profile_argument, profiling
+
+# Compacts the scraped {headword}_{n}.xlsx/.xml outputs of oed-scraper-url-list.py,
+# oed-scraper-urllist-xml.py and OEDScraperApp into one sharded store
+# (see corpus_store.py for the layout).
+
+
+def ask_folders():
+    import tkinter as tk
+    from tkinter import filedialog
+
+    root = tk.Tk()
+    root.withdraw()
+    source = filedialog.askdirectory(title="Select the scraped folder")
+    if not source:
+        print("No folder selected. Exiting.")
+        sys.exit()
+    output = filedialog.askdirectory(title="Select the output folder for the store")
+    if not output:
+        output = os.path.join(os.path.dirname(source.rstrip('/')), 'corpus_store')
+    root.destroy()
+    return [source], output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact scraped OED files into a sharded headword store")
+    parser.add_argument("sources", nargs="*", help="Scraped folders or files (asks with a dialog if omitted)")
+    parser.add_argument("-o", "--out", help="Output store directory")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--rows-per-shard", type=int, default=50000)
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    if args.sources:
+        sources = args.sources
+        out_dir = args.out or os.path.join(os.path.dirname(os.path.abspath(sources[0])), 'corpus_store')
+    else:
+        sources, out_dir = ask_folders()
+
+    with profiling(args.profile, "data-organiser"):
+        compact(sources, out_dir, workers=args.workers, rows_per_shard=args.rows_per_shard)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,155 @@
 import os
-import pandas as pd
-
-# Directory where the Excel files are stored
-excel_directory = '/home/gray221/Documents/PHD docs/OED Lists/scraped'
-
-# Output directory for the text files
-output_directory = '/home/gray221/Documents/PHD docs/OED Lists/m_q'
-if not os.path.exists(output_directory):
-    os.makedirs(output_directory)
-
-# Loop through all Excel files in the directory
-for file in os.listdir(excel_directory):
-    if file.endswith(".xlsx"):  # Ensure you're only working with Excel files
-        file_path = os.path.join(excel_directory, file)
-        
-        # Read the Excel file
-        df = pd.read_excel(file_path)
-        
-        # Extract 'Meaning' column, remove duplicates, and write to file
-        if 'Meaning' in df.columns:
-            meaning_file = os.path.join(output_directory, f"{os.path.splitext(file)[0]}_Meaning.txt")
-            unique_meanings = df['Meaning'].dropna().drop_duplicates()
-            unique_meanings.to_csv(meaning_file, index=False, header=False, sep='\n')
-        
-        # Extract 'Quotation Text' column, remove duplicates, and write to file
-        if 'Quotation Text' in df.columns:
-            quotation_file = os.path.join(output_directory, f"{os.path.splitext(file)[0]}_Quotation.txt")
-            unique_quotations = df['Quotation Text'].dropna().drop_duplicates()
-            unique_quotations.to_csv(quotation_file, index=False, header=False, sep='\n')
+import re
+import csv
+import sys
+import argparse
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from openpyxl import load_workbook
+from oed_profile import add_profile_argument, profiling, worker_init
+
+# Default directory where the Excel files are stored
+EXCEL_DIRECTORY = '/home/gray221/Documents/PHD docs/OED Lists/scraped'
+
+# Default output directory for the text files
+OUTPUT_DIRECTORY = '/home/gray221/Documents/PHD docs/OED Lists/m_q'
+
+COLUMNS = ['Meaning', 'Quotation Text']
+
+
+def read_columns(file_path):
+    # Read only the Meaning / Quotation Text columns (plus Headword if present),
+    # streaming the sheet instead of loading every cell into a DataFrame
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            return '', {c: [] for c in COLUMNS}
+        positions = {name: i for i, name in enumerate(header) if name in COLUMNS + ['Headword']}
+        if not any(c in positions for c in COLUMNS):
+            return '', {c: [] for c in COLUMNS}
+
+        first, last = min(positions.values()), max(positions.values())
+        values = {c: [] for c in COLUMNS}
+        headword = ''
+        for row in ws.iter_rows(min_row=2, min_col=first + 1, max_col=last + 1, values_only=True):
+            if not headword and 'Headword' in positions:
+                headword = row[positions['Headword'] - first] or ''
+            for column in COLUMNS:
+                if column in positions:
+                    value = row[positions[column] - first]
+                    if value is not None and str(value).strip():
+                        values[column].append(str(value))
+        return str(headword), values
+    finally:
+        wb.close()
+
+
+def unique(values):
+    return list(dict.fromkeys(values))
+
+
+def export_per_file(args):
+    # Original behaviour: <name>_Meaning.txt and <name>_Quotation.txt per workbook
+    file_path, output_directory = args
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    try:
+        _, values = read_columns(file_path)
+    except Exception as e:
+        return file_path, str(e)
+    for column, suffix in (('Meaning', 'Meaning'), ('Quotation Text', 'Quotation')):
+        if values[column]:
+            # One value per line, quoted like pandas.to_csv(sep='\n') when it
+            # spans lines itself
+            with open(os.path.join(output_directory, f"{name}_{suffix}.txt"), 'w', encoding='utf-8', newline='') as f:
+                csv.writer(f, delimiter='\n', lineterminator='\n').writerows([v] for v in unique(values[column]))
+    return file_path, None
+
+
+def extract_for_merge(file_path):
+    try:
+        headword, values = read_columns(file_path)
+    except Exception as e:
+        return file_path, '', {}, str(e)
+    if not headword:
+        headword = re.sub(r'_\d+$', '', os.path.splitext(os.path.basename(file_path))[0])
+    return file_path, headword, {c: unique(v) for c, v in values.items()}, None
+
+
+def digest(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=12).digest()
+
+
+def flatten(text):
+    return ' '.join(text.split())
+
+
+def run(excel_directory, output_directory, merge=False, workers=None, recursive=False):
+    os.makedirs(output_directory, exist_ok=True)
+
+    files = []
+    for root_dir, dirs, names in os.walk(excel_directory):
+        files += [os.path.join(root_dir, f) for f in sorted(names)
+                  if f.endswith(".xlsx") and not f.startswith("~$")]
+        if not recursive:
+            break
+    print(f"Found {len(files)} workbooks in {excel_directory}")
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=worker_init) as executor:
+        if not merge:
+            jobs = [(f, output_directory) for f in files]
+            for file_path, error in executor.map(export_per_file, jobs, chunksize=32):
+                if error:
+                    failed += 1
+                    print(f"⚠️ {file_path}: {error}")
+        else:
+            # Two merged streams, deduplicated across the whole corpus; each line is
+            # "headword<TAB>source file<TAB>text"
+            seen = {'Meaning': set(), 'Quotation Text': set()}
+            written = {'Meaning': 0, 'Quotation Text': 0}
+            with open(os.path.join(output_directory, 'Meaning.txt'), 'w', encoding='utf-8') as meaning_out, \
+                    open(os.path.join(output_directory, 'Quotation.txt'), 'w', encoding='utf-8') as quote_out:
+                streams = {'Meaning': meaning_out, 'Quotation Text': quote_out}
+                for file_path, headword, values, error in executor.map(extract_for_merge, files, chunksize=32):
+                    if error:
+                        failed += 1
+                        print(f"⚠️ {file_path}: {error}")
+                        continue
+                    source = os.path.basename(file_path)
+                    for column, texts in values.items():
+                        for text in texts:
+                            text = flatten(text)
+                            key = digest(text)
+                            if key in seen[column]:
+                                continue
+                            seen[column].add(key)
+                            streams[column].write(f"{flatten(headword)}\t{source}\t{text}\n")
+                            written[column] += 1
+            print(f"Merged {written['Meaning']} meanings and {written['Quotation Text']} quotations.")
+
+    print(f"Done: {len(files) - failed} workbooks exported to {output_directory} ({failed} failed).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Meaning and Quotation Text columns from scraped workbooks")
+    parser.add_argument("excel_directory", nargs="?", default=EXCEL_DIRECTORY)
+    parser.add_argument("output_directory", nargs="?", default=OUTPUT_DIRECTORY)
+    parser.add_argument("--merge", action="store_true",
+                        help="Write one deduplicated Meaning.txt and Quotation.txt instead of two files per workbook")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Include sub-folders")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.excel_directory):
+        print(f"Excel directory not found: {args.excel_directory}")
+        sys.exit(1)
+    with profiling(args.profile, "def-quote-exp"):
+        run(args.excel_directory, args.output_directory, args.merge, args.workers, args.recursive)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import os
+import shutil
+import tempfile
+import pytesseract
+
+# OCR engines behind ocr_pipeline. An engine turns a PIL image into a
+# single-page searchable PDF plus the page's hOCR.
+#
+#   tesserocr - Tesseract C-API through the tesserocr binding; the language
+#               model is loaded once per worker process and images are passed
+#               in memory. Used whenever tesserocr is installed.
+#   tesseract - the tesseract binary through pytesseract; one process per page
+#               (both outputs come from the same run). Fallback engine.
+
+ENGINES = ["auto", "tesserocr", "tesseract"]
+
+# Ubuntu default Tesseract path
+pytesseract.pytesseract.tesseract_cmd = "/usr/bin/tesseract"
+
+
+def tesserocr_available():
+    try:
+        import tesserocr  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def resolve_engine(name="auto"):
+    if name == "auto":
+        return "tesserocr" if tesserocr_available() else "tesseract"
+    if name not in ENGINES:
+        raise ValueError(f"Unknown OCR engine: {name}")
+    return name
+
+
+class TesseractCLIEngine:
+    name = "tesseract"
+
+    def __init__(self, lang):
+        self.lang = lang
+
+    @staticmethod
+    def version():
+        try:
+            return f"tesseract-{pytesseract.get_tesseract_version()}"
+        except Exception:
+            return "tesseract-unknown"
+
+    def recognize(self, image):
+        pdf_bytes, hocr = pytesseract.run_and_get_multiple_output(
+            image, extensions=['pdf', 'hocr'], lang=self.lang)
+        return pdf_bytes, hocr
+
+    def close(self):
+        pass
+
+
+class TesserocrEngine:
+    name = "tesserocr"
+
+    def __init__(self, lang):
+        import tesserocr
+        self.lang = lang
+        self.api = tesserocr.PyTessBaseAPI(lang=lang)
+        self.api.SetVariable("tessedit_create_pdf", "1")
+        self.api.SetVariable("tessedit_create_hocr", "1")
+        # The PDF renderer needs an output base name; keep it on tmpfs when possible
+        self.work_dir = tempfile.mkdtemp(prefix="tesserocr-", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+
+    @staticmethod
+    def version():
+        import tesserocr
+        return "tesserocr-" + tesserocr.tesseract_version().splitlines()[0].split()[-1]
+
+    def recognize(self, image):
+        base = os.path.join(self.work_dir, "page")
+        if not self.api.ProcessPage(base, image, 0, "page"):
+            raise RuntimeError("tesserocr could not process the page")
+        with open(base + ".pdf", "rb") as f:
+            pdf_bytes = f.read()
+        hocr = self.api.GetHOCRText(0).encode("utf-8")
+        return pdf_bytes, hocr
+
+    def close(self):
+        self.api.End()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+ENGINE_CLASSES = {"tesserocr": TesserocrEngine, "tesseract": TesseractCLIEngine}
+
+# One live engine per worker process, reused for every page it handles
+_engine = None
+
+
+def engine_version(name="auto"):
+    return ENGINE_CLASSES[resolve_engine(name)].version()
+
+
+def get_engine(name, lang):
+    global _engine
+    name = resolve_engine(name)
+    if _engine is None or _engine.name != name or _engine.lang != lang:
+        reset_engine()
+        _engine = ENGINE_CLASSES[name](lang)
+    return _engine
+
+
+def reset_engine():
+    global _engine
+    if _engine is not None:
+        try:
+            _engine.close()
+        except Exception:
+            pass
+    _engine = None
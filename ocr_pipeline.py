@@ -0,0 +1,397 @@
+import os
+import hashlib
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PIL import Image
+import fitz  # PyMuPDF
+from ocr_engines import get_engine, reset_engine, engine_version
+from ocr_preprocess import prepare_page
+from oed_profile import stage as profile_stage, worker_init
+
+# Page-level OCR pipeline used by PDF-OCR.py. Every (file, page) pair of a batch
+# is one task on a single process pool, so short and long PDFs alike keep all
+# workers busy; a file is assembled as soon as its last page comes back.
+
+MAX_ATTEMPTS = 3
+OPEN_DOCUMENTS = 4  # per worker process
+
+# A page counts as already searchable when it has at least this many extractable
+# characters; pages with less text are only sent to OCR if images cover a
+# meaningful part of them (otherwise there is nothing to recognise).
+MIN_TEXT_CHARS = 20
+MIN_IMAGE_COVERAGE = 0.1
+
+# Marker in the per-page results for pages copied from the input unchanged
+COPY_PAGE = "copy"
+
+# The output PDF is flushed to disk every this many pages
+FLUSH_EVERY = 50
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "oed-scraper", "ocr-pages")
+
+# Per-process cache of open PyMuPDF documents, so a worker that gets several
+# pages of the same file parses it only once
+_documents = OrderedDict()
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def open_document(pdf_path):
+    doc = _documents.pop(pdf_path, None)
+    if doc is None:
+        doc = fitz.open(pdf_path)
+        while len(_documents) >= OPEN_DOCUMENTS:
+            _, old = _documents.popitem(last=False)
+            old.close()
+    _documents[pdf_path] = doc
+    return doc
+
+
+def render_page(doc, page_num, dpi):
+    # Rasterise in-process and wrap the pixmap buffer directly, no temp files
+    pix = doc[page_num].get_pixmap(dpi=dpi, colorspace=fitz.csRGB, alpha=False)
+    image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    # Tesseract sizes the output PDF page from the image resolution
+    image.info["dpi"] = (dpi, dpi)
+    return image
+
+
+def render_page_pdf2image(pdf_path, page_num, dpi):
+    # Previous renderer: one pdftoppm process per page (kept for benchmarks)
+    from pdf2image import convert_from_path
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page_num + 1, last_page=page_num + 1)
+    if not images:
+        raise ValueError("Empty image list")
+    return images[0]
+
+
+def ocr_page(pdf_path, page_num, dpi, lang, engine="auto", preprocess=False):
+    # Runs in a worker process; returns the single-page OCR PDF and hOCR (or None)
+    # plus an info dict (chosen DPI, skew, blank flag, stage timings)
+    name = os.path.basename(pdf_path)
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            started = time.perf_counter()
+            if preprocess:
+                with profile_stage("preprocess"):
+                    image, info = prepare_page(open_document(pdf_path)[page_num])
+                if image is None:
+                    print(f"  [PAGE {page_num + 1}] {name}: blank, not OCR'd")
+                    return pdf_path, page_num, None, None, None, info
+            else:
+                with profile_stage("render"):
+                    image = render_page(open_document(pdf_path), page_num, dpi)
+                info = {"dpi": dpi, "blank": False, "skew": 0.0,
+                        "timings": {"render": time.perf_counter() - started}}
+            ocr_started = time.perf_counter()
+            with profile_stage("ocr"):
+                pdf_bytes, hocr = get_engine(engine, lang).recognize(image)
+            info["timings"]["ocr"] = time.perf_counter() - ocr_started
+            info["attempts"] = attempt
+            stages = " ".join(f"{k} {v:.2f}s" for k, v in info["timings"].items())
+            print(f"  [PAGE {page_num + 1}] {name}: {info['dpi']} DPI, skew {info['skew']}°, {stages}")
+            return pdf_path, page_num, pdf_bytes, hocr, None, info
+        except Exception as e:
+            error = str(e)
+            # Start the next attempt with a fresh engine
+            reset_engine()
+            print(f"    ⚠️ Retry {attempt} for {name} page {page_num + 1}: {e}")
+    return pdf_path, page_num, None, None, error, {"attempts": MAX_ATTEMPTS}
+
+
+def image_coverage(page):
+    area = abs(page.rect)
+    if not area:
+        return 0.0
+    covered = 0.0
+    for image in page.get_images(full=True):
+        for rect in page.get_image_rects(image[0]):
+            covered += abs(rect & page.rect)
+    return min(covered / area, 1.0)
+
+
+def page_needs_ocr(page, min_chars=MIN_TEXT_CHARS, min_image_coverage=MIN_IMAGE_COVERAGE):
+    # Printed-to-PDF pages (oed-scraper-pdf.py) and scans that were already
+    # OCR'd carry a text layer; only image-only pages go to Tesseract
+    text = page.get_text("text")
+    if len("".join(text.split())) >= min_chars:
+        return False
+    return image_coverage(page) >= min_image_coverage
+
+
+def page_fingerprint(doc, page):
+    # Hash of what the page draws: its content stream plus the raw streams of
+    # the images and forms it uses, so identical scans hash alike across files
+    digest = hashlib.sha256()
+    digest.update(f"{page.rect}|{page.rotation}".encode())
+    digest.update(page.read_contents())
+    for xref in sorted({item[0] for item in page.get_images(full=True)} |
+                       {item[0] for item in page.get_xobjects()}):
+        digest.update(doc.xref_stream_raw(xref) or b"")
+    return digest.hexdigest()
+
+
+def plan_pages(pdf_path, skip_text_pages=True):
+    # Returns {page number: fingerprint} for the pages that need OCR, and the page count
+    with fitz.open(pdf_path) as doc:
+        pages = {page.number: page_fingerprint(doc, page) for page in doc
+                 if not skip_text_pages or page_needs_ocr(page)}
+        return pages, len(doc)
+
+
+class PageCache:
+    # On-disk store of single-page OCR PDFs, keyed by page content and OCR settings
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(fingerprint, dpi, lang, engine):
+        return hashlib.sha256(f"{fingerprint}|{dpi}|{lang}|{engine}".encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pdf")
+
+    def get(self, key):
+        try:
+            with open(self.path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key, pdf_bytes, hocr=None):
+        # hOCR goes next to the PDF fragment; both are written then renamed so
+        # a crash never leaves a truncated fragment behind
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if hocr:
+            self._write(os.path.splitext(path)[0] + ".hocr", hocr)
+        self._write(path, pdf_bytes)
+
+    @staticmethod
+    def _write(path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+class PageAssembler:
+    # Writes one output PDF page by page in order. Pages that finish early are
+    # spilled to temp files until the contiguous prefix reaches them, and the
+    # partial output is flushed to disk with incremental saves and re-opened,
+    # so memory stays proportional to the pages in flight, not the page count.
+
+    def __init__(self, output_pdf_path, page_count, source_pdf_path, flush_every=FLUSH_EVERY,
+                 compact=True):
+        self.output_pdf_path = output_pdf_path
+        self.partial_path = output_pdf_path + ".part"
+        self.page_count = page_count
+        self.source_pdf_path = source_pdf_path
+        self.flush_every = flush_every
+        self.compact = compact
+        self.next_page = 0
+        self.pending = {}
+        self.spill_dir = None
+        self.doc = fitz.open()
+        self.source_doc = None
+        self.unflushed = 0
+        self.on_disk = False
+
+    def add(self, page_num, result):
+        if page_num != self.next_page:
+            self.pending[page_num] = self._spill(result)
+            return
+        self._write(page_num, result)
+        while self.next_page in self.pending:
+            self._write(self.next_page, self._unspill(self.pending.pop(self.next_page)))
+
+    def _spill(self, result):
+        if not isinstance(result, bytes):
+            return result
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="ocr-spill-")
+        fd, path = tempfile.mkstemp(dir=self.spill_dir, suffix=".pdf")
+        with os.fdopen(fd, "wb") as f:
+            f.write(result)
+        return ("spilled", path)
+
+    def _unspill(self, item):
+        if isinstance(item, tuple):
+            with open(item[1], "rb") as f:
+                data = f.read()
+            os.remove(item[1])
+            return data
+        return item
+
+    def _write(self, page_num, result):
+        if result == COPY_PAGE:
+            if self.source_doc is None:
+                self.source_doc = fitz.open(self.source_pdf_path)
+            self.doc.insert_pdf(self.source_doc, from_page=page_num, to_page=page_num)
+        elif result:
+            with fitz.open("pdf", result) as page_doc:
+                self.doc.insert_pdf(page_doc)
+        else:
+            print(f"    ⚠️ Skipping page {page_num + 1} in final merge")
+        self.next_page += 1
+        self.unflushed += 1
+        if self.flush_every and self.unflushed >= self.flush_every and self.doc.page_count:
+            self._flush()
+
+    def _flush(self):
+        if self.on_disk:
+            self.doc.saveIncr()
+        else:
+            self.doc.save(self.partial_path)
+            self.on_disk = True
+        # Re-opening drops the already written objects from memory
+        self.doc.close()
+        self.doc = fitz.open(self.partial_path)
+        self.unflushed = 0
+
+    def close(self):
+        if self.next_page != self.page_count:
+            raise RuntimeError(f"only {self.next_page} of {self.page_count} pages were assembled")
+        try:
+            if self.compact:
+                self.doc.save(self.output_pdf_path, garbage=3, deflate=True)
+            elif self.on_disk:
+                self.doc.saveIncr()
+                self.doc.close()
+                os.replace(self.partial_path, self.output_pdf_path)
+            else:
+                self.doc.save(self.output_pdf_path)
+        finally:
+            self.cleanup()
+
+    def cleanup(self):
+        if not self.doc.is_closed:
+            self.doc.close()
+        if self.source_doc is not None:
+            self.source_doc.close()
+            self.source_doc = None
+        if os.path.exists(self.partial_path):
+            os.remove(self.partial_path)
+        if self.spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self.spill_dir = None
+
+
+def run_ocr_batch(pdf_paths, output_dir, dpi=300, lang='eng', workers=None,
+                  on_start=None, on_page=None, on_file=None, skip_text_pages=True,
+                  cache_dir=None, engine="auto", preprocess=False, metrics=None):
+    # on_start(total_pages), on_page(pdf_path, page_num, ok), on_file(pdf_path, output_path or None);
+    # metrics: optional oed_metrics.RunMetrics, one line per OCR'd (or cached) page
+    page_counts, ocr_pages = {}, {}
+    for pdf_path in pdf_paths:
+        try:
+            ocr_pages[pdf_path], page_counts[pdf_path] = plan_pages(pdf_path, skip_text_pages)
+        except Exception as e:
+            print(f"  ❌ Error opening {pdf_path}: {e}")
+            if on_file:
+                on_file(pdf_path, None)
+
+    total = sum(page_counts.values())
+    to_ocr = sum(len(pages) for pages in ocr_pages.values())
+    if on_start:
+        on_start(total)
+    workers = workers or default_workers()
+    print(f"[INFO] {len(page_counts)} files, {total} pages ({total - to_ocr} already searchable) "
+          f"on {workers} worker processes")
+
+    assemblers = {path: PageAssembler(os.path.join(output_dir, os.path.basename(path)), n, path)
+                  for path, n in page_counts.items()}
+    remaining = {path: len(pages) for path, pages in ocr_pages.items()}
+    saved = {}
+
+    # Identical pages (within or across files) are OCR'd once; with a cache,
+    # pages finished by an earlier or crashed run are not OCR'd at all
+    cache = PageCache(cache_dir) if cache_dir else None
+    version = engine_version(engine)
+    print(f"[INFO] OCR engine: {version}")
+    waiting = OrderedDict()
+    for pdf_path, pages in ocr_pages.items():
+        for page_num, fingerprint in pages.items():
+            key = PageCache.key(fingerprint, "auto+clean" if preprocess else dpi, lang, version)
+            waiting.setdefault(key, []).append((pdf_path, page_num))
+
+    def finish(pdf_path):
+        assembler = assemblers.pop(pdf_path)
+        output_pdf_path = assembler.output_pdf_path
+        try:
+            assembler.close()
+            print(f"  ✅ Saved to: {output_pdf_path}")
+            saved[pdf_path] = output_pdf_path
+        except Exception as e:
+            print(f"  ❌ Error assembling {pdf_path}: {e}")
+            assembler.cleanup()
+            output_pdf_path = None
+        if on_file:
+            on_file(pdf_path, output_pdf_path)
+
+    def page_done(key, pdf_bytes):
+        for pdf_path, page_num in waiting.pop(key):
+            assemblers[pdf_path].add(page_num, pdf_bytes)
+            remaining[pdf_path] -= 1
+            if on_page:
+                on_page(pdf_path, page_num, pdf_bytes is not None)
+            if remaining[pdf_path] == 0:
+                finish(pdf_path)
+
+    for pdf_path, n in page_counts.items():
+        for page_num in sorted(set(range(n)) - set(ocr_pages[pdf_path])):
+            assemblers[pdf_path].add(page_num, COPY_PAGE)
+            if on_page:
+                on_page(pdf_path, page_num, True)
+        if remaining[pdf_path] == 0:
+            finish(pdf_path)
+
+    def page_metrics(key, stages, ok=True, error=None, **extra):
+        pdf_path, page_num = waiting[key][0]
+        record = metrics.record(f"{pdf_path}#{page_num + 1}")
+        for stage, seconds in stages.items():
+            record.add_stage(stage, seconds)
+        record.retries = max(0, extra.pop("attempts", 1) - 1)
+        metrics.finish(record, ok=ok, error=error, total=sum(stages.values()), pages=len(waiting[key]), **extra)
+
+    if cache:
+        hits = [key for key in waiting if os.path.exists(cache.path(key))]
+        print(f"[INFO] {len(hits)} pages reused from {cache.cache_dir}")
+        for key in hits:
+            started = time.perf_counter()
+            pdf_bytes = cache.get(key)
+            if metrics:
+                page_metrics(key, {"cache": time.perf_counter() - started}, cached=True,
+                             bytes=len(pdf_bytes) if pdf_bytes else 0)
+            page_done(key, pdf_bytes)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=worker_init) as executor:
+        # Submitted file by file, so earlier files complete (and are saved) first
+        futures = {executor.submit(ocr_page, *owners[0], dpi, lang, engine, preprocess): key
+                   for key, owners in waiting.items()}
+        for future in as_completed(futures):
+            # Drop our reference so the page bytes are freed once assembled
+            key = futures.pop(future)
+            pdf_path, page_num, pdf_bytes, hocr, error, info = future.result()
+            if metrics:
+                page_metrics(key, info.get("timings", {}), ok=error is None, error=error,
+                             attempts=info.get("attempts", 1), dpi=info.get("dpi"),
+                             blank=bool(info.get("blank")), bytes=len(pdf_bytes) if pdf_bytes else 0)
+            if info.get("blank"):
+                # Blank pages are kept as they are in the input
+                page_done(key, COPY_PAGE)
+                continue
+            if error:
+                print(f"    ❌ Failed {os.path.basename(pdf_path)} page {page_num + 1}: {error}")
+            elif cache:
+                cache.put(key, pdf_bytes, hocr)
+            page_done(key, pdf_bytes)
+
+    return saved
@@ -0,0 +1,170 @@
+import time
+import numpy as np
+from PIL import Image
+import fitz  # PyMuPDF
+
+# Vectorised page clean-up before OCR: grayscale render, adaptive binarisation,
+# scanner-border removal, blank-page detection, deskew, and a per-page DPI
+# chosen from the measured text line spacing.
+#
+# Page geometry is preserved (borders are whitened, not cropped, and deskew does
+# not expand the canvas) so the OCR page still lines up with the original.
+
+PROBE_DPI = 100
+MIN_DPI, MAX_DPI = 150, 400
+# Tesseract is most accurate with text lines of roughly 40 pixels, which with
+# ordinary (120%) leading are set this many pixels apart
+TARGET_LINE_SPACING = 48
+MIN_LINE_SPACING = 3  # pixels at the probe DPI; shorter periods are noise
+SPACING_STRIPS = 8
+# Pixels this dark are ink regardless of their surroundings (solid borders)
+DARK_LEVEL = 96
+BLANK_INK_RATIO = 0.0005
+BORDER_INK_RATIO = 0.6
+MAX_SKEW = 3.0
+SKEW_STEP = 0.2
+SKEW_SAMPLE = 200000
+
+
+def render_gray(page, dpi):
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+    return gray[:, :pix.width]
+
+
+def binarize(gray, window=None, k=0.15):
+    # Bradley-Roth adaptive threshold: a pixel is ink when it is darker than
+    # (1 - k) times the mean of its window, computed from an integral image.
+    # Solid dark areas count as ink too, so scanner borders reach the page edge.
+    h, w = gray.shape
+    window = window or max(15, (min(h, w) // 40) | 1)
+    half = window // 2
+    size = 2 * half + 1
+    integral = np.zeros((h + size, w + size), dtype=np.int64)
+    padded = np.pad(gray, half, mode="edge")
+    np.cumsum(np.cumsum(padded, axis=0, dtype=np.int64), axis=1, out=integral[1:, 1:])
+
+    sums = integral[size:, size:].copy()
+    sums -= integral[:-size, size:]
+    sums -= integral[size:, :-size]
+    sums += integral[:-size, :-size]
+    return (gray < sums * ((1.0 - k) / (size * size))) | (gray < DARK_LEVEL)
+
+
+def remove_borders(ink):
+    # Dark scanner edges show up as rows/columns that are almost all ink,
+    # touching the page edge; clear them from the outside in
+    ink = ink.copy()
+    row_ratio, col_ratio = ink.mean(axis=1), ink.mean(axis=0)
+    for ratios, axis in ((row_ratio, 0), (col_ratio, 1)):
+        dark = ratios > BORDER_INK_RATIO
+        n = len(dark)
+        lead = int(np.argmin(dark)) if not dark.all() else n
+        trail = int(np.argmin(dark[::-1])) if not dark.all() else n
+        if axis == 0:
+            ink[:lead] = False
+            ink[n - trail:] = False
+        else:
+            ink[:, :lead] = False
+            ink[:, n - trail:] = False
+    return ink
+
+
+def is_blank(ink):
+    return ink.mean() < BLANK_INK_RATIO
+
+
+def estimate_skew(ink, max_angle=MAX_SKEW, step=SKEW_STEP):
+    # Projection-profile method: the angle whose sheared row histogram is the
+    # most peaked is the text baseline angle
+    ys, xs = np.nonzero(ink)
+    if len(ys) < 100:
+        return 0.0
+    if len(ys) > SKEW_SAMPLE:
+        pick = np.random.default_rng(0).choice(len(ys), SKEW_SAMPLE, replace=False)
+        ys, xs = ys[pick], xs[pick]
+    angles = np.arange(-max_angle, max_angle + step / 2, step)
+    offset = int(np.ceil(ink.shape[1] * np.tan(np.radians(max_angle)))) + 1
+    scores = np.empty(len(angles))
+    for i, angle in enumerate(angles):
+        rows = np.round(ys + xs * np.tan(np.radians(angle))).astype(np.int64) + offset
+        hist = np.bincount(rows)
+        scores[i] = np.dot(hist, hist)
+    return round(float(angles[int(np.argmax(scores))]), 2)
+
+
+def line_spacing(ink, strips=SPACING_STRIPS):
+    # Distance between text lines: the period of the row ink profile, from
+    # its autocorrelation. Unlike the height of runs of inked rows it holds up
+    # when ascenders and descenders join the lines of tightly set columns.
+    # The page is cut into vertical strips whose autocorrelations are summed,
+    # so columns with baselines that do not line up don't blur the period.
+    n = ink.shape[0]
+    width = ink.shape[1] // strips
+    profiles = ink[:, :width * strips].reshape(n, strips, width).mean(axis=2).T
+    profiles = profiles - profiles.mean(axis=1, keepdims=True)
+    spectrum = np.fft.rfft(profiles, 2 * n, axis=1)
+    correlation = np.fft.irfft(spectrum * np.conj(spectrum), axis=1)[:, :n // 4].sum(axis=0)
+    if len(correlation) < 2 * MIN_LINE_SPACING or correlation[0] <= 0:
+        return 0.0
+    correlation /= correlation[0]
+    # Local maxima past the first dip below zero; the first one of nearly the
+    # highest is the line period, later ones are its multiples
+    negative = np.flatnonzero(correlation[MIN_LINE_SPACING:] < 0)
+    if not len(negative):
+        return 0.0
+    start = MIN_LINE_SPACING + int(negative[0])
+    inner = correlation[start:-1]
+    peaks = start + np.flatnonzero((inner >= correlation[start - 1:-2]) & (inner > correlation[start + 1:]))
+    peaks = peaks[correlation[peaks] >= 0.1]
+    if not len(peaks):
+        return 0.0
+    peak = int(peaks[np.argmax(correlation[peaks] >= 0.8 * correlation[peaks].max())])
+    # Parabola through the peak and its neighbours for a sub-pixel period
+    before, at, after = correlation[peak - 1:peak + 2]
+    curvature = before - 2 * at + after
+    return float(peak + (0.5 * (before - after) / curvature if curvature else 0.0))
+
+
+def choose_dpi(spacing_px, probe_dpi=PROBE_DPI):
+    if not spacing_px:
+        return 300
+    dpi = probe_dpi * TARGET_LINE_SPACING / spacing_px
+    return int(np.clip(round(dpi / 25) * 25, MIN_DPI, MAX_DPI))
+
+
+def prepare_page(page, dpi=None):
+    # Returns (PIL image or None for a blank page, info dict with dpi/skew/timings).
+    # With dpi=None the DPI is picked from a low-resolution probe render.
+    timings = {}
+    started = time.perf_counter()
+
+    def lap(name):
+        nonlocal started
+        now = time.perf_counter()
+        timings[name] = now - started
+        started = now
+
+    if dpi is None:
+        probe = remove_borders(binarize(render_gray(page, PROBE_DPI)))
+        lap("probe")
+        if is_blank(probe):
+            return None, {"dpi": PROBE_DPI, "blank": True, "skew": 0.0, "timings": timings}
+        dpi = choose_dpi(line_spacing(probe))
+
+    gray = render_gray(page, dpi)
+    lap("render")
+    ink = remove_borders(binarize(gray))
+    lap("binarize")
+    if is_blank(ink):
+        return None, {"dpi": dpi, "blank": True, "skew": 0.0, "timings": timings}
+    skew = estimate_skew(ink)
+    lap("deskew")
+
+    image = Image.fromarray(np.where(ink, 0, 255).astype(np.uint8))
+    if abs(skew) >= SKEW_STEP:
+        image = image.rotate(-skew, resample=Image.NEAREST, fillcolor=255)
+    image = image.convert("1")
+    image.info["dpi"] = (dpi, dpi)
+    lap("image")
+    return image, {"dpi": dpi, "blank": False, "skew": skew, "timings": timings}
@@ -0,0 +1,64 @@
+import os
+import sys
+import argparse
+from oed_print_options import add_print_arguments, build_print_options
+from oed_sinks import RECORD_WRITERS
+from oed_scrape import read_url_list, build_sinks, scrape
+from oed_metrics import RunMetrics
+from oed_profile import add_profile_argument, profiling
+
+# Loads every OED URL once and produces any combination of PDF, raw HTML
+# snapshot and parsed records (Excel/CSV/XML/Parquet) from that single load.
+#
+#   python oed-scraper-multi.py url_list.txt --pdf --html --records excel xml
+
+
+def ask_url_list():
+    import tkinter as tk
+    from tkinter import filedialog
+
+    root = tk.Tk()
+    root.withdraw()
+    path = filedialog.askopenfilename(title="Select the URL list file", filetypes=[("Text Files", "*.txt")])
+    root.destroy()
+    if not path:
+        print("No file selected. Exiting.")
+        sys.exit()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape OED entries into several outputs with one page load each")
+    parser.add_argument("url_list", nargs="?", help="TXT file with one URL per line (asks with a dialog if omitted)")
+    parser.add_argument("-o", "--out", help="Output folder (default: next to the URL list)")
+    parser.add_argument("--pdf", action="store_true", help="Save each page as PDF")
+    parser.add_argument("--html", action="store_true", help="Save the raw HTML snapshot")
+    parser.add_argument("--records", nargs="*", choices=list(RECORD_WRITERS),
+                        help="Parsed record formats (default: excel when no other output is chosen)")
+    parser.add_argument("--visible", action="store_true", help="Show the browser window")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Threads for parsing and writing")
+    parser.add_argument("--metrics", help="Per-URL stage timings as JSONL (default: <out>/metrics.jsonl)")
+    add_print_arguments(parser)
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    if args.records is None and not (args.pdf or args.html):
+        args.records = ['excel']
+
+    url_list_path = args.url_list or ask_url_list()
+    urls = read_url_list(url_list_path)
+    if not urls:
+        print("❌ The file is empty. Exiting.")
+        return
+
+    out_dir = args.out or os.path.dirname(os.path.abspath(url_list_path))
+    sinks = build_sinks(out_dir, args.pdf, args.html, args.records, build_print_options(args))
+    metrics = RunMetrics(args.metrics or os.path.join(out_dir, 'metrics.jsonl'), tool="oed-scraper-multi")
+    with profiling(args.profile, "oed-scraper-multi"):
+        scrape(urls, sinks, headless=not args.visible, workers=args.workers, metrics=metrics)
+    metrics.print_summary()
+    print(f"🏁 Done. Outputs in {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ from bs4 import BeautifulSoup
 import pandas as pd
 import time
 import re
+from oed_model import Entry, iter_rows
 
 # Initializing
 root = tk.Tk()
@@ -39,22 +40,31 @@ driver.quit()
 # Parse the source code using BeautifulSoup
 soup = BeautifulSoup(html_source, 'html.parser')
 
-# Extract data
-data = []
+# Extract data into Entry > Sense > Quotation objects (oed_model); rows are
+# only built when the DataFrame is filled
+entries = []
+senses = {}  # id(item-content tag) -> Sense, shared by every headword listing it
 first_headword = None  # this will use the headword to create the file with the same name
 
-for entry in soup.find_all(class_='headword'):
-    headword = entry.get_text(strip=True)
+for headword_tag in soup.find_all(class_='headword'):
+    headword = headword_tag.get_text(strip=True)
     print(headword)
+    entry = Entry(headword)
+    entries.append(entry)
 
     if not first_headword:
         # Clean the headword to make it a valid file name
         first_headword = re.sub(r'[\\/*?:<>|]', "", headword)  # removes most unauthorized special characters
 
     # Get all meanings under this headword
-    meaning_entries = entry.find_all_next(class_='item-content')
+    meaning_entries = headword_tag.find_all_next(class_='item-content')
     print(meaning_entries)
     for meaning_entry in meaning_entries:
+        sense = senses.get(id(meaning_entry))
+        if sense is not None:
+            entry.senses.append(sense)
+            continue
+
         # Updated: Extracting text with spaces between sub-elements in the 'definition' class
         definition_element = meaning_entry.find(class_='definition')
         if definition_element:
@@ -68,8 +78,10 @@ for entry in soup.find_all(class_='headword'):
 
         # Extract 'item-enumerator' (the numbering of the meanings)
         item_enumerator = meaning_entry.find_previous(class_='item-enumerator').get_text(strip=True) if meaning_entry.find_previous(class_='item-enumerator') else ''
+        sense = senses[id(meaning_entry)] = entry.add_sense(item_enumerator, daterange, grammar, meaning_text)
 
         # Find quotations related to this meaning, scoped within the meaning_entry
+        # (a sense without quotations still gives one row)
         quotation_container = meaning_entry.find_next(class_='quotation-container')
         if quotation_container:
             # Iterate over all 'quotation' class items within the 'quotation-container'
@@ -83,15 +95,11 @@ for entry in soup.find_all(class_='headword'):
                 citation = quote.find(class_='citation').get_text(strip=True) if quote.find(class_='citation') else ''
                 print(quote_date, '', quote_text)
 
-                # Add data as a row for each quotation
-                data.append([headword, item_enumerator, daterange, grammar, meaning_text, quote_date, quote_text, citation])
-        else:
-            # Add row without quotation if there are no quotations for this meaning
-            data.append([headword, item_enumerator, daterange, grammar, meaning_text, '', '', ''])
+                sense.add_quotation(quote_date, quote_text, citation)
 
 # Create DataFrame from the extracted data
 columns = ['Headword', 'Item Enumerator', 'Date Range', 'Grammar', 'Meaning', 'Quotation Date', 'Quotation Text', 'Citation']
-df = pd.DataFrame(data, columns=columns)
+df = pd.DataFrame.from_records(iter_rows(entries, columns), columns=columns)
 
 # Use the headword as the file name
 if first_headword:
@@ -0,0 +1,374 @@
+import os
+import sys
+import argparse
+from oed_print_options import add_print_arguments, build_print_options
+from oed_profile import add_profile_argument, profiling
+
+# Headless command line for the scrapers, OCR, dedup, search and export tools.
+# Everything is taken from arguments (no dialogs), so it runs over SSH and from
+# cron. Each subcommand imports its heavy dependencies (selenium, pandas,
+# PyMuPDF, tesseract) only when it runs; `--help` loads none of them.
+#
+#   python oed.py scrape urls.txt --records excel xml --html
+#   python oed.py pdf urls.txt -o PDFs
+#   python oed.py ocr PDFs/ -o OCR/ --preprocess
+#   python oed.py dedup scraped/ --format Excel
+#   python oed.py search scraped/ "pattern" -o hits.csv
+#   python oed.py search scraped/ --terms semantic_field.txt -o hits.xlsx
+#   python oed.py export scraped/ -o corpus_store
+#   python oed.py serve --preload corpus_store scraped/
+#   python oed.py search corpus_store humour --fuzzy 2 -o hits.xlsx
+#   python oed.py search corpus_store "\bwit\b" --from 1600 --to 1700 -o hits.xlsx
+
+RECORD_FORMATS = ["excel", "csv", "xml", "parquet"]  # oed_sinks.RECORD_WRITERS
+HTML_PARSERS = ["auto", "lxml", "html.parser"]  # oed_extract.PARSERS
+RECORD_FIELDS = ['Headword', 'URL', 'Etymology', 'Item Enumerator', 'Date Range', 'Grammar',
+                 'Meaning', 'Quotation Date', 'Quotation Text', 'Citation']  # oed_model.COLUMNS
+DEDUP_FORMATS = ["TXT", "CSV", "Excel", "XML"]  # oed_dedup.FORMATS
+SEARCH_FILE_TYPES = ["excel", "csv", "xml", "tei"]  # oed_search.FILE_TYPES
+EXPORT_EXTENSIONS = {".csv": "CSV", ".xlsx": "Excel", ".xml": "XML"}
+SEARCH_SERVER_PORT = 8765  # oed_client.DEFAULT_PORT
+ADDRESS_VARIABLE = "OED_SEARCH_SERVER"  # oed_client.ADDRESS_VARIABLE
+
+
+def load_urls(path, follow=0, budget=None, frontier_db=None):
+    from oed_scrape import read_url_list
+    if follow or budget or frontier_db:
+        from oed_frontier import Frontier
+        urls = Frontier(read_url_list(path, dedupe=False), max_depth=follow, budget=budget, store_path=frontier_db)
+        print(urls.summary())
+    else:
+        urls = read_url_list(path)
+    if not urls:
+        sys.exit(f"❌ {path} has no URLs.")
+    return urls
+
+
+def cmd_scrape(args):
+    from oed_scrape import build_sinks, scrape
+    from oed_extract import ExtractionPlan
+    from oed_metrics import RunMetrics
+
+    if args.records is None and not (args.pdf or args.html):
+        args.records = ['excel']
+    if (args.refresh or args.store) and not args.records:
+        sys.exit("❌ --refresh/--store need --records.")
+    urls = load_urls(args.url_list, args.follow, args.budget, args.frontier)
+    out_dir = args.out or os.path.dirname(os.path.abspath(args.url_list))
+    plan = ExtractionPlan(args.fields or RECORD_FIELDS)
+    sinks = build_sinks(out_dir, args.pdf, args.html, args.records, build_print_options(args), args.parser, plan)
+    refresh = None
+    if args.refresh or args.store:
+        from oed_refresh import RefreshSink
+        refresh = RefreshSink(sinks.pop())  # the RecordsSink is always last
+        sinks.append(refresh)
+    metrics = RunMetrics(args.metrics or os.path.join(out_dir, "metrics.jsonl"), tool="oed scrape")
+    scrape(urls, sinks, headless=not args.visible, workers=args.workers, chromedriver=args.chromedriver,
+           metrics=metrics)
+    metrics.print_summary()
+    if hasattr(urls, "summary"):
+        print(urls.summary())
+    if refresh:
+        refresh.print_summary()
+    if args.store and refresh.changed_files:
+        from corpus_store import MANIFEST, compact, update_store
+        if os.path.exists(os.path.join(args.store, MANIFEST)):
+            update_store(args.store, refresh.changed_files, headwords=refresh.replaced_headwords)
+        else:
+            compact([refresh.records.out_dir], args.store)
+    print(f"🏁 Done. Outputs in {out_dir}")
+
+
+def cmd_pdf(args):
+    from oed_scrape import download_pdfs
+    from oed_metrics import RunMetrics
+
+    urls = load_urls(args.url_list)
+    metrics = RunMetrics(args.metrics or os.path.join(args.out, "metrics.jsonl"), tool="oed pdf")
+    download_pdfs(urls, args.out, build_print_options(args), workers=args.workers, chromedriver=args.chromedriver,
+                  metrics=metrics)
+    metrics.print_summary()
+    print(f"🏁 All tasks complete. PDFs saved in: {args.out}")
+
+
+def find_pdfs(paths):
+    pdfs = []
+    for path in paths:
+        if os.path.isdir(path):
+            pdfs += sorted(os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith(".pdf"))
+        else:
+            pdfs.append(path)
+    return pdfs
+
+
+def cmd_ocr(args):
+    from ocr_pipeline import run_ocr_batch, DEFAULT_CACHE_DIR
+    from oed_metrics import RunMetrics
+
+    pdfs = find_pdfs(args.pdfs)
+    if not pdfs:
+        sys.exit("❌ No PDF files found.")
+    os.makedirs(args.out, exist_ok=True)
+    failed = []
+    metrics = RunMetrics(args.metrics or os.path.join(args.out, "ocr-metrics.jsonl"), tool="oed ocr")
+    run_ocr_batch(
+        pdfs, args.out, dpi=args.dpi, lang=args.lang, workers=args.workers,
+        on_file=lambda path, output: print(f"  ✅ {output}") if output else failed.append(path),
+        skip_text_pages=not args.ocr_all_pages,
+        cache_dir=None if args.no_cache else (args.cache_dir or DEFAULT_CACHE_DIR),
+        engine=args.engine, preprocess=args.preprocess, metrics=metrics,
+    )
+    metrics.print_summary(unit="pages")
+    print(f"🏁 OCR finished: {len(pdfs) - len(failed)} of {len(pdfs)} file(s) saved to {args.out}")
+    if failed:
+        sys.exit(1)
+
+
+def cmd_dedup(args):
+    from oed_dedup import find_files, deduplicate_files
+
+    files = find_files(args.path, args.format)
+    if not files:
+        sys.exit(f"No {args.format} files found.")
+    done = deduplicate_files(files, args.format, on_error=lambda file, e: print(f"❌ Failed on {file}: {e}"))
+    print(f"Deduplication completed on {done} file(s).")
+    if done < len(files):
+        sys.exit(1)
+
+
+def cmd_search(args):
+    import oed_search
+
+    if not os.path.exists(args.path):
+        sys.exit(f"❌ {args.path} does not exist.")
+    export_format = EXPORT_EXTENSIONS.get(os.path.splitext(args.out)[1].lower())
+    from corpus_store import MANIFEST
+    dated = args.from_year is not None or args.to_year is not None
+    is_store = os.path.exists(os.path.join(args.path, MANIFEST))
+    if args.terms and (is_store or os.path.isfile(args.path)):
+        sys.exit("❌ --terms searches a folder of scraped files.")
+    if not args.terms and args.pattern is None:
+        sys.exit("❌ Give a pattern, or a term list with --terms.")
+    if is_store:
+        # A corpus store: quotations matching the pattern, or with words within
+        # --fuzzy edits of its words; --from/--to pick the rows before any matching
+        if export_format not in ("Excel", "XML"):
+            sys.exit("❌ Store search writes .xlsx or .xml.")
+        rows = None
+        if dated:
+            from corpus_dates import open_dates
+            dates = open_dates(args.path)
+            rows = dates.rows(args.from_year, args.to_year, args.date_field, not args.exact_dates)
+            print(f"📅 {len(rows)} of {len(dates.locations)} rows in the period")
+        if args.fuzzy is not None:
+            from corpus_fuzzy import QUOTATION_COLUMN, open_index, highlight
+            index = open_index(args.path)
+            columns = [index.store.schema.index(c) for c in ("Headword", "Quotation Date", QUOTATION_COLUMN, "Citation")]
+            results = [(row[columns[0]], row[columns[1]], highlight(row[columns[2]], terms), row[columns[3]])
+                       for row, terms in index.search(args.pattern, args.fuzzy, rows=rows)]
+        else:
+            from corpus_store import CorpusStore
+            store = dates.store if dated else CorpusStore(args.path)
+            source = dates.iter_rows(rows) if dated else store.iter_rows()
+            results = oed_search.search_store_rows(source, store.schema, args.pattern, args.case_sensitive)
+        count = len(results)
+        if results:
+            oed_search.write_context_results(results, args.out, export_format)
+    elif args.fuzzy is not None or dated:
+        sys.exit("❌ --fuzzy and --from/--to search a corpus store (oed.py export).")
+    elif os.path.isfile(args.path):
+        # One file: matches with their headword and neighbouring cells
+        if export_format not in ("Excel", "XML"):
+            sys.exit("❌ Single-file search writes .xlsx or .xml.")
+        results = oed_search.search_context(args.path, args.pattern, args.case_sensitive, not args.keep_duplicates)
+        if results is None:
+            sys.exit(1)
+        count = len(results)
+        if results:
+            oed_search.write_context_results(results, args.out, export_format)
+    else:
+        # A folder: every matching cell/element across the files in it
+        if export_format is None:
+            sys.exit("❌ Folder search writes .csv, .xlsx or .xml.")
+        config = oed_search.default_config(
+            folder=args.path, query=args.pattern, column=args.column,
+            search_all=args.column is None, case_insensitive=not args.case_sensitive,
+            export_format=export_format,
+            **{f"only_{name}": name in (args.types or []) for name in SEARCH_FILE_TYPES})
+        files = oed_search.find_search_files(config)
+        if not files:
+            sys.exit("❌ No files matching the selected types were found.")
+        if args.terms:
+            # Every term of the list in one pass, hits tagged by term
+            from oed_terms import TermMatcher, read_terms
+            try:
+                matcher = TermMatcher(read_terms(args.terms), args.case_sensitive, args.whole_words)
+            except ValueError as e:
+                sys.exit(f"❌ {e}")
+            output, totals = oed_search.search_files_batch(files, config, matcher)
+            found = sum(1 for occurrences, _, _ in totals.values() if occurrences)
+            print(f"🔎 {found} of {len(totals)} terms found ({matcher.engine} matcher)")
+            if output:
+                oed_search.write_batch_results(output, totals, args.out, export_format)
+        else:
+            output = oed_search.search_files(files, config)
+            if output:
+                oed_search.write_folder_results(output, args.out, export_format)
+        count = len(output)
+
+    if count:
+        print(f"{count} match(es) saved to {args.out}")
+    else:
+        print("No matches found.")
+
+
+def cmd_export(args):
+    if args.format == "store":
+        from corpus_store import compact
+        compact(args.sources, args.out, workers=args.workers, rows_per_shard=args.rows_per_shard)
+        return
+
+    # One combined file from a store directory or from scraped files
+    from corpus_store import SCHEMA, MANIFEST, CorpusStore, find_source_files, normalise_file
+    from oed_model import entries_from_rows, row_count
+    from oed_sinks import RECORD_WRITERS
+
+    def rows():
+        for source in args.sources:
+            if os.path.exists(os.path.join(source, MANIFEST)):
+                yield from CorpusStore(source).iter_rows()
+                continue
+            for path in find_source_files([source]):
+                _, file_rows, error = normalise_file(path)
+                if error:
+                    print(f"  ❌ {path}: {error}")
+                yield from file_rows
+
+    entries = entries_from_rows(rows(), SCHEMA)
+    RECORD_WRITERS[args.format][1](entries, args.out)
+    print(f"💾 {row_count(entries)} rows written to {args.out}")
+
+
+def cmd_serve(args):
+    from oed_server import serve
+    if args.socket or args.port != SEARCH_SERVER_PORT:
+        address = f"unix:{os.path.abspath(args.socket)}" if args.socket else f"127.0.0.1:{args.port}"
+        print(f"Clients find this server with {ADDRESS_VARIABLE}={address}")
+    serve(args.port, args.socket, args.cache, args.preload, file_memory=args.memory * 2**20)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="oed.py", description="Headless OED scraping, OCR, search and cleanup tools")
+    add_profile_argument(parser)
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    scrape = commands.add_parser("scrape", help="Load each URL once and save records, HTML and/or PDF")
+    scrape.add_argument("url_list", help="TXT file with one URL per line")
+    scrape.add_argument("-o", "--out", help="Output folder (default: next to the URL list)")
+    scrape.add_argument("--pdf", action="store_true", help="Save each page as PDF")
+    scrape.add_argument("--html", action="store_true", help="Save the raw HTML snapshot")
+    scrape.add_argument("--records", nargs="*", choices=RECORD_FORMATS,
+                        help="Parsed record formats (default: excel when no other output is chosen)")
+    scrape.add_argument("--follow", type=int, default=0, metavar="DEPTH",
+                        help="Also scrape cross-referenced entries up to this many links away")
+    scrape.add_argument("--budget", type=int, help="At most this many pages, list and cross-references included")
+    scrape.add_argument("--frontier", metavar="FILE",
+                        help="SQLite file for the seen-entry set (default: in memory); entries in it are skipped")
+    scrape.add_argument("--refresh", action="store_true",
+                        help="Only re-parse and re-export entries whose content changed since the last refresh run "
+                             "(fingerprints.jsonl + changelog.jsonl in the records folder)")
+    scrape.add_argument("--store", metavar="DIR",
+                        help="Apply the re-exported files to this corpus store (implies --refresh)")
+    scrape.add_argument("--parser", choices=HTML_PARSERS, default="auto",
+                        help="Record extraction: streaming lxml or BeautifulSoup html.parser (default: lxml if installed)")
+    scrape.add_argument("--fields", nargs="+", choices=RECORD_FIELDS, metavar="FIELD",
+                        help="Record fields to extract; the others are not parsed (quote names with spaces). "
+                             "Default: all")
+    scrape.add_argument("--visible", action="store_true", help="Show the browser window")
+    scrape.add_argument("-w", "--workers", type=int, default=4, help="Threads for parsing and writing")
+    scrape.add_argument("--chromedriver", help="chromedriver binary (default: webdriver-manager download)")
+    scrape.add_argument("--metrics", help="Per-URL stage timings as JSONL (default: <out>/metrics.jsonl)")
+    add_print_arguments(scrape)
+    scrape.set_defaults(func=cmd_scrape)
+
+    pdf = commands.add_parser("pdf", help="Print each URL to PDF with parallel headless browsers")
+    pdf.add_argument("url_list", help="TXT file with one URL per line")
+    pdf.add_argument("-o", "--out", required=True, help="Folder for the PDFs")
+    pdf.add_argument("-w", "--workers", type=int, default=8, help="Browsers running at once")
+    pdf.add_argument("--chromedriver", help="chromedriver binary (default: webdriver-manager download)")
+    pdf.add_argument("--metrics", help="Per-URL stage timings as JSONL (default: <out>/metrics.jsonl)")
+    add_print_arguments(pdf)
+    pdf.set_defaults(func=cmd_pdf)
+
+    ocr = commands.add_parser("ocr", help="Make PDFs searchable with Tesseract")
+    ocr.add_argument("pdfs", nargs="+", help="PDF files or folders of PDFs")
+    ocr.add_argument("-o", "--out", required=True, help="Folder for the searchable PDFs")
+    ocr.add_argument("--lang", default="eng", help="Tesseract language(s), e.g. eng+lat")
+    ocr.add_argument("--dpi", type=int, default=300, help="Render resolution (ignored with --preprocess)")
+    ocr.add_argument("--engine", default="auto", help="auto, tesserocr or tesseract")
+    ocr.add_argument("--preprocess", action="store_true", help="Clean up pages and pick the DPI per page")
+    ocr.add_argument("--ocr-all-pages", action="store_true", help="OCR pages that already have a text layer")
+    ocr.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    ocr.add_argument("--cache-dir", help="Page cache folder (default: ~/.cache/oed-scraper/ocr-pages)")
+    ocr.add_argument("--no-cache", action="store_true", help="Do not reuse or store OCR'd pages")
+    ocr.add_argument("--metrics", help="Per-page stage timings as JSONL (default: <out>/ocr-metrics.jsonl)")
+    ocr.set_defaults(func=cmd_ocr)
+
+    dedup = commands.add_parser("dedup", help="Remove duplicate lines/rows/elements in place")
+    dedup.add_argument("path", help="A file, or a folder searched recursively")
+    dedup.add_argument("--format", choices=DEDUP_FORMATS, default="TXT")
+    dedup.set_defaults(func=cmd_dedup)
+
+    search = commands.add_parser("search", help="Regex search of one file (with context) or a folder (matching cells)")
+    search.add_argument("path", help="A file for context search, a folder searched recursively, or a corpus store")
+    search.add_argument("pattern", nargs="?", help="Regular expression (not needed with --terms)")
+    search.add_argument("--terms", metavar="FILE",
+                        help="Folder search: every term in FILE in one pass, one per line; "
+                             "literal strings, or regular expressions prefixed with re:")
+    search.add_argument("--whole-words", action="store_true", help="--terms: literal terms only match whole words")
+    search.add_argument("-o", "--out", required=True, help="Results file: .xlsx or .xml (file), .csv/.xlsx/.xml (folder)")
+    search.add_argument("--case-sensitive", action="store_true")
+    search.add_argument("--column", help="Folder search: only this column / XML tag (default: every cell)")
+    search.add_argument("--types", nargs="+", choices=SEARCH_FILE_TYPES, help="Folder search: file types to include")
+    search.add_argument("--keep-duplicates", action="store_true", help="File search: keep repeated matches")
+    search.add_argument("--from", dest="from_year", type=int, metavar="YEAR",
+                        help="Corpus store search: only quotations dated from this year on")
+    search.add_argument("--to", dest="to_year", type=int, metavar="YEAR",
+                        help="Corpus store search: only quotations dated up to this year")
+    search.add_argument("--date-field", choices=["quotation", "sense"], default="quotation",
+                        help="Date the period applies to: the quotation date or the sense's date range")
+    search.add_argument("--exact-dates", action="store_true", help="Leave out c./a./? dates")
+    search.add_argument("--fuzzy", type=int, metavar="K",
+                        help="Corpus store search: quotations containing every word of the pattern "
+                             "(not a regex) within K edits, e.g. historical spellings")
+    search.set_defaults(func=cmd_search)
+
+    export = commands.add_parser("export", help="Compact scraped files into a store, or combine them into one file")
+    export.add_argument("sources", nargs="+", help="Scraped folders/files, or store directories")
+    export.add_argument("-o", "--out", required=True, help="Store directory, or the combined output file")
+    export.add_argument("--format", choices=["store"] + RECORD_FORMATS, default="store")
+    export.add_argument("-w", "--workers", type=int, default=None, help="Worker processes for compaction")
+    export.add_argument("--rows-per-shard", type=int, default=50000)
+    export.set_defaults(func=cmd_export)
+
+    serve = commands.add_parser("serve", help="Resident search server for the search UIs (localhost or a Unix socket)")
+    serve.add_argument("--preload", nargs="*", default=[], metavar="PATH",
+                       help="Corpus stores, folders or files to load at start (others load on first query)")
+    serve.add_argument("--port", type=int, default=SEARCH_SERVER_PORT, help="Port on 127.0.0.1")
+    serve.add_argument("--socket", metavar="PATH", help="Listen on this Unix socket instead of a port")
+    serve.add_argument("--cache", type=int, default=128, help="Replies kept in the LRU cache (0 disables it)")
+    serve.add_argument("--memory", type=int, default=1024, metavar="MB",
+                       help="Parsed files kept in memory; the least recently used go first")
+    serve.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    with profiling(args.profile, args.command):
+        args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import os
+import time
+import base64
+from contextlib import nullcontext
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+from oed_print_options import PRINT_OPTIONS
+
+# Browser helpers shared by the scrapers: driver setup, getting an OED entry
+# page into its fully expanded single-page state, and printing it to PDF.
+
+PDF_CHUNK_SIZE = 1024 * 1024  # bytes per IO.read when streaming the PDF out of Chrome
+
+
+def setup_driver(headless=True, chromedriver=None):
+    options = Options()
+    if headless:
+        options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_experimental_option('excludeSwitches', ['enable-logging'])
+    if chromedriver:
+        return webdriver.Chrome(service=Service(chromedriver), options=options)
+    from webdriver_manager.chrome import ChromeDriverManager
+    return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+
+
+def ensure_single_page(driver, log=print):
+    try:
+        button = WebDriverWait(driver, 5).until(
+            EC.element_to_be_clickable((By.ID, "tabbed-view-switch-nontabbed"))
+        )
+        button.click()
+        log("🔁 Switched to Single Page view.")
+    except TimeoutException:
+        log("ℹ️ Already in Single Page view or button not found.")
+
+
+def expand_etymology_show_more(driver, log=print):
+    try:
+        etymology_section = WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.ID, "etymology"))
+        )
+        show_more_button = etymology_section.find_element(By.CLASS_NAME, "quotations-button")
+        if show_more_button.is_displayed():
+            show_more_button.click()
+            log("🔽 Expanded Etymology section.")
+    except Exception:
+        log("ℹ️ 'Show more' not available in Etymology section.")
+
+
+def scroll_to_bottom(driver, pause=1):
+    # Scroll until the page height stops growing so lazy content is loaded
+    last_height = driver.execute_script("return document.body.scrollHeight")
+    while True:
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        time.sleep(pause)
+        new_height = driver.execute_script("return document.body.scrollHeight")
+        if new_height == last_height:
+            break
+        last_height = new_height
+
+
+def load_entry_page(driver, url, log=print, settle=0.5, record=None, etymology=True):
+    # record: optional oed_metrics.ItemMetrics that gets the stage timings;
+    # etymology=False skips the "show more" click when nothing reads it
+    stage = record.stage if record else lambda name: nullcontext()
+    with stage("navigate"):
+        driver.get(url)
+        time.sleep(settle)
+    with stage("single_page"):
+        ensure_single_page(driver, log)
+    if not etymology:
+        return
+    with stage("etymology"):
+        expand_etymology_show_more(driver, log)
+        time.sleep(settle)
+
+
+def print_to_pdf_stream(driver, pdf_filename, print_options=None):
+    # Ask Chrome for a stream handle instead of one base64 string and copy it to
+    # disk chunk by chunk, so only PDF_CHUNK_SIZE bytes are held at a time
+    options = dict(print_options or PRINT_OPTIONS, transferMode="ReturnAsStream")
+    handle = driver.execute_cdp_cmd("Page.printToPDF", options)["stream"]
+    partial = pdf_filename + ".part"
+    try:
+        with open(partial, 'wb') as f:
+            while True:
+                chunk = driver.execute_cdp_cmd("IO.read", {"handle": handle, "size": PDF_CHUNK_SIZE})
+                data = chunk.get("data", "")
+                f.write(base64.b64decode(data) if chunk.get("base64Encoded") else data.encode("latin-1"))
+                if chunk.get("eof"):
+                    break
+    finally:
+        driver.execute_cdp_cmd("IO.close", {"handle": handle})
+    os.replace(partial, pdf_filename)
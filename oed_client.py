@@ -0,0 +1,107 @@
+import os
+import json
+import socket
+import http.client
+
+# Client side of oed_server. The address is "127.0.0.1:<port>" or
+# "unix:<socket path>", taken from OED_SEARCH_SERVER when not given. Paths in
+# requests are resolved here, as the server runs in another directory.
+#
+#   if server_available():
+#       reply = search({"type": "store", "store": "corpus_store", "mode": "fuzzy", "query": "humour", "k": 2})
+#       for hit in reply: ...
+#       reply.summary   # the closing {"done": true, "count": ...} line
+
+DEFAULT_PORT = 8765
+ADDRESS_VARIABLE = "OED_SEARCH_SERVER"
+PATH_KEYS = ("path", "store", "folder", "terms")
+
+
+class ServerError(Exception):
+    pass
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def server_address(address=None):
+    return address or os.environ.get(ADDRESS_VARIABLE) or f"127.0.0.1:{DEFAULT_PORT}"
+
+
+def connect(address=None, timeout=None):
+    address = server_address(address)
+    if address.startswith("unix:"):
+        return UnixHTTPConnection(address[len("unix:"):], timeout)
+    host, _, port = address.rpartition(":")
+    return http.client.HTTPConnection(host, int(port), timeout=timeout)
+
+
+def status(address=None, timeout=0.5):
+    # The server's /status, or None when no server answers
+    try:
+        connection = connect(address, timeout)
+        try:
+            connection.request("GET", "/status")
+            return json.loads(connection.getresponse().read())
+        finally:
+            connection.close()
+    except (OSError, ValueError, http.client.HTTPException):
+        return None
+
+
+def server_available(address=None):
+    return status(address) is not None
+
+
+def _absolute(request):
+    request = dict(request)
+    for key in PATH_KEYS:
+        if isinstance(request.get(key), str):
+            request[key] = os.path.abspath(request[key])
+    if isinstance(request.get("config"), dict):
+        request["config"] = _absolute(request["config"])
+    return request
+
+
+class SearchReply:
+    # The streamed hits; summary is set once they have all been read
+    def __init__(self, connection, response):
+        self.connection = connection
+        self.response = response
+        self.summary = None
+
+    def __iter__(self):
+        try:
+            for line in self.response:
+                item = json.loads(line)
+                if "error" in item:
+                    raise ServerError(item["error"])
+                if item.get("done"):
+                    self.summary = item
+                    return
+                yield item
+            raise ServerError("The search server closed the connection before the end of the reply")
+        finally:
+            self.connection.close()
+
+
+def search(request, address=None, timeout=None):
+    connection = connect(address, timeout)
+    body = json.dumps(_absolute(request)).encode("utf-8")
+    connection.request("POST", "/search", body, {"Content-Type": "application/json"})
+    response = connection.getresponse()
+    if response.status != 200:
+        try:
+            message = json.loads(response.read()).get("error", response.reason)
+        finally:
+            connection.close()
+        raise ServerError(message)
+    return SearchReply(connection, response)
@@ -0,0 +1,78 @@
+import os
+import xml.etree.ElementTree as ET
+
+# In-place deduplication of TXT/CSV/Excel/XML files, shared by Deduper.py and
+# `oed.py dedup`. pandas is only imported for the table formats.
+
+FORMATS = {
+    "TXT": [".txt"],
+    "CSV": [".csv"],
+    "Excel": [".xlsx", ".xls"],
+    "XML": [".xml"]
+}
+
+
+def match_format(filename, file_format):
+    return any(filename.lower().endswith(ext) for ext in FORMATS[file_format])
+
+
+def find_files(path, file_format):
+    # A single file, or every matching file below a folder
+    if os.path.isfile(path):
+        return [path] if match_format(path, file_format) else []
+    files = []
+    for root, _, filenames in os.walk(path):
+        for file in filenames:
+            if match_format(file, file_format):
+                files.append(os.path.join(root, file))
+    return files
+
+
+def deduplicate_file(filepath, file_format):
+    if file_format == "TXT":
+        with open(filepath, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        unique_lines = list(dict.fromkeys(line.strip() for line in lines))
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write("\n".join(unique_lines))
+
+    elif file_format == "CSV":
+        import pandas as pd
+        df = pd.read_csv(filepath)
+        df.drop_duplicates(inplace=True)
+        df.to_csv(filepath, index=False)
+
+    elif file_format == "Excel":
+        import pandas as pd
+        df = pd.read_excel(filepath)
+        df.drop_duplicates(inplace=True)
+        df.to_excel(filepath, index=False)
+
+    elif file_format == "XML":
+        tree = ET.parse(filepath)
+        root = tree.getroot()
+        seen = set()
+        unique_children = []
+
+        for child in root:
+            rep = ET.tostring(child, encoding="unicode")
+            if rep not in seen:
+                seen.add(rep)
+                unique_children.append(child)
+
+        root.clear()
+        root.extend(unique_children)
+        tree.write(filepath, encoding="utf-8", xml_declaration=True)
+
+
+def deduplicate_files(files, file_format, on_error=None):
+    # Returns the number of files processed; on_error(path, exception) per failure
+    success_count = 0
+    for file in files:
+        try:
+            deduplicate_file(file, file_format)
+            success_count += 1
+        except Exception as e:
+            if on_error:
+                on_error(file, e)
+    return success_count
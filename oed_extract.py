@@ -0,0 +1,142 @@
+import re
+from bs4 import BeautifulSoup
+from oed_model import COLUMNS, QUOTATION_COLUMNS, Entry, iter_records
+
+# Structured data from an OED entry page: extract_entries() gives the
+# oed_model Entry > Sense > Quotation objects, extract_records() the flat
+# rows (one per quotation, or one per sense without quotations).
+#
+#   lxml        - streaming pull parser (oed_extract_stream); constant memory,
+#                 much faster. Used whenever lxml is installed.
+#   html.parser - BeautifulSoup tree with the stdlib parser. Fallback.
+
+PARSERS = ["auto", "lxml", "html.parser"]
+
+
+class ExtractionPlan:
+    # The COLUMNS to fill. Lookups for the others never run: no etymology text
+    # (nor the browser's "show more" click), no enumerator/date range/grammar
+    # searches, and no quotation containers when no quotation field is wanted
+    # (one row per sense then). The headword is always read for file names.
+    def __init__(self, fields=COLUMNS):
+        self.fields = frozenset(fields)
+        unknown = self.fields - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        self.etymology = 'Etymology' in self.fields
+        self.meaning = 'Meaning' in self.fields
+        self.quotations = bool(self.fields & set(QUOTATION_COLUMNS))
+
+    def wants(self, field):
+        return field in self.fields
+
+
+FULL_PLAN = ExtractionPlan()
+
+
+def sanitize_filename(filename):
+    return re.sub(r'[<>:"/\\|?*\t\n]', '', filename)
+
+
+def safe_filename(headword):
+    return re.sub(r'[\\/*?:<>|]', "", headword)
+
+
+def _text(element):
+    return element.get_text(strip=True) if element else ''
+
+
+def etymology_text(etymology_section):
+    # .etymology-summary first, then the other parts of .etymology not already in it
+    if not etymology_section:
+        return ''
+    text = ''
+    summary = etymology_section.find(class_='etymology-summary')
+    if summary:
+        text += ' '.join(summary.stripped_strings)
+    other_parts = [
+        tag for tag in etymology_section.find_all(recursive=False)
+        if 'etymology-summary' not in (tag.get('class') or [])
+    ]
+    extra_text = ' '.join(tag.get_text(strip=True, separator=' ') for tag in other_parts)
+    if extra_text and extra_text not in text:
+        text += ' ' + extra_text
+    return text.strip()
+
+
+def lxml_available():
+    try:
+        import lxml.etree  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def resolve_parser(name="auto"):
+    if name == "auto":
+        return "lxml" if lxml_available() else "html.parser"
+    if name not in PARSERS:
+        raise ValueError(f"Unknown HTML parser: {name}")
+    return name
+
+
+def extract_entries(html, url='', parser="auto", plan=None):
+    plan = plan or FULL_PLAN
+    if resolve_parser(parser) == "lxml":
+        from oed_extract_stream import stream_entries
+        return stream_entries(html, url, plan)
+    return soup_entries(html, url, plan)
+
+
+def _previous_text(tag, class_name, wanted):
+    return _text(tag.find_previous(class_=class_name)) if wanted else ''
+
+
+def _child_text(tag, class_name, wanted):
+    return _text(tag.find(class_=class_name)) if wanted else ''
+
+
+def soup_entries(html, url='', plan=FULL_PLAN):
+    soup = BeautifulSoup(html, 'html.parser')
+    entries = {}  # id(headword tag) -> Entry
+
+    # Every sense belongs to the nearest headword before it, so entries with
+    # several headwords do not repeat each other's senses
+    for meaning_entry in soup.find_all(class_='item-content'):
+        headword_tag = meaning_entry.find_previous(class_='headword')
+        entry = entries.get(id(headword_tag))
+        if entry is None:
+            entry = entries[id(headword_tag)] = Entry(
+                _text(headword_tag), url,
+                etymology_text(headword_tag.find_next(class_='etymology')) if headword_tag and plan.etymology else '',
+            )
+
+        definition_element = meaning_entry.find(class_='definition') if plan.meaning else None
+        sense = entry.add_sense(
+            _previous_text(meaning_entry, 'item-enumerator', plan.wants('Item Enumerator')),
+            _previous_text(meaning_entry, 'daterange', plan.wants('Date Range')),
+            _previous_text(meaning_entry, 'grammar', plan.wants('Grammar')),
+            ' '.join(definition_element.stripped_strings) if definition_element else '',
+        )
+
+        quotation_container = meaning_entry.find_next(class_='quotation-container') if plan.quotations else None
+        if quotation_container:
+            for quote in quotation_container.find_all(class_='quotation'):
+                sense.add_quotation(
+                    _child_text(quote, 'quotation-date', plan.wants('Quotation Date')),
+                    _child_text(quote, 'quotation-text', plan.wants('Quotation Text')),
+                    _child_text(quote, 'citation', plan.wants('Citation')),
+                )
+
+    # Pages whose senses could not be found still record the headword
+    if not entries:
+        headword_tag = soup.find(class_='headword')
+        if headword_tag:
+            etymology = etymology_text(headword_tag.find_next(class_='etymology')) if plan.etymology else ''
+            entries[id(headword_tag)] = Entry(_text(headword_tag), url, etymology)
+    return list(entries.values())
+
+
+def extract_records(html, url='', parser="auto", plan=None):
+    # One dict per quotation (or per sense without quotations)
+    return list(iter_records(extract_entries(html, url, parser, plan)))
@@ -0,0 +1,192 @@
+from lxml import etree
+from oed_model import Entry, Quotation, shared
+
+# Streaming lxml backend for oed_extract.extract_entries(). The page is fed to
+# an HTMLPullParser in chunks and handled as start/end events in document
+# order, so no full tree is kept: an element that has ended is cleared (with
+# its earlier siblings) unless an enclosing element still needs its subtree.
+# Only the elements read as a whole (headword, etymology, definition,
+# quotation, enumerator/daterange/grammar) are held while open, which keeps
+# peak memory at roughly one quotation or etymology however large the entry.
+#
+# Mirrors the BeautifulSoup lookups in oed_extract:
+#   find_previous(headword / item-enumerator / daterange / grammar)
+#       -> the last such element seen before the item-content starts
+#   headword.find_next(etymology), item-content.find_next(quotation-container)
+#       -> the next one to start; until then the entry/sense waits for it
+
+CHUNK = 1 << 16  # characters (or bytes) fed to the parser at a time
+CAPTURE = {'headword', 'etymology', 'item-enumerator', 'daterange', 'grammar', 'definition', 'quotation'}
+PREVIOUS = ('item-enumerator', 'daterange', 'grammar')
+FIELDS = {'etymology': 'Etymology', 'item-enumerator': 'Item Enumerator', 'daterange': 'Date Range',
+          'grammar': 'Grammar', 'definition': 'Meaning'}
+
+
+def _classes(element):
+    return set(element.get('class', '').split()) if isinstance(element.tag, str) else set()
+
+
+def _strings(element):
+    for string in element.itertext():
+        string = string.strip()
+        if string:
+            yield string
+
+
+def _text(element):
+    # get_text(strip=True)
+    return ''.join(_strings(element)) if element is not None else ''
+
+
+def _find(element, name):
+    for child in element.iterdescendants():
+        if name in _classes(child):
+            return child
+    return None
+
+
+def _etymology_text(element):
+    # Same as oed_extract.etymology_text on a BeautifulSoup tag
+    text = ''
+    summary = _find(element, 'etymology-summary')
+    if summary is not None:
+        text += ' '.join(_strings(summary))
+    other_parts = [child for child in element
+                   if isinstance(child.tag, str) and 'etymology-summary' not in _classes(child)]
+    extra_text = ' '.join(' '.join(_strings(child)) for child in other_parts)
+    if extra_text and extra_text not in text:
+        text += ' ' + extra_text
+    return text.strip()
+
+
+class _EntryStream:
+    def __init__(self, url, plan):
+        # Elements for fields outside the plan are neither held nor read
+        self.url = url
+        self.plan = plan
+        self.capture = {name for name in CAPTURE if name not in FIELDS or plan.wants(FIELDS[name])}
+        if not plan.quotations:
+            self.capture.discard('quotation')
+        self.entries = []             # entries with senses, in the order of their first sense
+        self.listed = set()           # ids of the entries above
+        self.first_headword = None    # recorded on its own when no sense is found
+        self.headword = None          # entry of the last headword started
+        self.orphan = None            # entry for senses before any headword
+        self.awaiting_etymology = []  # entries whose next etymology has not started yet
+        self.etymologies = []         # open etymology elements: [element, entries]
+        self.previous = dict.fromkeys(PREVIOUS, '')
+        self.senses = []              # open item-content elements: [element, sense, has definition]
+        self.pending = []             # senses whose next quotation container has not started yet
+        self.containers = []          # open quotation containers: [element, senses]
+        self.captures = 0             # open elements whose subtree is still needed
+
+    def start(self, element):
+        classes = _classes(element)
+        if not classes:
+            return
+        if classes & self.capture:
+            self.captures += 1
+        if 'headword' in classes:
+            self.headword = Entry('', self.url)
+            self.awaiting_etymology.append(self.headword)
+            if self.first_headword is None:
+                self.first_headword = self.headword
+        if 'etymology' in classes and self.plan.etymology:
+            self.etymologies.append([element, self.awaiting_etymology])
+            self.awaiting_etymology = []
+        if 'item-content' in classes:
+            entry = self.headword
+            if entry is None:
+                entry = self.orphan = self.orphan or Entry('', self.url)
+            if id(entry) not in self.listed:
+                self.listed.add(id(entry))
+                self.entries.append(entry)
+            sense = entry.add_sense(*(self.previous[name] for name in PREVIOUS))
+            self.senses.append([element, sense, False])
+            self.pending.append(sense)
+        if 'quotation-container' in classes and self.plan.quotations:
+            self.containers.append([element, self.pending])
+            self.pending = []
+
+    def end(self, element):
+        classes = _classes(element)
+        if 'headword' in classes and self.headword is not None:
+            self.headword.headword = shared(_text(element))
+        if 'etymology' in classes and self.plan.etymology:
+            _, entries = self._pop(self.etymologies, element)
+            text = _etymology_text(element)
+            for entry in entries:
+                entry.etymology = text
+        for name in PREVIOUS:
+            if name in classes and name in self.capture:
+                self.previous[name] = _text(element)
+        if 'definition' in classes and self.plan.meaning:
+            meaning = ' '.join(_strings(element))
+            for open_sense in self.senses:
+                if not open_sense[2]:
+                    open_sense[1].meaning, open_sense[2] = meaning, True
+        if 'quotation' in classes and self.containers:
+            wants = self.plan.wants
+            quote = Quotation(_text(_find(element, 'quotation-date')) if wants('Quotation Date') else '',
+                              _text(_find(element, 'quotation-text')) if wants('Quotation Text') else '',
+                              _text(_find(element, 'citation')) if wants('Citation') else '')
+            for _, senses in self.containers:
+                for sense in senses:
+                    sense.quotations.append(quote)
+        if 'item-content' in classes:
+            self._pop(self.senses, element)
+        if 'quotation-container' in classes:
+            self._pop(self.containers, element)
+
+        if classes & self.capture:
+            self.captures -= 1
+        if not self.captures:
+            element.clear()
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+
+    @staticmethod
+    def _pop(stack, element):
+        for n in range(len(stack) - 1, -1, -1):
+            if stack[n][0] is element:
+                return stack.pop(n)
+        return [element, []]
+
+    def finish(self):
+        # Pages whose senses could not be found still record the headword
+        if not self.entries and self.first_headword is not None:
+            return [self.first_headword]
+        return self.entries
+
+
+def _chunks(source, chunk_size):
+    if isinstance(source, (str, bytes)):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+    else:
+        # An open file
+        for chunk in iter(lambda: source.read(chunk_size), source.read(0)):
+            yield chunk
+
+
+def stream_entries(source, url='', plan=None, chunk_size=CHUNK):
+    # source: the page HTML (str/bytes) or an open file; plan: oed_extract.ExtractionPlan
+    from oed_extract import FULL_PLAN
+    parser = etree.HTMLPullParser(events=('start', 'end'))
+    stream = _EntryStream(url, plan or FULL_PLAN)
+
+    def handle():
+        for event, element in parser.read_events():
+            if event == 'start':
+                stream.start(element)
+            else:
+                stream.end(element)
+
+    for chunk in _chunks(source, chunk_size):
+        parser.feed(chunk)
+        handle()
+    parser.close()
+    handle()
+    return stream.finish()
@@ -0,0 +1,242 @@
+import re
+import math
+import heapq
+import sqlite3
+import hashlib
+import threading
+from html import unescape
+from urllib.parse import urlsplit, urljoin, unquote
+
+# Crawl frontier for the scrape loop. URLs are reduced to a stable entry ID
+# (https://www.oed.com/dictionary/time_n?tab=meaning_and_use#123 and
+# oed.com/dictionary/time_n/ are both "dictionary/time_n") and loaded once,
+# from the first URL seen for it (query and fragment kept for the loader):
+# a scalable Bloom filter answers "never seen" in memory, and only its
+# positives are checked against the exact store (SQLite, in memory or in a
+# file for crawls too large to keep every ID around).
+#
+# With a store file a crawl can resume: an ID is queued there as pending and
+# only marked done once scrape() has loaded and written its page (done()),
+# committed every COMMIT_EVERY pages and when the loop ends, however it
+# ends. A later run skips the done IDs and queues the pending ones again, so
+# interrupted and failed pages are retried.
+#
+# With max_depth > 0, discover() queues the cross-reference links of each
+# loaded page one level deeper, in priority order (depth, then discovery
+# order) and up to the page budget. scrape() calls it when given a Frontier.
+#
+#   frontier = Frontier(read_url_list(path, dedupe=False), max_depth=1, budget=500)
+#   scrape(frontier, sinks)
+
+COMMIT_EVERY = 50
+_ENTRY_PATH = re.compile(r'^/(dictionary|view/entry)/([^/]+)', re.I)
+_ANCHOR = re.compile(r'<a\b[^>]*>', re.I)
+_CLASS = re.compile(r'\bclass\s*=\s*["\']([^"\']*)["\']', re.I)
+_HREF = re.compile(r'\bhref\s*=\s*["\']([^"\']*)["\']', re.I)
+_XREF_CLASS = re.compile(r'cross-?ref|xref', re.I)
+
+
+def entry_id(url):
+    # "dictionary/<slug>" or "view/Entry/<number>" for OED entry URLs, else
+    # the URL without scheme, fragment and trailing slash
+    parts = urlsplit(url.strip() if '://' in url else 'https://' + url.strip())
+    host = parts.netloc.lower()
+    match = _ENTRY_PATH.match(unquote(parts.path))
+    if host.endswith('oed.com') and match:
+        kind = 'dictionary' if match.group(1).lower() == 'dictionary' else 'view/Entry'
+        return f"{kind}/{match.group(2)}"
+    path = parts.path.rstrip('/')
+    return f"{host}{path}" + (f"?{parts.query}" if parts.query else '')
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, key):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def add(self, key):
+        for p in self._positions(key):
+            self.bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+
+class ScalableBloomFilter:
+    # A new, larger filter with a tighter error rate each time the current one
+    # is full, so the overall false-positive rate stays under error_rate
+    def __init__(self, capacity=10000, error_rate=0.001, growth=2, tightening=0.5):
+        self.growth = growth
+        self.tightening = tightening
+        self.filters = [BloomFilter(capacity, error_rate * (1 - tightening))]
+
+    def __contains__(self, key):
+        return any(key in f for f in self.filters)
+
+    def add(self, key):
+        current = self.filters[-1]
+        if current.count >= current.capacity:
+            current = BloomFilter(current.capacity * self.growth, current.error_rate * self.tightening)
+            self.filters.append(current)
+        current.add(key)
+
+    def __len__(self):
+        return sum(f.count for f in self.filters)
+
+
+class SeenStore:
+    # Exact set of entry IDs, each pending or done; path=None keeps it in
+    # memory. Written from the scrape loop and the output threads.
+    def __init__(self, path=None):
+        self.db = sqlite3.connect(path or ':memory:', check_same_thread=False)
+        self.lock = threading.Lock()
+        self.db.execute("CREATE TABLE IF NOT EXISTS seen (id TEXT PRIMARY KEY, url TEXT, depth INTEGER, "
+                        "done INTEGER NOT NULL DEFAULT 0)")
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(seen)")]
+        if "done" not in columns:
+            # Files from before pages were marked done: their IDs were all crawled
+            self.db.execute("ALTER TABLE seen ADD COLUMN done INTEGER NOT NULL DEFAULT 1")
+            self.db.commit()
+
+    def __contains__(self, key):
+        with self.lock:
+            return self.db.execute("SELECT 1 FROM seen WHERE id = ?", (key,)).fetchone() is not None
+
+    def add(self, key, url, depth):
+        with self.lock:
+            self.db.execute("INSERT OR IGNORE INTO seen (id, url, depth) VALUES (?, ?, ?)", (key, url, depth))
+
+    def mark_done(self, key):
+        with self.lock:
+            self.db.execute("UPDATE seen SET done = 1 WHERE id = ?", (key,))
+
+    def ids(self):
+        with self.lock:
+            return [row[0] for row in self.db.execute("SELECT id FROM seen WHERE done = 1")]
+
+    def pending(self):
+        # (id, url, depth) of the IDs queued by an earlier run but never done
+        with self.lock:
+            return self.db.execute("SELECT id, url, depth FROM seen WHERE done = 0 ORDER BY rowid").fetchall()
+
+    def commit(self):
+        with self.lock:
+            self.db.commit()
+
+
+def cross_references(html, base_url):
+    # Links of anchors whose class marks a cross-reference, as absolute URLs
+    for tag in _ANCHOR.findall(html):
+        css, href = _CLASS.search(tag), _HREF.search(tag)
+        if css and href and _XREF_CLASS.search(css.group(1)):
+            yield urljoin(base_url, unescape(href.group(1)))
+
+
+class Frontier:
+    def __init__(self, urls=(), max_depth=0, budget=None, store_path=None, commit_every=COMMIT_EVERY):
+        self.max_depth = max_depth
+        self.budget = budget
+        self.commit_every = commit_every
+        self.lock = threading.Lock()  # done() comes from the output threads
+        self.bloom = ScalableBloomFilter()
+        self.store = SeenStore(store_path)
+        for key in self.store.ids():
+            self.bloom.add(key)
+        self.queue = []  # (depth, order, url)
+        self.order = 0
+        self.depths = {}  # URL -> depth, for the queued/loading pages
+        self.scheduled = 0
+        self.resumed = 0
+        self.completed = 0
+        self.duplicates = 0
+        self.discovered = 0
+        self.over_budget = 0
+        for key, url, depth in self.store.pending():
+            if depth <= max_depth:
+                self.bloom.add(key)
+                self.resumed += self._schedule(key, url, depth)
+        for url in urls:
+            self.add(url)
+
+    def seen(self, key):
+        # The Bloom filter rules out most new IDs without touching the store
+        return key in self.bloom and key in self.store
+
+    def add(self, url, depth=0):
+        key = entry_id(url)
+        if self.seen(key):
+            self.duplicates += 1
+            return False
+        url = url.strip()
+        self.bloom.add(key)
+        self.store.add(key, url, depth)
+        return self._schedule(key, url, depth)
+
+    def _schedule(self, key, url, depth):
+        if self.budget is not None and self.scheduled >= self.budget:
+            # Left pending in the store for a later run
+            self.over_budget += 1
+            return False
+        heapq.heappush(self.queue, (depth, self.order, url))
+        self.order += 1
+        self.scheduled += 1
+        self.depths[url] = depth
+        return True
+
+    def discover(self, url, html):
+        # Queues the page's cross-references one level deeper
+        depth = self.depths.get(url, 0)
+        if depth >= self.max_depth:
+            return 0
+        added = sum(self.add(link, depth + 1) for link in cross_references(html, url))
+        self.discovered += added
+        return added
+
+    def done(self, url):
+        # Called once the page is scraped and written; until then the ID stays
+        # pending and a later run retries it
+        self.store.mark_done(entry_id(url))
+        with self.lock:
+            self.depths.pop(url, None)
+            self.completed += 1
+            if self.completed % self.commit_every == 0:
+                self.store.commit()
+
+    def commit(self):
+        self.store.commit()
+
+    def __iter__(self):
+        try:
+            while self.queue:
+                yield heapq.heappop(self.queue)[2]
+        finally:
+            self.commit()
+
+    def __len__(self):
+        return self.scheduled
+
+    def summary(self):
+        text = (f"🔗 {self.scheduled} unique entries scheduled ({self.discovered} from cross-references"
+                + (f", {self.resumed} resumed" if self.resumed else "") + "), "
+                f"{self.duplicates} duplicate URL(s) skipped")
+        if self.completed:
+            text += f", {self.completed} done"
+        if self.over_budget:
+            text += f", {self.over_budget} over the budget of {self.budget} not scheduled"
+        return text
+
+
+def unique_urls(urls):
+    # The first URL of each entry, in the original order
+    return list(Frontier(urls))
@@ -0,0 +1,140 @@
+import os
+import json
+import math
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from oed_profile import stage as profile_stage
+
+# Per-item stage timings for the scrapers and PDF-OCR. Every URL (or OCR page)
+# gets one JSON line with monotonic stage durations, byte/sense/quotation
+# counts and retries; the run ends with a percentile summary.
+#
+#   metrics = RunMetrics("metrics.jsonl", tool="oed-scraper-pdf")
+#   record = metrics.record(url)
+#   with record.stage("navigate"):
+#       driver.get(url)
+#   record.add(bytes=len(html))
+#   metrics.finish(record)
+#   metrics.print_summary()
+
+
+class ItemMetrics:
+    def __init__(self, item):
+        self.item = item
+        self.stages = {}
+        self.counts = {}
+        self.retries = 0
+        self.started = time.monotonic()
+        self.wall_started = time.time()
+
+    @contextmanager
+    def stage(self, name):
+        # Also tags profiler samples (oed_profile) taken inside the stage
+        started = time.monotonic()
+        try:
+            with profile_stage(name):
+                yield
+        finally:
+            self.add_stage(name, time.monotonic() - started)
+
+    def add_stage(self, name, seconds):
+        # Repeated stages (retries, several files) add up
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add(self, **counts):
+        for key, value in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + value
+
+
+class RunMetrics:
+    def __init__(self, path=None, tool=""):
+        # path=None keeps everything in memory (summary only)
+        self.path = path
+        self.tool = tool
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started = time.monotonic()
+        self.finished = []
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def record(self, item):
+        return ItemMetrics(item)
+
+    def finish(self, record, ok=True, error=None, **extra):
+        line = {
+            "run": self.run_id,
+            "tool": self.tool,
+            "item": record.item,
+            "started": round(record.wall_started, 3),
+            "total": time.monotonic() - record.started,
+            "ok": ok,
+            "error": error,
+            "retries": record.retries,
+            "stages": dict(record.stages),
+            **record.counts,
+            **extra,
+        }
+        with self._lock:
+            self.finished.append(line)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        return line
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started
+        with self._lock:
+            lines = list(self.finished)
+        stage_names = []
+        for line in lines:
+            stage_names += [name for name in line["stages"] if name not in stage_names]
+        return {
+            "run": self.run_id,
+            "tool": self.tool,
+            "items": len(lines),
+            "failed": sum(1 for line in lines if not line["ok"]),
+            "retries": sum(line["retries"] for line in lines),
+            "elapsed": elapsed,
+            "per_minute": len(lines) / elapsed * 60 if elapsed else 0.0,
+            "total": percentiles([line["total"] for line in lines]),
+            "stages": {name: percentiles([line["stages"][name] for line in lines if name in line["stages"]])
+                       for name in stage_names},
+        }
+
+    def print_summary(self, log=print, unit="URLs"):
+        s = self.summary()
+        if not s["items"]:
+            return s
+        log(f"📊 {s['items']} {unit} in {s['elapsed']:.1f}s ({s['per_minute']:.1f} {unit}/min), "
+            f"{s['failed']} failed, {s['retries']} retries")
+        log(f"   {'stage':<14} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'sum':>9}")
+        for name, p in list(s["stages"].items()) + [("total", s["total"])]:
+            log(f"   {name:<14} {p['p50']:>8.2f} {p['p90']:>8.2f} {p['p99']:>8.2f} {p['max']:>8.2f} {p['sum']:>9.1f}")
+        if self.path:
+            log(f"   per-item metrics: {self.path}")
+        return s
+
+
+def percentile(sorted_values, q):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values), math.ceil(q / 100 * len(sorted_values))) - 1)
+    return sorted_values[rank]
+
+
+def percentiles(values):
+    values = sorted(values)
+    return {"p50": percentile(values, 50), "p90": percentile(values, 90), "p99": percentile(values, 99),
+            "max": values[-1] if values else 0.0, "sum": sum(values)}
+
+
+def load_metrics(path, run=None):
+    # The JSON lines of one run (default: the last one in the file)
+    with open(path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    run = run or (lines[-1]["run"] if lines else None)
+    return [line for line in lines if line["run"] == run]
@@ -0,0 +1,118 @@
+import sys
+
+# Normalised in-memory form of a scraped OED page: Entry > Sense > Quotation.
+# Entry and sense fields are held once and shared by reference instead of
+# being copied into every quotation row; short values that repeat across
+# senses and pages (URL, headword, enumerator, date range, grammar, quotation
+# date) are interned. Flat rows are only built while a writer consumes them
+# (iter_rows / iter_records). No back-references, so finished pages are freed
+# by reference counting without waiting for the cycle collector.
+
+COLUMNS = ['Headword', 'URL', 'Etymology', 'Item Enumerator', 'Date Range', 'Grammar',
+           'Meaning', 'Quotation Date', 'Quotation Text', 'Citation']
+SENSE_COLUMNS = COLUMNS[3:7]
+QUOTATION_COLUMNS = COLUMNS[7:]
+
+
+def shared(value):
+    return sys.intern(value) if isinstance(value, str) else (value or '')
+
+
+class Quotation:
+    __slots__ = ('date', 'text', 'citation')
+
+    def __init__(self, date='', text='', citation=''):
+        self.date = shared(date)
+        self.text = text
+        self.citation = citation
+
+
+class Sense:
+    __slots__ = ('enumerator', 'daterange', 'grammar', 'meaning', 'quotations')
+
+    def __init__(self, enumerator='', daterange='', grammar='', meaning=''):
+        self.enumerator = shared(enumerator)
+        self.daterange = shared(daterange)
+        self.grammar = shared(grammar)
+        self.meaning = meaning
+        self.quotations = []
+
+    def add_quotation(self, date='', text='', citation=''):
+        self.quotations.append(Quotation(date, text, citation))
+
+
+class Entry:
+    __slots__ = ('headword', 'url', 'etymology', 'senses')
+
+    def __init__(self, headword='', url='', etymology=''):
+        self.headword = shared(headword)
+        self.url = shared(url)
+        self.etymology = etymology
+        self.senses = []
+
+    def add_sense(self, enumerator='', daterange='', grammar='', meaning=''):
+        sense = Sense(enumerator, daterange, grammar, meaning)
+        self.senses.append(sense)
+        return sense
+
+
+# Entries without senses and senses without quotations still give one row
+_NO_SENSE = (Sense(),)
+_NO_QUOTATION = (Quotation(),)
+
+
+def iter_rows(entries, columns=COLUMNS, blank=()):
+    # One tuple per quotation in `columns` order; the strings are the model's own.
+    # blank: COLUMNS written empty (the headword and URL are always in the
+    # model, as file names and the refresh state need them)
+    picks = None if columns is COLUMNS or list(columns) == COLUMNS else [COLUMNS.index(c) for c in columns]
+    blanks = [COLUMNS.index(c) for c in blank]
+    for entry in entries:
+        for sense in entry.senses or _NO_SENSE:
+            for quote in sense.quotations or _NO_QUOTATION:
+                row = (entry.headword, entry.url, entry.etymology,
+                       sense.enumerator, sense.daterange, sense.grammar, sense.meaning,
+                       quote.date, quote.text, quote.citation)
+                if blanks:
+                    row = list(row)
+                    for i in blanks:
+                        row[i] = ''
+                yield row if picks is None else tuple(row[i] for i in picks)
+
+
+def iter_records(entries):
+    # The old row dicts, for callers that want them
+    for row in iter_rows(entries):
+        yield dict(zip(COLUMNS, row))
+
+
+def row_count(entries):
+    return sum(max(1, len(sense.quotations)) for entry in entries for sense in entry.senses or _NO_SENSE)
+
+
+def counts(entries):
+    # Senses and quotations, for the run metrics
+    return {'senses': sum(len(entry.senses) for entry in entries),
+            'quotations': sum(len(sense.quotations) for entry in entries for sense in entry.senses)}
+
+
+def entries_from_rows(rows, columns=COLUMNS):
+    # Regroups flat rows (store rows, re-read exports) into entries; consecutive
+    # rows with the same entry and sense fields share one Entry and Sense
+    index = {column: columns.index(column) for column in COLUMNS}
+    entries = []
+    entry = sense = None
+    for row in rows:
+        h, u, e = row[index['Headword']], row[index['URL']], row[index['Etymology']]
+        if entry is None or (entry.headword, entry.url, entry.etymology) != (h, u, e):
+            entry, sense = Entry(h, u, e), None
+            entries.append(entry)
+        sense_fields = tuple(row[index[c]] for c in SENSE_COLUMNS)
+        quote_fields = tuple(row[index[c]] for c in QUOTATION_COLUMNS)
+        if not any(sense_fields) and not any(quote_fields):
+            continue
+        if sense is None or (sense.enumerator, sense.daterange, sense.grammar, sense.meaning) != sense_fields:
+            sense = entry.add_sense(*sense_fields)
+        if any(quote_fields):
+            sense.add_quotation(*quote_fields)
+    return entries
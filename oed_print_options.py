@@ -0,0 +1,32 @@
+# Page.printToPDF options (margins in inches) and their command-line flags.
+# Kept free of selenium so the CLI can build its parser without loading it.
+
+PAPER_SIZES = {"letter": (8.5, 11), "a4": (8.27, 11.69), "legal": (8.5, 14)}
+PRINT_OPTIONS = {
+    "printBackground": True,
+    "displayHeaderFooter": False,
+    "scale": 1.0,
+    "paperWidth": 8.5,
+    "paperHeight": 11,
+    "marginTop": 0.4,
+    "marginBottom": 0.4,
+    "marginLeft": 0.4,
+    "marginRight": 0.4,
+}
+
+
+def add_print_arguments(parser):
+    parser.add_argument("--scale", type=float, default=PRINT_OPTIONS["scale"], help="Print scale, 0.1-2.0")
+    parser.add_argument("--paper", choices=list(PAPER_SIZES), default="letter")
+    parser.add_argument("--margin", type=float, default=PRINT_OPTIONS["marginTop"], help="All margins, in inches")
+    parser.add_argument("--header-footer", action="store_true", help="Print Chrome's date/title/URL header and footer")
+    parser.add_argument("--no-background", action="store_true", help="Skip background colours and images")
+
+
+def build_print_options(args):
+    width, height = PAPER_SIZES[args.paper]
+    options = dict(PRINT_OPTIONS, scale=args.scale, paperWidth=width, paperHeight=height,
+                   displayHeaderFooter=args.header_footer, printBackground=not args.no_background)
+    for side in ("marginTop", "marginBottom", "marginLeft", "marginRight"):
+        options[side] = args.margin
+    return options
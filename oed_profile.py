@@ -0,0 +1,224 @@
+import os
+import sys
+import time
+import uuid
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+# On-demand sampling profiler shared by the tools (`--profile DIR` on the
+# command line, a checkbox in the Tk apps). A daemon thread snapshots every
+# thread's stack with sys._current_frames() each INTERVAL seconds; samples are
+# tagged with the stage the sampled thread is in (see stage(); every
+# ItemMetrics.stage() is one, untagged samples count as "other"). Process-pool
+# workers started with worker_init() profile themselves and write their own
+# file when they exit; the parent merges everything when it stops.
+#
+# Output in the profile directory:
+#   <name>-<session>-<pid>.collapsed one process, "stage;thread;frame;...;frame count"
+#   worker-<session>-<pid>.collapsed one pool worker
+#   <name>-combined.collapsed        parent + workers, for flamegraph.pl / speedscope
+#   <name>-top.txt                   top-N self/cumulative hotspots per stage
+
+INTERVAL = 0.005  # seconds between samples
+TOP_N = 25
+ENV_DIR = "OED_PROFILE_DIR"
+ENV_SESSION = "OED_PROFILE_SESSION"
+ENV_INTERVAL = "OED_PROFILE_INTERVAL"
+
+_active = None
+_stages = {}  # thread ident -> current stage name
+
+
+def _label(code):
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    def __init__(self, interval=INTERVAL):
+        self.interval = interval
+        self.pid = os.getpid()
+        self.samples = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="oed-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                stack.append(_stages.get(ident, "other"))
+                self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+@contextmanager
+def stage(name):
+    # Tags the calling thread's samples; free when no profiler is running
+    if _active is None:
+        yield
+        return
+    ident = threading.get_ident()
+    previous = _stages.get(ident)
+    _stages[ident] = name
+    try:
+        yield
+    finally:
+        if previous is None:
+            _stages.pop(ident, None)
+        else:
+            _stages[ident] = previous
+
+
+def is_active():
+    return _active is not None and _active.pid == os.getpid()
+
+
+def read_collapsed(paths):
+    samples = Counter()
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                if stack:
+                    samples[stack] += int(count)
+    return samples
+
+
+def hotspots(samples, top_n=TOP_N):
+    # {stage: (total samples, [(function, self, cumulative)])}
+    per_stage = {}
+    for stack, count in samples.items():
+        frames = stack.split(";")
+        stage_name, functions = frames[0], frames[2:]
+        total, self_counts, cumulative = per_stage.setdefault(stage_name, [0, Counter(), Counter()])
+        per_stage[stage_name][0] = total + count
+        if functions:
+            self_counts[functions[-1]] += count
+            for function in set(functions):
+                cumulative[function] += count
+    table = {}
+    for stage_name, (total, self_counts, cumulative) in per_stage.items():
+        rows = [(function, self_counts[function], cumulative[function])
+                for function, _ in self_counts.most_common(top_n)]
+        table[stage_name] = (total, rows)
+    return table
+
+
+def write_hotspots(samples, path, interval, top_n=TOP_N):
+    table = hotspots(samples, top_n)
+    with open(path, "w", encoding="utf-8") as f:
+        for stage_name, (total, rows) in sorted(table.items(), key=lambda item: -item[1][0]):
+            f.write(f"== {stage_name}: {total} samples (~{total * interval:.2f}s of thread time)\n")
+            f.write(f"{'self':>7} {'self%':>6} {'cum':>7} {'cum%':>6}  function\n")
+            for function, self_count, cum_count in rows:
+                f.write(f"{self_count:>7} {self_count / total:>6.1%} {cum_count:>7} {cum_count / total:>6.1%}  "
+                        f"{function}\n")
+            f.write("\n")
+    return path
+
+
+def start(out_dir, interval=INTERVAL):
+    # Starts profiling this process; child processes inherit the settings
+    global _active
+    os.makedirs(out_dir, exist_ok=True)
+    os.environ[ENV_DIR] = os.path.abspath(out_dir)
+    os.environ[ENV_SESSION] = uuid.uuid4().hex[:8]
+    os.environ[ENV_INTERVAL] = str(interval)
+    _active = SamplingProfiler(interval)
+    _active.start()
+    return _active
+
+
+def stop(name="main", log=print):
+    # Writes this process's stacks, merges the workers' files of the same
+    # session and writes the combined flamegraph input and hotspot table
+    global _active
+    if not is_active():
+        return []
+    profiler, _active = _active, None
+    profiler.stop()
+    out_dir = os.environ.pop(ENV_DIR)
+    session = os.environ.pop(ENV_SESSION)
+    os.environ.pop(ENV_INTERVAL, None)
+
+    own = profiler.write(os.path.join(out_dir, f"{name}-{session}-{profiler.pid}.collapsed"))
+    parts = [own] + [os.path.join(out_dir, f) for f in sorted(os.listdir(out_dir))
+                     if f.startswith(f"worker-{session}-") and f.endswith(".collapsed")]
+    samples = read_collapsed(parts)
+    combined = os.path.join(out_dir, f"{name}-combined.collapsed")
+    with open(combined, "w", encoding="utf-8") as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+    top = write_hotspots(samples, os.path.join(out_dir, f"{name}-top.txt"), profiler.interval)
+    log(f"🔥 Profile: {sum(samples.values())} samples from {len(parts)} process(es) -> {combined}, {top}")
+    return [combined, top]
+
+
+def worker_init(*initializer_and_args):
+    # ProcessPoolExecutor initializer: profiles the worker if the parent is
+    # profiling, and writes its stacks when the worker process exits
+    global _active
+    out_dir = os.environ.get(ENV_DIR)
+    if out_dir and not is_active():
+        from multiprocessing.util import Finalize
+        _stages.clear()
+        _active = SamplingProfiler(float(os.environ.get(ENV_INTERVAL, INTERVAL)))
+        _active.start()
+        path = os.path.join(out_dir, f"worker-{os.environ[ENV_SESSION]}-{os.getpid()}.collapsed")
+        Finalize(None, _stop_worker, args=(path,), exitpriority=100)
+    if initializer_and_args:
+        initializer, *args = initializer_and_args
+        initializer(*args)
+
+
+def _stop_worker(path):
+    global _active
+    if is_active():
+        profiler, _active = _active, None
+        profiler.stop()
+        profiler.write(path)
+
+
+@contextmanager
+def profiling(out_dir, name="main", interval=INTERVAL, log=print):
+    # `with profiling(args.profile, "scrape"):` - a no-op when out_dir is empty
+    if not out_dir:
+        yield
+        return
+    start(out_dir, interval)
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        log(f"⏱️ Profiled {time.monotonic() - started:.1f}s")
+        stop(name, log)
+
+
+def add_profile_argument(parser):
+    parser.add_argument("--profile", metavar="DIR",
+                        help="Sample stacks into DIR (collapsed flamegraph stacks + top hotspots per stage)")
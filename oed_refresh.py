@@ -0,0 +1,217 @@
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import threading
+from collections import Counter
+from contextlib import nullcontext
+
+# Incremental refresh for re-scraped URL lists. RefreshSink wraps a
+# RecordsSink and keeps, per URL, a fingerprint of the page text plus one per
+# sense (and per quotation) from the last scrape:
+#
+#   page text unchanged        -> nothing is parsed or exported
+#   page changed, same records -> only the page fingerprint is updated
+#   records changed            -> re-exported, and a changelog line lists the
+#                                 added/removed/modified senses and quotations
+#
+# Files in the records folder:
+#   fingerprints.jsonl   state, appended to while a run goes and rewritten
+#                        with one line per URL when the next one starts
+#   changelog.jsonl      one line per added/modified entry and run
+#
+# The files exported by a run (changed_files) can then be applied to a corpus
+# store with corpus_store.update_store() instead of compacting everything;
+# replaced_headwords are the headwords those entries had in the last scrape.
+# A re-exported URL keeps its file name while the headword stays the same, so
+# a reordered list overwrites its files; otherwise the old files are deleted.
+
+STATE = "fingerprints.jsonl"
+CHANGELOG = "changelog.jsonl"
+
+_NOISE = re.compile(r'<script\b.*?</script>|<style\b.*?</style>|<!--.*?-->', re.S | re.I)
+_TAGS = re.compile(r'<[^>]+>')
+_SPACE = re.compile(r'\s+')
+_HEADWORD = re.compile(r'<[^>]*class=["\'][^"\']*\bheadword\b')
+
+
+def digest(*parts):
+    h = hashlib.blake2b(digest_size=10)
+    for part in parts:
+        h.update(part.encode('utf-8'))
+        h.update(b'\x1f')
+    return h.hexdigest()
+
+
+def page_fingerprint(html, salt=''):
+    # The page text from the first headword on, without scripts, styles and
+    # markup: a few regex passes, no parse, and blind to markup churn
+    match = _HEADWORD.search(html)
+    body = html[match.start():] if match else html
+    return digest(salt, _SPACE.sub(' ', _TAGS.sub(' ', _NOISE.sub('', body))))
+
+
+def entry_fingerprints(entries):
+    return {entry.headword: digest(entry.url, entry.etymology) for entry in entries}
+
+
+def sense_fingerprints(entries):
+    # {sense key: [sense hash, [quotation hashes]]}. The key is headword +
+    # enumerator (meaning start when unnumbered) with a counter for repeats,
+    # so a renumbered sense shows as removed + added.
+    senses, seen = {}, Counter()
+    for entry in entries:
+        for sense in entry.senses:
+            base = f"{entry.headword}|{sense.enumerator or sense.meaning[:40]}"
+            seen[base] += 1
+            key = base if seen[base] == 1 else f"{base}#{seen[base]}"
+            quotes = [digest(q.date, q.text, q.citation) for q in sense.quotations]
+            senses[key] = [digest(sense.daterange, sense.grammar, sense.meaning, *quotes), quotes]
+    return senses
+
+
+def diff_senses(old, new):
+    added = [key for key in new if key not in old]
+    removed = [key for key in old if key not in new]
+    modified = [key for key in new if key in old and new[key][0] != old[key][0]]
+    quotations_added = sum(len(new[key][1]) for key in added)
+    quotations_removed = sum(len(old[key][1]) for key in removed)
+    for key in modified:
+        before, after = Counter(old[key][1]), Counter(new[key][1])
+        quotations_added += sum((after - before).values())
+        quotations_removed += sum((before - after).values())
+    return {
+        'senses_added': added,
+        'senses_removed': removed,
+        'senses_modified': modified,
+        'quotations_added': quotations_added,
+        'quotations_removed': quotations_removed,
+    }
+
+
+def load_state(path):
+    state = {}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    state[item['url']] = item
+    return state
+
+
+def save_state(path, state):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for item in state.values():
+            f.write(json.dumps(item, ensure_ascii=False) + '\n')
+    os.replace(tmp, path)
+
+
+def file_stem(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def load_changelog(path, run=None):
+    # The lines of one run (default: the last one in the file)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    run = run or (lines[-1]['run'] if lines else None)
+    return [line for line in lines if line['run'] == run]
+
+
+class RefreshSink:
+    needs_browser = False
+
+    def __init__(self, records_sink, state_dir=None):
+        self.records = records_sink
+        self.needs_etymology = records_sink.needs_etymology
+        state_dir = state_dir or records_sink.out_dir
+        os.makedirs(state_dir, exist_ok=True)
+        self.state_path = os.path.join(state_dir, STATE)
+        self.changelog_path = os.path.join(state_dir, CHANGELOG)
+        # Other fields or formats than last time mean a full re-export
+        self.salt = digest(*sorted(records_sink.plan.fields), *records_sink.formats)
+        self.state = load_state(self.state_path)
+        if self.state:
+            save_state(self.state_path, self.state)
+        # file name -> URL, so two URLs never write the same files
+        self.owners = {file_stem(path): url for url, item in self.state.items() for path in item['files']}
+        self.run_id = uuid.uuid4().hex[:12]
+        self.counts = Counter()
+        self.changed_files = []
+        self.replaced_headwords = set()  # what the changed entries were called before
+        self._lock = threading.Lock()
+
+    def write(self, page, record=None):
+        with record.stage("fingerprint") if record else nullcontext():
+            fingerprint = page_fingerprint(page.html, self.salt)
+        previous = self.state.get(page.url)
+        if previous and previous['page'] == fingerprint:
+            with self._lock:
+                self.counts['unchanged'] += 1
+            return []
+
+        entries = self.records.parse(page, record)
+        headwords = entry_fingerprints(entries)
+        senses = sense_fingerprints(entries)
+        changes = diff_senses(previous['senses'] if previous else {}, senses)
+        etymology_changed = bool(previous) and previous['entries'] != headwords
+        changed = previous is None or etymology_changed or any(changes.values())
+
+        if changed:
+            with self._lock:
+                name = self._file_name(page, entries, previous)
+            paths = self.records.write_entries(page, entries, record, name=name)
+        else:
+            paths = previous['files']
+        state = {'url': page.url, 'page': fingerprint, 'entries': headwords, 'senses': senses,
+                 'files': paths, 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        with self._lock:
+            self.state[page.url] = state
+            with open(self.state_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(state, ensure_ascii=False) + '\n')
+            if not changed:
+                self.counts['unchanged'] += 1
+                return []
+            self.counts['added' if previous is None else 'modified'] += 1
+            self.changed_files += paths
+            if previous:
+                self.replaced_headwords.update(previous['entries'])
+                self._remove_stale(page.url, previous['files'], paths)
+            line = {'run': self.run_id, 'time': state['time'], 'url': page.url,
+                    'headwords': list(headwords), 'change': 'added' if previous is None else 'modified',
+                    'etymology_changed': etymology_changed, **changes, 'files': paths}
+            with open(self.changelog_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(line, ensure_ascii=False) + '\n')
+        return paths
+
+    def _file_name(self, page, entries, previous):
+        name = self.records.file_name(page, entries)
+        if previous and previous['files']:
+            old = file_stem(previous['files'][0])
+            if old.rsplit('_', 1)[0] == name.rsplit('_', 1)[0] and self.owners.get(old) == page.url:
+                return old
+        base, n = name, 1
+        while self.owners.get(name, page.url) != page.url:
+            n += 1
+            name = f"{base}-{n}"
+        self.owners[name] = page.url
+        return name
+
+    def _remove_stale(self, url, old_paths, paths):
+        for path in old_paths:
+            if path in paths or self.owners.get(file_stem(path)) != url:
+                continue
+            if os.path.exists(path):
+                os.remove(path)
+            if not any(file_stem(p) == file_stem(path) for p in paths):
+                self.owners.pop(file_stem(path), None)
+
+    def print_summary(self, log=print):
+        log(f"🔁 Refresh: {self.counts['added']} new, {self.counts['modified']} changed, "
+            f"{self.counts['unchanged']} unchanged entries; changes in {self.changelog_path}")
@@ -0,0 +1,150 @@
+import os
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from oed_browser import setup_driver, load_entry_page, print_to_pdf_stream
+from oed_extract import sanitize_filename
+from oed_sinks import PageSnapshot, PdfSink, HtmlSink, RecordsSink
+from oed_metrics import RunMetrics
+from oed_frontier import unique_urls
+
+# Scrape loops shared by the scraper scripts and `oed.py scrape` / `oed.py pdf`.
+
+
+def read_url_list(path, dedupe=True):
+    # dedupe: each entry once, under the first URL given for it (oed_frontier)
+    with open(path, 'r') as f:
+        urls = [line.strip() for line in f if line.strip()]
+    if not dedupe:
+        return urls
+    unique = unique_urls(urls)
+    if len(unique) < len(urls):
+        print(f"🔗 {len(urls) - len(unique)} duplicate URL(s) in {path} skipped")
+    return unique
+
+
+def build_sinks(out_dir, pdf=False, html=False, records=None, print_options=None, parser="auto", plan=None):
+    sinks = []
+    if pdf:
+        sinks.append(PdfSink(os.path.join(out_dir, 'pdf'), print_options))
+    if html:
+        sinks.append(HtmlSink(os.path.join(out_dir, 'html')))
+    if records:
+        sinks.append(RecordsSink(os.path.join(out_dir, 'scraped'), records, parser=parser, plan=plan))
+    return sinks
+
+
+def write_outputs(sinks, page, record, metrics):
+    # The offline sinks for one page, then that page's metrics line
+    paths, errors = [], []
+    for sink in sinks:
+        try:
+            paths += sink.write(page, record)
+        except Exception as e:
+            errors.append(f"{type(sink).__name__}: {e}")
+    metrics.finish(record, ok=not errors, error="; ".join(errors) or None)
+    return paths, errors
+
+
+def report(future, url, done=None, log=print):
+    # done: the frontier's hook, called once every output of the page is written
+    try:
+        paths, errors = future.result()
+    except Exception as e:
+        paths, errors = [], [str(e)]
+    for path in paths:
+        log(f"  💾 {path}")
+    for error in errors:
+        log(f"  ❌ Output failed for {url}: {error}")
+    if done and not errors:
+        done(url)
+
+
+def scrape(urls, sinks, headless=True, workers=4, chromedriver=None, metrics=None, log=print, on_page=None):
+    # One page load per URL; every sink is fed from that load. urls may be an
+    # oed_frontier.Frontier, which then gets each page's cross-references and
+    # is told which pages were scraped without errors.
+    # on_page(index, url, ok) follows the page loads, for progress bars.
+    metrics = metrics or RunMetrics(tool="oed-scrape")
+    discover = getattr(urls, "discover", None)
+    done = getattr(urls, "done", None)
+    commit = getattr(urls, "commit", None)
+    browser_sinks = [s for s in sinks if s.needs_browser]
+    offline_sinks = [s for s in sinks if not s.needs_browser]
+    etymology = any(s.needs_etymology for s in sinks)
+
+    driver = setup_driver(headless=headless, chromedriver=chromedriver)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for index, url in enumerate(urls):
+                log(f"[{index + 1}/{len(urls)}] ⏳ {url}")
+                record = metrics.record(url)
+                try:
+                    load_entry_page(driver, url, log=log, record=record, etymology=etymology)
+                    with record.stage("snapshot"):
+                        page = PageSnapshot(url, index, driver.title, driver.page_source)
+                    record.add(bytes=len(page.html.encode('utf-8')))
+                    if discover:
+                        discover(url, page.html)
+                    # The PDF needs the live page, everything else works from the snapshot
+                    for sink in browser_sinks:
+                        for path in sink.capture(driver, page, record):
+                            log(f"  💾 {path}")
+                except Exception as e:
+                    log(f"  ❌ Error for {url}: {e}")
+                    metrics.finish(record, ok=False, error=str(e))
+                    if on_page:
+                        on_page(index, url, False)
+                    continue
+                future = executor.submit(write_outputs, offline_sinks, page, record, metrics)
+                future.add_done_callback(lambda f, url=url: report(f, url, done, log))
+                if on_page:
+                    on_page(index, url, True)
+    finally:
+        driver.quit()
+        if commit:
+            # After the output threads, which mark the last pages done
+            commit()
+    return metrics
+
+
+def download_page_as_pdf(url, index, output_folder, print_options=None, chromedriver=None, metrics=None):
+    print(f"[{index}] ⏳ Starting: {url}")
+    record = metrics.record(url) if metrics else None
+    driver = None
+    try:
+        with record.stage("driver") if record else nullcontext():
+            driver = setup_driver(headless=True, chromedriver=chromedriver)
+        load_entry_page(driver, url, record=record)
+
+        headword = driver.title.strip()
+        sanitized_title = sanitize_filename(headword) or f"webpage_{index}"
+        pdf_filename = os.path.join(output_folder, f"{sanitized_title}.pdf")
+
+        with record.stage("pdf") if record else nullcontext():
+            print_to_pdf_stream(driver, pdf_filename, print_options)
+
+        print(f"[{index}] ✅ Saved: {pdf_filename}")
+        if metrics:
+            metrics.finish(record, pdf_bytes=os.path.getsize(pdf_filename))
+    except Exception as e:
+        print(f"[{index}] ❌ Error for {url}: {e}")
+        if metrics:
+            metrics.finish(record, ok=False, error=str(e))
+    finally:
+        if driver:
+            driver.quit()
+
+
+def download_pdfs(urls, output_folder, print_options=None, workers=8, start=0, chromedriver=None, metrics=None):
+    # One headless browser per thread, so pages print in parallel
+    os.makedirs(output_folder, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(download_page_as_pdf, url, i, output_folder, print_options, chromedriver, metrics): i
+            for i, url in enumerate(urls, start=start)
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"[{futures[future]}] ❌ Unexpected error: {e}")
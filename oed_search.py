@@ -0,0 +1,335 @@
+import os
+import re
+import csv
+import xml.etree.ElementTree as ET
+
+# Search functions behind scrapped-search.py (regex with context and headword
+# in one file), scraped-recursive-search.py (matching cells across a folder,
+# or every term of a term list in one pass) and `oed.py search`. pandas is
+# only imported for Excel/CSV input or output.
+
+CONTEXT_HEADERS = ["Headword", "Before", "Match", "After"]
+FOLDER_HEADERS = ["File Name", "Matched Content", "Occurrences", "Percentage of Cells"]
+BATCH_HEADERS = ["Term", "File Name", "Matched Content", "Occurrences"]
+TERM_HEADERS = ["Term", "Occurrences", "Cells", "Files"]
+FILE_TYPES = {
+    "excel": [".xlsx", ".xls"],
+    "csv": [".csv"],
+    "xml": [".xml"],
+    "tei": [".tei", ".tei.xml"],
+}
+
+
+def detect_file_type(filepath):
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext in ['.xlsx', '.xls']: return 'excel'
+    elif ext == '.csv': return 'csv'
+    elif ext == '.txt': return 'txt'
+    elif ext == '.pdf': return 'pdf'
+    elif ext == '.xml': return 'xml'
+    elif ext == '.tei': return 'tei-xml'
+    else: return None
+
+
+def read_table(filepath):
+    import pandas as pd
+    return pd.read_excel(filepath) if detect_file_type(filepath) == 'excel' else pd.read_csv(filepath)
+
+
+class DiskFiles:
+    # How the search functions read their input; oed_server passes its
+    # in-memory copies instead
+    def table(self, filepath):
+        return read_table(filepath)
+
+    def xml_root(self, filepath):
+        with open(filepath, 'r') as f:
+            return ET.parse(f).getroot()
+
+
+DISK = DiskFiles()
+
+
+def extract_text_from_pdf(filepath):
+    import PyPDF2
+    text = ""
+    with open(filepath, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        for page in reader.pages:
+            text += page.extract_text() + "\n"
+    return text
+
+
+def deduplicate_results(results):
+    return list(set(results))
+
+
+def get_text_lines(text):
+    return text.splitlines()
+
+
+# --- Context search (one file) ---
+
+def search_dataframe_with_context_and_headword(df, pattern, case_sensitive=False):
+    results = []
+    flags = 0 if case_sensitive else re.IGNORECASE
+    columns = df.columns.tolist()
+    for idx, row in df.iterrows():
+        for i, col in enumerate(columns):
+            cell = str(row[col])
+            if re.search(pattern, cell, flags):
+                headword = str(row['Headword']) if 'Headword' in row else ''
+                before = str(row[columns[i - 1]]) if i > 0 else ''
+                match = re.sub(f"({pattern})", r"**\1**", cell, flags=flags)
+                after = str(row[columns[i + 1]]) if i < len(columns) - 1 else ''
+                results.append((headword, before, match, after))
+                break
+    return results
+
+
+def search_xml_with_context_and_headword(filepath, pattern, case_sensitive=False, root=None):
+    root = ET.parse(filepath).getroot() if root is None else root
+    flags = 0 if case_sensitive else re.IGNORECASE
+    results = []
+
+    for parent in root.iter():
+        children = list(parent)
+        for i, child in enumerate(children):
+            if child.text and re.search(pattern, child.text.strip(), flags):
+                headword = ''
+                for tag in ['headword', 'hw']:
+                    hw_elem = parent.find(tag)
+                    if hw_elem is not None:
+                        headword = hw_elem.text.strip()
+                        break
+                before = children[i - 1].text.strip() if i > 0 and children[i - 1].text else ''
+                match = re.sub(f"({pattern})", r"**\1**", child.text.strip(), flags=flags)
+                after = children[i + 1].text.strip() if i < len(children) - 1 and children[i + 1].text else ''
+                results.append((headword, before, match, after))
+    return results
+
+
+def search_context(filepath, pattern, case_sensitive=False, dedup=True, log=print, files=DISK):
+    # Returns (headword, before, match, after) tuples, or None for unsupported files
+    filetype = detect_file_type(filepath)
+    log(f"Reading {filepath} as {filetype}...")
+
+    if filetype in ['excel', 'csv']:
+        results = search_dataframe_with_context_and_headword(files.table(filepath), pattern, case_sensitive)
+    elif filetype in ['xml', 'tei-xml']:
+        results = search_xml_with_context_and_headword(filepath, pattern, case_sensitive, files.xml_root(filepath))
+    else:
+        log("Unsupported file type for structured context output.")
+        return None
+
+    if dedup:
+        results = deduplicate_results(results)
+        log(f"Deduplicated results. Total unique matches: {len(results)}")
+    return results
+
+
+def write_context_results(results, save_path, export_format):
+    if export_format == "Excel":
+        import pandas as pd
+        df = pd.DataFrame(results, columns=CONTEXT_HEADERS)
+        df.to_excel(save_path, index=False, engine="openpyxl")
+
+    elif export_format in ["XML", "TEI-XML"]:
+        root = ET.Element("Results")
+        for row in results:
+            entry = ET.SubElement(root, "Entry")
+            for tag, val in zip(CONTEXT_HEADERS, row):
+                ET.SubElement(entry, tag).text = str(val)
+        tree = ET.ElementTree(root)
+        tree.write(save_path, encoding="utf-8", xml_declaration=True)
+
+
+def search_store_rows(rows, schema, pattern, case_sensitive=False):
+    # Corpus store rows (corpus_store.SCHEMA lists) whose quotation matches:
+    # (headword, date, quotation, citation), the neighbouring cells of the match
+    flags = 0 if case_sensitive else re.IGNORECASE
+    regex = re.compile(f"({pattern})", flags)
+    columns = [schema.index(c) for c in ("Headword", "Quotation Date", "Quotation Text", "Citation")]
+    results = []
+    for row in rows:
+        headword, date, text, citation = (row[c] for c in columns)
+        if text and regex.search(text):
+            results.append((headword, date, regex.sub(r"**\1**", text), citation))
+    return results
+
+
+# --- Cell search (folder) ---
+
+def default_config(**overrides):
+    config = {
+        "folder": None,
+        "query": None,
+        "column": None,
+        "search_all": False,
+        "only_excel": False,
+        "only_csv": False,
+        "only_xml": False,
+        "only_tei": False,
+        "case_insensitive": False,
+        "terms": None,  # term list file: batch search instead of the query
+        "whole_words": False,
+        "export_format": "CSV"
+    }
+    config.update(overrides)
+    return config
+
+
+def find_search_files(config):
+    filetypes = []
+    for name, extensions in FILE_TYPES.items():
+        if config[f"only_{name}"]:
+            filetypes += extensions
+
+    # Default to all file types if none selected
+    if not filetypes:
+        filetypes = [ext for extensions in FILE_TYPES.values() for ext in extensions]
+
+    all_files = []
+    for root_dir, _, files in os.walk(config["folder"]):
+        for file in files:
+            if any(file.endswith(ext) for ext in filetypes):
+                all_files.append(os.path.join(root_dir, file))
+    return all_files
+
+
+def search_files(all_files, config, log=print, files=DISK):
+    output = []
+    for file in all_files:
+        log(f"Processing: {file}")
+
+        if file.endswith((".xlsx", ".xls", ".csv")):
+            process_file(files.table(file), file, config, output)
+        elif file.endswith((".xml", ".tei")):
+            process_xml_file(files.xml_root(file), file, config, output)
+    return output
+
+
+def process_file(df, file, config, output):
+    total_cells = 0
+    matched_cells = 0
+    occurrences = 0
+
+    for col in df.columns:
+        if config["search_all"] or (config["column"] and col == config["column"]):
+            total_cells += df[col].notna().sum()  # Count non-empty cells
+            for i, cell in enumerate(df[col]):
+                if isinstance(cell, str):
+                    cell_text = cell.lower() if config["case_insensitive"] else cell
+                    if re.search(config["query"].lower(), cell_text if config["case_insensitive"] else cell_text):
+                        matched_cells += 1
+                        occurrences += len(re.findall(config["query"], cell_text))
+                        output.append([file, cell, occurrences, (matched_cells / total_cells) * 100 if total_cells else 0])
+
+
+def process_xml_file(root, file, config, output):
+    total_cells = 0
+    matched_cells = 0
+    occurrences = 0
+
+    for elem in root.iter():
+        if config["search_all"] or (config["column"] and elem.tag == config["column"]):
+            total_cells += 1
+            if isinstance(elem.text, str):
+                cell_text = elem.text.lower() if config["case_insensitive"] else elem.text
+                if re.search(config["query"].lower(), cell_text if config["case_insensitive"] else cell_text):
+                    matched_cells += 1
+                    occurrences += len(re.findall(config["query"], cell_text))
+                    output.append([file, elem.text, occurrences, (matched_cells / total_cells) * 100 if total_cells else 0])
+
+
+# --- Batch search (folder, term list) ---
+
+def iter_cells(file, config, files=DISK):
+    # The cell/element texts a folder search looks at, as search_files() does
+    if file.endswith((".xlsx", ".xls", ".csv")):
+        df = files.table(file)
+        for col in df.columns:
+            if config["search_all"] or (config["column"] and col == config["column"]):
+                for cell in df[col]:
+                    if isinstance(cell, str):
+                        yield cell
+    elif file.endswith((".xml", ".tei")):
+        for elem in files.xml_root(file).iter():
+            if config["search_all"] or (config["column"] and elem.tag == config["column"]):
+                if isinstance(elem.text, str):
+                    yield elem.text
+
+
+def search_files_batch(all_files, config, matcher, log=print, files=DISK):
+    # One pass over the files for every term of an oed_terms.TermMatcher.
+    # Returns the hits ([term, file, cell, occurrences], one per term and cell)
+    # and the totals per term ({term: [occurrences, cells, files]}).
+    output = []
+    totals = {term: [0, 0, 0] for term in matcher.terms}
+    for file in all_files:
+        log(f"Processing: {file}")
+        in_file = set()
+        for cell in iter_cells(file, config, files):
+            for term, count in matcher.counts(cell).items():
+                output.append([term, file, cell, count])
+                totals[term][0] += count
+                totals[term][1] += 1
+                in_file.add(term)
+        for term in in_file:
+            totals[term][2] += 1
+    return output, totals
+
+
+def write_batch_results(output, totals, output_file, export_format):
+    # Hits and per-term totals; CSV puts the totals next to the hits in <name>_terms.csv
+    summary = [[term, *counts] for term, counts in totals.items()]
+    if export_format == "CSV":
+        totals_file = os.path.splitext(output_file)[0] + "_terms.csv"
+        for path, headers, rows in ((output_file, BATCH_HEADERS, output), (totals_file, TERM_HEADERS, summary)):
+            with open(path, mode='w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(headers)
+                writer.writerows(rows)
+
+    elif export_format == "Excel":
+        import pandas as pd
+        with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
+            pd.DataFrame(output, columns=BATCH_HEADERS).to_excel(writer, sheet_name="Hits", index=False)
+            pd.DataFrame(summary, columns=TERM_HEADERS).to_excel(writer, sheet_name="Terms", index=False)
+
+    elif export_format == "XML":
+        root = ET.Element("BatchResults")
+        terms = ET.SubElement(root, "Terms")
+        for term, occurrences, cells, files in summary:
+            ET.SubElement(terms, "Term", name=term, occurrences=str(occurrences), cells=str(cells), files=str(files))
+        for term, file, cell, count in output:
+            result = ET.SubElement(root, "Result", term=term)
+            ET.SubElement(result, "FileName").text = file
+            ET.SubElement(result, "MatchedContent").text = cell
+            ET.SubElement(result, "Occurrences").text = str(count)
+        ET.ElementTree(root).write(output_file, encoding="utf-8", xml_declaration=True)
+
+
+def write_folder_results(output, output_file, export_format):
+    if export_format == "CSV":
+        with open(output_file, mode='w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(FOLDER_HEADERS)
+            writer.writerows(output)
+
+    elif export_format == "Excel":
+        import pandas as pd
+        df = pd.DataFrame(output, columns=FOLDER_HEADERS)
+        df.to_excel(output_file, index=False)
+
+    elif export_format == "XML":
+        root = ET.Element("SearchResults")
+        for row in output:
+            result = ET.SubElement(root, "Result")
+            ET.SubElement(result, "FileName").text = row[0]
+            ET.SubElement(result, "MatchedContent").text = row[1]
+            ET.SubElement(result, "Occurrences").text = str(row[2])
+            ET.SubElement(result, "Percentage").text = str(row[3])
+
+        tree = ET.ElementTree(root)
+        tree.write(output_file)
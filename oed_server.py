@@ -0,0 +1,503 @@
+import os
+import re
+import json
+import time
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+import numpy as np
+import oed_search
+from oed_client import DEFAULT_PORT
+from oed_terms import TermMatcher, read_terms
+
+# Resident search service for the search UIs and scripts: the scraped files
+# and corpus stores are read once and kept in memory, so a query costs the
+# search itself, not a Python start, the pandas import and re-reading every
+# file. Only listens locally (127.0.0.1 or a Unix socket).
+#
+#   python oed.py serve --preload corpus_store scraped/
+#
+#   GET  /status   loaded corpora and cache statistics
+#   POST /search   a JSON request; the reply is streamed as JSON lines, one
+#                  per hit, and ends with {"done": true, "count": ..., ...}
+#                  (or {"error": ...})
+#
+# Requests ("type"):
+#   context  {"path", "pattern", "case_sensitive", "dedup"}      scrapped-search.py
+#   folder   {"config": oed_search.default_config() keys}        scraped-recursive-search.py
+#            (with "terms": a term list file, the batch search of oed_terms)
+#   store    {"store", "mode": "regex" | "fuzzy" | "terms" | "cooccur", "pattern" / "query" / "terms",
+#             "k", "window", "case_sensitive", "whole_words", "limit",
+#             "from", "to", "date_field", "exact_dates"}
+#
+# Files are kept with their mtime and size, and a store with its manifest's;
+# whichever changed on disk is read again by the next request that uses it.
+# Parsed files beyond `oed.py serve --memory` are dropped, least recently
+# used first, and read again when asked for.
+# Replies are cached (LRU) under the request plus those stamps, so a cached
+# reply is never older than the data.
+
+CHUNK = 1000  # store rows read from the shards at a time
+XML_EXPANSION = 8  # rough size of a parsed ElementTree per byte of XML
+TEXT_BLOCK = 1024  # quotations per PackedTexts block
+CONTEXT_KEYS = ("headword", "before", "match", "after")
+
+
+def file_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class LoadedFiles(oed_search.DiskFiles):
+    # Tables and XML trees read once and kept until the file changes on disk.
+    # Least recently used ones are dropped past max_bytes (tables measured,
+    # XML trees estimated from the file size) or max_files.
+    def __init__(self, max_bytes=1024 * 2**20, max_files=5000):
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.items = OrderedDict()  # (kind, path) -> (stamp, value, bytes)
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def _load(self, kind, filepath, load, measure):
+        key = (kind, os.path.abspath(filepath))
+        stamp = file_stamp(filepath)
+        with self.lock:
+            item = self.items.get(key)
+            if item and item[0] == stamp:
+                self.items.move_to_end(key)
+                return item[1]
+        value = load(filepath)
+        size = measure(value, stamp[1])
+        with self.lock:
+            old = self.items.pop(key, None)
+            if old:
+                self.bytes -= old[2]
+            self.items[key] = (stamp, value, size)
+            self.bytes += size
+            while len(self.items) > 1 and (self.bytes > self.max_bytes or len(self.items) > self.max_files):
+                self.bytes -= self.items.popitem(last=False)[1][2]
+        return value
+
+    def table(self, filepath):
+        return self._load("table", filepath, super().table,
+                          lambda df, file_size: int(df.memory_usage(deep=True).sum()))
+
+    def xml_root(self, filepath):
+        return self._load("xml", filepath, super().xml_root, lambda root, file_size: file_size * XML_EXPANSION)
+
+    def status(self):
+        with self.lock:
+            return {"files": len(self.items), "megabytes": round(self.bytes / 2**20, 1),
+                    "max_megabytes": round(self.max_bytes / 2**20, 1)}
+
+
+class PackedTexts:
+    # The quotations of a store as one string per TEXT_BLOCK of them, joined
+    # with NUL: a Python string per quotation costs about 50 bytes of overhead,
+    # and a block only needs two or four bytes a character when one of its
+    # own texts does. select() splits each block it needs once.
+    def __init__(self, texts):
+        self.blocks, block, self.count = [], [], 0
+        for text in texts:
+            block.append(text.replace("\0", " "))
+            if len(block) == TEXT_BLOCK:
+                self.blocks.append("\0".join(block))
+                block = []
+            self.count += 1
+        if block:
+            self.blocks.append("\0".join(block))
+
+    def __len__(self):
+        return self.count
+
+    def select(self, ids=None):
+        # (row id, text) for the sorted ids, or for every row
+        if ids is None:
+            for b, block in enumerate(self.blocks):
+                yield from enumerate(block.split("\0"), start=b * TEXT_BLOCK)
+            return
+        current, texts = None, None
+        for n in ids:
+            b = n // TEXT_BLOCK
+            if b != current:
+                current, texts = b, self.blocks[b].split("\0")
+            yield n, texts[n - b * TEXT_BLOCK]
+
+
+def shortest_span(positions):
+    # Fewest tokens covering one position from every list (sliding window)
+    events = sorted((p, n) for n, found in enumerate(positions) for p in found)
+    seen, covered, best, left = [0] * len(positions), 0, None, 0
+    for p, n in events:
+        seen[n] += 1
+        covered += seen[n] == 1
+        while covered == len(positions):
+            first, m = events[left]
+            best = p - first if best is None else min(best, p - first)
+            seen[m] -= 1
+            covered -= seen[m] == 0
+            left += 1
+    return best
+
+
+class LoadedStore:
+    # A corpus store with its date index (built if needed) and the quotation
+    # texts in memory (PackedTexts); the indexes are memory-mapped, full rows are read from
+    # the shards only for hits. The fuzzy index is opened on first use.
+    def __init__(self, store_dir, progress=print):
+        from corpus_dates import open_dates
+        from corpus_store import MANIFEST
+        self.store_dir = store_dir
+        self.stamp = file_stamp(os.path.join(store_dir, MANIFEST))
+        self.dates = open_dates(store_dir, progress)
+        self.store = self.dates.store
+        self.schema = self.store.schema
+        self.progress = progress
+        column = self.schema.index("Quotation Text")
+        self.texts = PackedTexts(row[column] or '' for row in self.store.iter_rows())
+        self.columns = [self.schema.index(c) for c in ("Headword", "Quotation Date", "Quotation Text", "Citation")]
+        self._fuzzy_index = None
+        self._lock = threading.Lock()
+        progress(f"📚 Loaded {store_dir}: {len(self.texts)} quotations")
+
+    def fuzzy(self):
+        with self._lock:
+            if self._fuzzy_index is None:
+                from corpus_fuzzy import open_index
+                self._fuzzy_index = open_index(self.store_dir, self.progress)
+            return self._fuzzy_index
+
+    def period(self, request):
+        # Sorted row ids within from/to, or None for no date filter
+        if request.get("from") is None and request.get("to") is None:
+            return None
+        return self.dates.rows(request.get("from"), request.get("to"), request.get("date_field", "quotation"),
+                               not request.get("exact_dates"))
+
+    def hits(self, ids, describe):
+        # describe(row id, row) for the rows of `ids`, read chunk by chunk
+        for start in range(0, len(ids), CHUNK):
+            chunk = np.asarray(ids[start:start + CHUNK], dtype=np.int64)
+            for n, row in zip(chunk.tolist(), self.dates.load(chunk)):
+                yield describe(n, row)
+
+    def context(self, row, match):
+        h, d, _, c = self.columns
+        return {"headword": row[h], "before": row[d], "match": match, "after": row[c]}
+
+    def search(self, request, summary):
+        # A lazy hit iterator: the request is checked here, the search itself
+        # only runs when the reply is not in the cache
+        mode = request.get("mode", "regex")
+        limit = request.get("limit")
+
+        if mode == "regex":
+            flags = 0 if request.get("case_sensitive") else re.IGNORECASE
+            return self._regex(request, re.compile(f"({request['pattern']})", flags), limit)
+
+        if mode == "fuzzy":
+            return self._fuzzy(request, request["query"], request.get("k", 1), limit)
+
+        if mode == "terms":
+            matcher = TermMatcher(request["terms"], request.get("case_sensitive", False),
+                                  request.get("whole_words", False))
+            return self._terms(request, matcher, limit, summary)
+
+        if mode == "cooccur":
+            from corpus_fuzzy import fold
+            from corpus_tokens import tokenize
+            words = tokenize(fold(request["query"]))
+            if len(words) < 2:
+                raise ValueError("A co-occurrence search needs at least two words")
+            return self._cooccur(request, words, limit)
+
+        raise ValueError(f"Unknown store search mode {mode!r}")
+
+    def _candidates(self, request):
+        rows = self.period(request)
+        return rows, None if rows is None else rows.tolist()
+
+    def _regex(self, request, regex, limit):
+        rows, candidates = self._candidates(request)
+        ids = [n for n, text in self.texts.select(candidates) if regex.search(text)][:limit]
+        yield from self.hits(ids, lambda n, row: self.context(row, regex.sub(r"**\1**", row[self.columns[2]])))
+
+    def _fuzzy(self, request, query, k, limit):
+        from corpus_fuzzy import highlight
+        rows, _ = self._candidates(request)
+        for row, terms in self.fuzzy().search(query, k, limit, rows=rows):
+            yield self.context(row, highlight(row[self.columns[2]], terms))
+
+    def _terms(self, request, matcher, limit, summary):
+        rows, candidates = self._candidates(request)
+        totals = {term: [0, 0] for term in matcher.terms}
+        found = []
+        for n, text in self.texts.select(candidates):
+            counts = matcher.counts(text)
+            for term, count in counts.items():
+                totals[term][0] += count
+                totals[term][1] += 1
+            if counts:
+                found.append((n, counts))
+        found = found[:limit]
+        summary["totals"] = {term: {"occurrences": o, "quotations": q} for term, (o, q) in totals.items()}
+        by_row = dict(found)
+        for n, row in self.hits([n for n, _ in found], lambda n, row: (n, row)):
+            for term, count in by_row[n].items():
+                yield {**self.context(row, row[self.columns[2]]), "term": term, "occurrences": count}
+
+    def _cooccur(self, request, words, limit):
+        # Quotations with every word (within k edits) no more than `window` tokens apart
+        from corpus_fuzzy import fold, highlight
+        from corpus_tokens import tokenize
+        rows, _ = self._candidates(request)
+        fuzzy = self.fuzzy()
+        k, window = request.get("k", 0), request.get("window", 5)
+        expansions = [fuzzy.expand(word, k) for word in words]
+        if not all(expansions):
+            return
+        found = None
+        for terms in expansions:
+            posting = fuzzy.postings(terms)
+            found = posting if found is None else np.intersect1d(found, posting, assume_unique=True)
+        if rows is not None:
+            found = np.intersect1d(found, rows, assume_unique=True)
+        ids = []
+        for n, text in self.texts.select(found.tolist()):
+            tokens = tokenize(fold(text))
+            positions = [[p for p, token in enumerate(tokens) if token in terms] for terms in expansions]
+            if shortest_span(positions) <= window:
+                ids.append(n)
+        words = {term: 0 for terms in expansions for term in terms}
+        yield from self.hits(ids[:limit], lambda n, row: self.context(row, highlight(row[self.columns[2]], words)))
+
+
+class SearchService:
+    def __init__(self, progress=print, file_memory=1024 * 2**20):
+        self.files = LoadedFiles(file_memory)
+        self.stores = {}
+        self.lock = threading.Lock()
+        self.progress = progress
+        self.started = time.time()
+
+    def store(self, store_dir):
+        # The loaded store, read again when its manifest changed
+        from corpus_store import MANIFEST
+        store_dir = os.path.abspath(store_dir)
+        manifest = os.path.join(store_dir, MANIFEST)
+        if not os.path.exists(manifest):
+            raise ValueError(f"{store_dir} is not a corpus store")
+        with self.lock:
+            loaded = self.stores.get(store_dir)
+            if loaded is None or loaded.stamp != file_stamp(manifest):
+                if loaded is not None:
+                    self.progress(f"🔁 {store_dir} changed, reloading")
+                loaded = self.stores[store_dir] = LoadedStore(store_dir, self.progress)
+            return loaded
+
+    def preload(self, path):
+        from corpus_store import MANIFEST
+        if os.path.exists(os.path.join(path, MANIFEST)):
+            self.store(path)
+            return
+        config = oed_search.default_config(folder=path)
+        files = [path] if os.path.isfile(path) else oed_search.find_search_files(config)
+        for file in files:
+            if oed_search.detect_file_type(file) in ("excel", "csv"):
+                self.files.table(file)
+            elif oed_search.detect_file_type(file) in ("xml", "tei-xml"):
+                self.files.xml_root(file)
+        self.progress(f"📚 Loaded {len(files)} file(s) from {path}")
+
+    def prepare(self, request):
+        # (cache key, hit iterator, summary filled in while iterating); bad
+        # requests raise before anything is streamed
+        kind = request.get("type")
+        summary = {}
+        if kind == "context":
+            path = request["path"]
+            stamps = file_stamp(path)
+            re.compile(request["pattern"])
+            hits = self._context(request, path, summary)
+        elif kind == "folder":
+            config = oed_search.default_config(**request["config"])
+            files = oed_search.find_search_files(config)
+            stamps = [file_stamp(file) for file in files]
+            if config["terms"]:
+                stamps.append(file_stamp(config["terms"]))
+                matcher = TermMatcher(read_terms(config["terms"]), not config["case_insensitive"],
+                                      config["whole_words"])
+                hits = self._batch(files, config, matcher, summary)
+            else:
+                re.compile(config["query"])
+                hits = self._folder(files, config)
+        elif kind == "store":
+            store = self.store(request["store"])
+            stamps = store.stamp
+            hits = store.search(request, summary)
+        else:
+            raise ValueError(f"Unknown request type {kind!r}")
+        key = json.dumps([request, stamps], sort_keys=True)
+        return key, hits, summary
+
+    def _context(self, request, path, summary):
+        results = oed_search.search_context(path, request["pattern"], request.get("case_sensitive", False),
+                                            request.get("dedup", True), log=lambda message: None, files=self.files)
+        if results is None:
+            raise ValueError(f"Unsupported file type for context search: {path}")
+        for result in results:
+            yield dict(zip(CONTEXT_KEYS, result))
+
+    def _folder(self, files, config):
+        output = oed_search.search_files(files, config, log=lambda message: None, files=self.files)
+        for file, content, occurrences, percentage in output:
+            yield {"file": file, "content": content, "occurrences": int(occurrences), "percentage": float(percentage)}
+
+    def _batch(self, files, config, matcher, summary):
+        output, totals = oed_search.search_files_batch(files, config, matcher, log=lambda message: None,
+                                                       files=self.files)
+        summary["totals"] = {term: {"occurrences": o, "cells": c, "files": f} for term, (o, c, f) in totals.items()}
+        for term, file, content, occurrences in output:
+            yield {"term": term, "file": file, "content": content, "occurrences": occurrences}
+
+    def status(self):
+        with self.lock:
+            stores = {path: len(store.texts) for path, store in self.stores.items()}
+        return {"uptime": time.time() - self.started, "stores": stores, **self.files.status()}
+
+
+class ResultCache:
+    # LRU of finished replies (hit lines + summary); large replies are not kept
+    def __init__(self, size=128, max_hits=20000):
+        self.size = size
+        self.max_hits = max_hits
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self.items.move_to_end(key)
+            self.hits += 1
+            return item
+
+    def put(self, key, lines, summary):
+        if not self.size or lines is None:
+            return
+        with self.lock:
+            self.items[key] = (lines, summary)
+            self.items.move_to_end(key)
+            while len(self.items) > self.size:
+                self.items.popitem(last=False)
+
+    def status(self):
+        with self.lock:
+            return {"entries": len(self.items), "size": self.size, "hits": self.hits, "misses": self.misses}
+
+
+class SearchHandler(BaseHTTPRequestHandler):
+    # HTTP/1.0: the streamed reply ends when the connection closes
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "local"
+
+    def log_message(self, format, *args):
+        self.server.log(f"  {self.address_string()} {format % args}")
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/status":
+            self.send_json(404, {"error": "Not found"})
+            return
+        self.send_json(200, {**self.server.service.status(), "cache": self.server.cache.status()})
+
+    def do_POST(self):
+        if self.path != "/search":
+            self.send_json(404, {"error": "Not found"})
+            return
+        started = time.monotonic()
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            key, hits, summary = self.server.service.prepare(request)
+        except (ValueError, KeyError, TypeError, OSError, re.error) as e:
+            self.send_json(400, {"error": f"{type(e).__name__}: {e}" if isinstance(e, KeyError) else str(e)})
+            return
+
+        try:
+            self.stream(key, hits, summary, started)
+        except (BrokenPipeError, ConnectionResetError):
+            self.server.log(f"  {self.address_string()} closed the connection before the end of the reply")
+
+    def stream(self, key, hits, summary, started):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        cached = self.server.cache.get(key)
+        if cached:
+            lines, summary = cached
+            self.wfile.write(b"".join(lines))
+        else:
+            lines, count = [], 0
+            try:
+                for hit in hits:
+                    line = (json.dumps(hit, ensure_ascii=False) + "\n").encode("utf-8")
+                    self.wfile.write(line)
+                    count += 1
+                    if lines is not None:
+                        lines.append(line)
+                        if count > self.server.cache.max_hits:
+                            lines = None
+            except (BrokenPipeError, ConnectionResetError):
+                raise
+            except Exception as e:
+                self.wfile.write((json.dumps({"error": str(e)}) + "\n").encode("utf-8"))
+                return
+            summary = {**summary, "count": count}
+            self.server.cache.put(key, lines, summary)
+        done = {"done": True, **summary, "cached": bool(cached), "seconds": time.monotonic() - started}
+        self.wfile.write((json.dumps(done, ensure_ascii=False) + "\n").encode("utf-8"))
+
+
+class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(port=DEFAULT_PORT, socket_path=None, cache_size=128, preload=(), log=print, file_memory=1024 * 2**20):
+    # file_memory: bytes of parsed tables and XML trees kept (LoadedFiles)
+    service = SearchService(log, file_memory)
+    for path in preload:
+        service.preload(path)
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixHTTPServer(socket_path, SearchHandler)
+        address = f"unix:{socket_path}"
+    else:
+        server = ThreadingHTTPServer(("127.0.0.1", port), SearchHandler)
+        address = f"127.0.0.1:{port}"
+    server.service = service
+    server.cache = ResultCache(cache_size)
+    server.log = log
+    log(f"🔎 Search server listening on {address} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
@@ -0,0 +1,207 @@
+import os
+from contextlib import nullcontext
+import xml.etree.ElementTree as ET
+from xml.dom import minidom
+import pandas as pd
+from oed_extract import FULL_PLAN, extract_entries, resolve_parser, safe_filename, sanitize_filename
+from oed_model import COLUMNS, counts, iter_rows
+
+# Outputs that can be produced from one loaded OED page. Browser sinks need the
+# live page (PDF printing) and run on the driver thread; the others only need
+# the captured HTML and run on a worker pool while the browser moves on.
+# needs_etymology: whether the etymology "show more" must be expanded first.
+# Every sink takes an optional oed_metrics.ItemMetrics for its stage timings.
+
+
+def _stage(record, name):
+    return record.stage(name) if record else nullcontext()
+
+
+class PageSnapshot:
+    def __init__(self, url, index, title, html):
+        self.url = url
+        self.index = index
+        self.title = title
+        self.html = html
+
+    def basename(self):
+        return sanitize_filename(self.title.strip()) or f"webpage_{self.index}"
+
+
+class PdfSink:
+    needs_browser = True
+    needs_etymology = True
+
+    def __init__(self, out_dir, print_options=None):
+        self.out_dir = out_dir
+        self.print_options = print_options
+        os.makedirs(out_dir, exist_ok=True)
+
+    def capture(self, driver, page, record=None):
+        from oed_browser import print_to_pdf_stream
+        path = os.path.join(self.out_dir, f"{page.basename()}.pdf")
+        with _stage(record, "pdf"):
+            print_to_pdf_stream(driver, path, self.print_options)
+        if record:
+            record.add(pdf_bytes=os.path.getsize(path))
+        return [path]
+
+
+class HtmlSink:
+    needs_browser = False
+    needs_etymology = True
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        os.makedirs(out_dir, exist_ok=True)
+
+    def write(self, page, record=None):
+        path = os.path.join(self.out_dir, f"{page.basename()}_{page.index + 1}.html")
+        with _stage(record, "html"), open(path, 'w', encoding='utf-8') as f:
+            f.write(page.html)
+        return [path]
+
+
+# The writers take oed_model entries; flat rows are only built here, as tuples
+# sharing the entries' strings, while the frame is filled
+
+# blank: COLUMNS left empty, those outside the sink's extraction plan
+
+def entries_frame(entries, blank=()):
+    return pd.DataFrame.from_records(iter_rows(entries, blank=blank), columns=COLUMNS)
+
+
+def write_excel(entries, path, blank=()):
+    entries_frame(entries, blank).to_excel(path, index=False)
+
+
+def write_csv(entries, path, blank=()):
+    entries_frame(entries, blank).to_csv(path, index=False)
+
+
+def write_parquet(entries, path, blank=()):
+    # Needs pyarrow (or fastparquet) installed
+    entries_frame(entries, blank).to_parquet(path, index=False)
+
+
+def entries_to_xml(entries, blank=()):
+    # Same element layout as oed-scraper-urllist-xml.py: entry > meaning > quotation.
+    # Entries sharing a headword are merged, as are repeats of the last meaning.
+    elements, last_meaning = {}, {}
+    for entry in entries:
+        element = elements.get(entry.headword)
+        if element is None:
+            element = elements[entry.headword] = ET.Element('entry')
+            ET.SubElement(element, 'headword').text = '' if 'Headword' in blank else entry.headword
+            ET.SubElement(element, 'url').text = '' if 'URL' in blank else entry.url
+            ET.SubElement(element, 'etymology').text = entry.etymology
+        for sense in entry.senses or [None]:
+            meaning_key = (sense.enumerator, sense.meaning) if sense else ('', '')
+            last = last_meaning.get(entry.headword)
+            if last is None or last[0] != meaning_key:
+                meaning = ET.SubElement(element, 'meaning')
+                ET.SubElement(meaning, 'item_enumerator').text = sense.enumerator if sense else ''
+                ET.SubElement(meaning, 'daterange').text = sense.daterange if sense else ''
+                ET.SubElement(meaning, 'grammar').text = sense.grammar if sense else ''
+                ET.SubElement(meaning, 'definition').text = sense.meaning if sense else ''
+                last = last_meaning[entry.headword] = (meaning_key, meaning)
+            for quotation in sense.quotations if sense else ():
+                if not (quotation.date or quotation.text or quotation.citation):
+                    continue
+                quote = ET.SubElement(last[1], 'quotation')
+                ET.SubElement(quote, 'date').text = quotation.date
+                ET.SubElement(quote, 'text').text = quotation.text
+                ET.SubElement(quote, 'citation').text = quotation.citation
+
+    if len(elements) == 1:
+        return next(iter(elements.values()))
+    root = ET.Element('entries')
+    root.extend(elements.values())
+    return root
+
+
+def write_xml(entries, path, blank=()):
+    rough_string = ET.tostring(entries_to_xml(entries, blank), 'utf-8')
+    pretty_xml = minidom.parseString(rough_string).toprettyxml(indent="  ")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(pretty_xml)
+
+
+RECORD_WRITERS = {
+    'excel': ('.xlsx', write_excel),
+    'csv': ('.csv', write_csv),
+    'xml': ('.xml', write_xml),
+    'parquet': ('.parquet', write_parquet),
+}
+
+
+class RecordsSink:
+    # Parses the page once and writes every requested format
+    needs_browser = False
+
+    def __init__(self, out_dir, formats=('excel',), subdirs=True, parser="auto", plan=None):
+        # subdirs=False writes straight into out_dir, like the old url-list scrapers;
+        # parser is one of oed_extract.PARSERS, plan an oed_extract.ExtractionPlan
+        self.out_dir = out_dir
+        self.formats = list(formats)
+        self.subdirs = subdirs
+        self.parser = resolve_parser(parser)
+        self.plan = plan or FULL_PLAN
+        self.blank = [column for column in COLUMNS if not self.plan.wants(column)]
+        self.needs_etymology = self.plan.etymology
+        for fmt in self.formats:
+            if fmt not in RECORD_WRITERS:
+                raise ValueError(f"Unknown records format: {fmt}")
+            os.makedirs(self._dir(fmt), exist_ok=True)
+
+    def _dir(self, fmt):
+        return os.path.join(self.out_dir, fmt) if self.subdirs else self.out_dir
+
+    def write(self, page, record=None):
+        return self.write_entries(page, self.parse(page, record), record)
+
+    def parse(self, page, record=None):
+        with _stage(record, "parse"):
+            entries = extract_entries(page.html, page.url, self.parser, self.plan)
+        if record:
+            record.add(**counts(entries))
+        return entries
+
+    def file_name(self, page, entries):
+        first_headword = safe_filename(entries[0].headword) if entries else ''
+        return f"{first_headword}_{page.index + 1}" if first_headword else f"extracted_data_{page.index + 1}"
+
+    def write_entries(self, page, entries, record=None, name=None):
+        # name: the file name without extension (default file_name())
+        name = name or self.file_name(page, entries)
+        paths = []
+        for fmt in self.formats:
+            extension, writer = RECORD_WRITERS[fmt]
+            path = os.path.join(self._dir(fmt), name + extension)
+            with _stage(record, f"export_{fmt}"):
+                writer(entries, path, self.blank)
+            paths.append(path)
+        return paths
+
+
+class CombinedRecordsSink(RecordsSink):
+    # Keeps the entries of every page and writes them into one file per format
+    # on close(), in URL list order
+    def __init__(self, out_dir, formats=('xml',), name="oed_entries", parser="auto", plan=None):
+        super().__init__(out_dir, formats, subdirs=False, parser=parser, plan=plan)
+        self.name = name
+        self.pages = []
+
+    def write_entries(self, page, entries, record=None):
+        self.pages.append((page.index, entries))
+        return []
+
+    def close(self):
+        entries = [entry for _, page_entries in sorted(self.pages, key=lambda p: p[0]) for entry in page_entries]
+        paths = []
+        for fmt in self.formats:
+            extension, writer = RECORD_WRITERS[fmt]
+            path = os.path.join(self.out_dir, self.name + extension)
+            writer(entries, path, self.blank)
+            paths.append(path)
+        return paths
@@ -0,0 +1,155 @@
+import re
+from collections import Counter, deque
+
+# Multi-term matching for batch searches: every cell is scanned once for all
+# the terms of a term list, however many there are.
+#
+# Term list: one term per line, "#" starts a comment. Plain lines are literal
+# strings and go into one Aho-Corasick automaton (pyahocorasick when
+# installed, else the pure-Python one below); lines starting with "re:" are
+# regular expressions and go into one alternation with a named group per
+# term. Regex terms matching the same text are counted for the first one
+# listed, as the alternation tries them in order. Patterns that cannot share
+# an alternation (numeric backreferences or conditionals, which would point
+# at the wrong group, named groups, inline global flags such as "(?i)") are
+# compiled on their own and counted independently.
+#
+#   matcher = TermMatcher(read_terms("field.txt"))
+#   for term, count in matcher.counts(cell).items(): ...
+
+ENGINES = ["auto", "pyahocorasick", "python"]
+REGEX_PREFIX = "re:"
+_STANDALONE = re.compile(r'\\[1-9]|\(\?P[<=]|\(\?\(|\(\?[aiLmsux]+\)')
+
+
+def pyahocorasick_available():
+    try:
+        import ahocorasick  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def resolve_engine(name="auto"):
+    if name == "auto":
+        return "pyahocorasick" if pyahocorasick_available() else "python"
+    return name
+
+
+def read_terms(path):
+    terms = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#") and line not in terms:
+                terms.append(line)
+    return terms
+
+
+class AhoCorasick:
+    # Trie of the words with failure links; iter() yields (end index, word
+    # index) for every occurrence, overlapping ones included
+    def __init__(self, words):
+        self.goto, self.fail, self.out = [{}], [0], [[]]
+        for index, word in enumerate(words):
+            node = 0
+            for char in word:
+                child = self.goto[node].get(char)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto[node][char] = child
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                node = child
+            self.out[node].append(index)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(char, 0)
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def iter(self, text):
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for end, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for index in out[node]:
+                yield end, index
+
+
+class _PyAhoCorasick:
+    def __init__(self, words):
+        import ahocorasick
+        self.automaton = ahocorasick.Automaton()
+        for index, word in enumerate(words):
+            self.automaton.add_word(word, index)
+        self.automaton.make_automaton()
+
+    def iter(self, text):
+        return self.automaton.iter(text) if len(self.automaton) else iter(())
+
+
+class TermMatcher:
+    def __init__(self, terms, case_sensitive=False, whole_words=False, engine="auto"):
+        # whole_words: literal terms only match between non-word characters
+        self.terms = list(terms)
+        self.case_sensitive = case_sensitive
+        self.whole_words = whole_words
+        self.engine = resolve_engine(engine)
+        self.literals = [t for t in self.terms if not t.startswith(REGEX_PREFIX)]
+        self.regexes = [t for t in self.terms if t.startswith(REGEX_PREFIX)]
+
+        words = [self._fold(t) for t in self.literals]
+        self.automaton = (_PyAhoCorasick if self.engine == "pyahocorasick" else AhoCorasick)(words)
+        self.lengths = [len(w) for w in words]
+
+        flags = 0 if case_sensitive else re.IGNORECASE
+        groups, self.separate = [], []
+        for n, term in enumerate(self.regexes):
+            pattern = term[len(REGEX_PREFIX):]
+            try:
+                compiled = re.compile(pattern, flags)
+            except re.error as e:
+                raise ValueError(f"Invalid pattern {term!r}: {e}")
+            if _STANDALONE.search(pattern):
+                self.separate.append((term, compiled))
+            else:
+                groups.append(f"(?P<t{n}>{pattern})")
+        self.regex = re.compile("|".join(groups), flags) if groups else None
+
+    def _fold(self, text):
+        return text if self.case_sensitive else text.casefold()
+
+    def counts(self, text):
+        # {term: occurrences} for the terms found in text
+        found = Counter()
+        if self.literals:
+            folded = self._fold(text)
+            for end, index in self.automaton.iter(folded):
+                if self.whole_words:
+                    start = end - self.lengths[index] + 1
+                    if (start > 0 and _word_char(folded[start - 1])) or \
+                            (end + 1 < len(folded) and _word_char(folded[end + 1])):
+                        continue
+                found[self.literals[index]] += 1
+        if self.regex:
+            for match in self.regex.finditer(text):
+                found[self.regexes[int(match.lastgroup[1:])]] += 1
+        for term, regex in self.separate:
+            count = sum(1 for _ in regex.finditer(text))
+            if count:
+                found[term] = count
+        return found
+
+
+def _word_char(char):
+    return char.isalnum() or char == "_"
@@ -1,11 +1,8 @@
 import os
-import re
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-import pandas as pd
-import xml.etree.ElementTree as ET
-import PyPDF2
-import tempfile
+from oed_search import search_context, write_context_results
+from oed_client import ServerError, search, server_available
 
 # --- Helper functions ---
 def log(message, console, verbose=True):
@@ -15,68 +12,6 @@ def log(message, console, verbose=True):
             console.insert(tk.END, message + "\n")
             console.see(tk.END)
 
-def detect_file_type(filepath):
-    ext = os.path.splitext(filepath)[1].lower()
-    if ext in ['.xlsx', '.xls']: return 'excel'
-    elif ext == '.csv': return 'csv'
-    elif ext == '.txt': return 'txt'
-    elif ext == '.pdf': return 'pdf'
-    elif ext == '.xml': return 'xml'
-    elif ext == '.tei': return 'tei-xml'
-    else: return None
-
-def extract_text_from_pdf(filepath):
-    text = ""
-    with open(filepath, 'rb') as f:
-        reader = PyPDF2.PdfReader(f)
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-    return text
-
-def deduplicate_results(results):
-    return list(set(results))
-
-def get_text_lines(text):
-    return text.splitlines()
-
-def search_dataframe_with_context_and_headword(df, pattern, case_sensitive=False):
-    results = []
-    flags = 0 if case_sensitive else re.IGNORECASE
-    columns = df.columns.tolist()
-    for idx, row in df.iterrows():
-        for i, col in enumerate(columns):
-            cell = str(row[col])
-            if re.search(pattern, cell, flags):
-                headword = str(row['Headword']) if 'Headword' in row else ''
-                before = str(row[columns[i - 1]]) if i > 0 else ''
-                match = re.sub(f"({pattern})", r"**\\1**", cell, flags=flags)
-                after = str(row[columns[i + 1]]) if i < len(columns) - 1 else ''
-                results.append((headword, before, match, after))
-                break
-    return results
-
-def search_xml_with_context_and_headword(filepath, pattern, case_sensitive=False):
-    tree = ET.parse(filepath)
-    root = tree.getroot()
-    flags = 0 if case_sensitive else re.IGNORECASE
-    results = []
-
-    for parent in root.iter():
-        children = list(parent)
-        for i, child in enumerate(children):
-            if child.text and re.search(pattern, child.text.strip(), flags):
-                headword = ''
-                for tag in ['headword', 'hw']:
-                    hw_elem = parent.find(tag)
-                    if hw_elem is not None:
-                        headword = hw_elem.text.strip()
-                        break
-                before = children[i - 1].text.strip() if i > 0 and children[i - 1].text else ''
-                match = re.sub(f"({pattern})", r"**\\1**", child.text.strip(), flags=flags)
-                after = children[i + 1].text.strip() if i < len(children) - 1 and children[i + 1].text else ''
-                results.append((headword, before, match, after))
-    return results
-
 def prompt_column_selection(headers):
     selection_window = tk.Toplevel()
     selection_window.title("Select Headers")
@@ -96,26 +31,22 @@ def prompt_column_selection(headers):
     return selection_window.selected_headers
 
 def search_file(filepath, pattern, export_format, dedup, console, case_sensitive):
-    filetype = detect_file_type(filepath)
-    results = []
-
-    log(f"Reading {filepath} as {filetype}...", console)
-
-    if filetype in ['excel', 'csv']:
-        df = pd.read_excel(filepath) if filetype == 'excel' else pd.read_csv(filepath)
-        results = search_dataframe_with_context_and_headword(df, pattern, case_sensitive)
-
-    elif filetype in ['xml', 'tei-xml']:
-        results = search_xml_with_context_and_headword(filepath, pattern, case_sensitive)
-
+    # With `oed.py serve` running, the file stays loaded in the server between searches
+    if server_available():
+        log(f"Searching {filepath} with the search server...", console)
+        request = {"type": "context", "path": filepath, "pattern": pattern,
+                   "case_sensitive": case_sensitive, "dedup": dedup}
+        try:
+            results = [(hit["headword"], hit["before"], hit["match"], hit["after"]) for hit in search(request)]
+        except ServerError as e:
+            log(str(e), console)
+            messagebox.showerror("Error", str(e))
+            return
     else:
-        log("Unsupported file type for structured context output.", console)
+        results = search_context(filepath, pattern, case_sensitive, dedup, log=lambda message: log(message, console))
+    if results is None:
         return
 
-    if dedup:
-        results = deduplicate_results(results)
-        log(f"Deduplicated results. Total unique matches: {len(results)}", console)
-
     if not results:
         messagebox.showinfo("Search Complete", "No matches found.")
         return
@@ -125,20 +56,7 @@ def search_file(filepath, pattern, export_format, dedup, console, case_sensitive
     if not save_path:
         return
 
-    headers = ["Headword", "Before", "Match", "After"]
-
-    if export_format == "Excel":
-        df = pd.DataFrame(results, columns=headers)
-        df.to_excel(save_path, index=False, engine="openpyxl")
-
-    elif export_format in ["XML", "TEI-XML"]:
-        root = ET.Element("Results")
-        for row in results:
-            entry = ET.SubElement(root, "Entry")
-            for tag, val in zip(headers, row):
-                ET.SubElement(entry, tag).text = str(val)
-        tree = ET.ElementTree(root)
-        tree.write(save_path, encoding="utf-8", xml_declaration=True)
+    write_context_results(results, save_path, export_format)
 
     log(f"Results saved to {save_path}", console)
     messagebox.showinfo("Search Complete", f"Results exported to {save_path}")